@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Severity buckets 0.05 wide, closed on the right; edges fall on the 0.5 and 0.7 metric thresholds
+SEVERITY_BUCKET = 0.05
+SEVERITY_EDGES = np.round(np.arange(0, 1.5 + SEVERITY_BUCKET / 2, SEVERITY_BUCKET), 2)
+
+# Running sums kept per cube cell; means are sums / count
+MEASURES = ['severity', 'ndvi_change', 'bsi_change']
+
+
+class AnalyticsCube:
+    """Detection counts and measure sums pre-aggregated by date x region x severity bucket
+
+    Built once from the raw detections with a single bincount per
+    measure. Filters are a date slice (dates are sorted, so a
+    searchsorted) and a region index, after which every chart reduces a
+    few small arrays instead of grouping the raw rows.
+    """
+
+    def __init__(self, dates, regions, count, sums):
+        self.dates = dates          # sorted datetime64[D]
+        self.regions = regions      # list of region names
+        self.count = count          # (date, region, bucket) int64
+        self.sums = sums            # measure -> (date, region, bucket) float64
+
+    @classmethod
+    def from_frame(cls, df):
+        """Aggregate a frame with date, region, severity, ndvi_change and bsi_change columns"""
+        days = df['date'].to_numpy().astype('datetime64[D]')
+        dates, date_idx = np.unique(days, return_inverse=True)
+        regions, region_idx = np.unique(df['region'].to_numpy().astype(str), return_inverse=True)
+        severity = df['severity'].to_numpy(dtype=np.float64)
+        # (lower, upper] buckets, so "above a threshold" is every bucket from it up;
+        # zero joins the first bucket and values past the last edge the last one
+        bucket_idx = np.searchsorted(SEVERITY_EDGES, severity, 'left') - 1
+        bucket_idx = np.clip(bucket_idx, 0, len(SEVERITY_EDGES) - 2)
+
+        shape = (len(dates), len(regions), len(SEVERITY_EDGES) - 1)
+        flat = np.ravel_multi_index((date_idx.ravel(), region_idx.ravel(), bucket_idx), shape)
+        size = int(np.prod(shape))
+        count = np.bincount(flat, minlength=size).reshape(shape)
+        sums = {
+            measure: np.bincount(flat, df[measure].to_numpy(dtype=np.float64), minlength=size).reshape(shape)
+            for measure in MEASURES
+        }
+        return cls(dates, list(regions), count, sums)
+
+    def _select(self, regions=None, start_date=None, end_date=None):
+        """(date slice, region indices) for the filters; dates are inclusive"""
+        start, stop = 0, len(self.dates)
+        if start_date is not None:
+            start = np.searchsorted(self.dates, np.datetime64(start_date, 'D'), 'left')
+        if end_date is not None:
+            stop = np.searchsorted(self.dates, np.datetime64(end_date, 'D'), 'right')
+        if regions is None:
+            region_idx = np.arange(len(self.regions))
+        else:
+            region_idx = np.array([self.regions.index(r) for r in regions if r in self.regions], dtype=np.int64)
+        return slice(start, stop), region_idx
+
+    def _view(self, array, regions, start_date, end_date):
+        dates, region_idx = self._select(regions, start_date, end_date)
+        return array[dates][:, region_idx]
+
+    def metrics(self, regions=None, start_date=None, end_date=None, hotspot_min=0.5, high_min=0.7):
+        """Hotspot count (severity above hotspot_min), high-severity count (above high_min) and mean severity
+
+        Mean severity is NaN when the filters select no detections.
+        """
+        count = self._view(self.count, regions, start_date, end_date).sum(axis=(0, 1))
+        severity = self._view(self.sums['severity'], regions, start_date, end_date).sum()
+        lower = SEVERITY_EDGES[:-1]
+        total = count.sum()
+        return {
+            'total_hotspots': int(count[lower >= hotspot_min].sum()),
+            'high_severity': int(count[lower >= high_min].sum()),
+            'avg_severity': float(severity / total) if total else float('nan'),
+            'detections': int(total)
+        }
+
+    def severity_histogram(self, regions=None, start_date=None, end_date=None):
+        """Detections per severity bucket, with bucket edges"""
+        count = self._view(self.count, regions, start_date, end_date).sum(axis=(0, 1))
+        return pd.DataFrame({
+            'severity': SEVERITY_EDGES[:-1] + SEVERITY_BUCKET / 2,
+            'lower': SEVERITY_EDGES[:-1],
+            'upper': SEVERITY_EDGES[1:],
+            'count': count
+        })
+
+    def daily(self, regions=None, start_date=None, end_date=None):
+        """Per-date detection count and mean of every measure, for dates with detections"""
+        dates, _ = self._select(regions, start_date, end_date)
+        count = self._view(self.count, regions, start_date, end_date).sum(axis=(1, 2))
+        frame = {'date': self.dates[dates].astype('datetime64[ns]'), 'count': count}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for measure in MEASURES:
+                sums = self._view(self.sums[measure], regions, start_date, end_date)
+                frame[measure] = sums.sum(axis=(1, 2)) / count
+        frame = pd.DataFrame(frame)
+        return frame[frame['count'] > 0].reset_index(drop=True)
+
+    def regional(self, regions=None, start_date=None, end_date=None):
+        """Per-region detection count and mean of every measure, for regions with detections"""
+        _, region_idx = self._select(regions, start_date, end_date)
+        count = self._view(self.count, regions, start_date, end_date).sum(axis=(0, 2))
+        frame = {'region': [self.regions[i] for i in region_idx], 'count': count}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for measure in MEASURES:
+                sums = self._view(self.sums[measure], regions, start_date, end_date)
+                frame[measure] = sums.sum(axis=(0, 2)) / count
+        frame = pd.DataFrame(frame)
+        return frame[frame['count'] > 0].set_index('region')
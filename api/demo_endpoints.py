@@ -1,22 +1,25 @@
 from fastapi import APIRouter
 import sys
 import os
-import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from demo_data_processor import DemoGalamseyDetector
+from dependencies import get_demo_detector, get_hotspot_store
+from response_cache import response_cache, json_response
 
 router = APIRouter()
-demo_detector = DemoGalamseyDetector()
+
+@router.on_event("startup")
+def import_legacy_results():
+    """Import the legacy demo JSON result into the store once, whichever worker starts first"""
+    get_hotspot_store().ensure_imported(
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'demo_galamsey_data.json'), 'demo'
+    )
 
 @router.get("/demo-analysis")
 def run_demo_analysis():
     """Run demo satellite analysis with realistic data"""
     try:
-        results = demo_detector.run_analysis()
-        
-        # Save for frontend
-        with open('demo_galamsey_data.json', 'w') as f:
-            json.dump(results, f, indent=2)
+        # Appended to the hotspot store for the frontend
+        results = get_demo_detector().run_analysis(store=get_hotspot_store())
         
         return {
             "status": "success",
@@ -27,30 +30,40 @@ def run_demo_analysis():
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def latest_demo_run():
+    """Latest demo run, generating one if none exists yet"""
+    run = get_hotspot_store().latest_run('demo')
+    if run is None:
+        get_demo_detector().run_analysis(store=get_hotspot_store())
+        run = get_hotspot_store().latest_run('demo')
+    return run
+
+def demo_hotspots_payload(run, hotspots):
+    return {
+        "status": "success",
+        "hotspots": hotspots,
+        "total_count": len(hotspots),
+        "data_source": "Realistic simulation based on actual Ghana mining locations",
+        "summary": run['metadata']
+    }
+
 @router.get("/demo-hotspots")
-def get_demo_hotspots():
+def get_demo_hotspots(region: str = None, start_date: str = None, end_date: str = None,
+                      min_severity: float = None):
     """Get demo hotspots for frontend display"""
     try:
-        # Load latest demo results
-        with open('demo_galamsey_data.json', 'r') as f:
-            results = json.load(f)
+        filters = dict(region=region, start_date=start_date, end_date=end_date, min_severity=min_severity)
         
-        return {
-            "status": "success",
-            "hotspots": results['hotspots'],
-            "total_count": len(results['hotspots']),
-            "data_source": "Realistic simulation based on actual Ghana mining locations",
-            "summary": results['summary']
-        }
-    except FileNotFoundError:
-        # Generate new data if file doesn't exist
-        results = demo_detector.run_analysis()
-        return {
-            "status": "success", 
-            "hotspots": results['hotspots'],
-            "total_count": len(results['hotspots']),
-            "data_source": "Realistic simulation",
-            "summary": results['summary']
-        }
+        if all(value is None for value in filters.values()):
+            # Unfiltered responses are served pre-encoded per run. The run is resolved
+            # first, since a demo run may be appended to the store on first use
+            run = latest_demo_run()
+            return json_response(response_cache.get(
+                'demo-hotspots', run['run_id'],
+                lambda: demo_hotspots_payload(run, get_hotspot_store().read_hotspots(run['run_id']))
+            ))
+        
+        run = latest_demo_run()
+        return demo_hotspots_payload(run, get_hotspot_store().read_hotspots(run['run_id'], **filters))
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,153 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Process-wide singletons, created on first use. Heavy dependencies
+# (TensorFlow, scikit-learn, xarray, Earth Engine) are imported inside the
+# factories, so importing a router costs nothing until a route needs them.
+_lock = threading.RLock()
+_singletons = {}
+_factories = {}
+
+
+def singleton(factory):
+    """Decorator: call factory once per process, even under concurrent first use"""
+    name = factory.__name__.replace('get_', '', 1)
+    _factories[name] = factory
+
+    def get():
+        if name not in _singletons:
+            with _lock:
+                if name not in _singletons:
+                    _singletons[name] = factory()
+        return _singletons[name]
+
+    get.__name__ = factory.__name__
+    get.__doc__ = factory.__doc__
+    return get
+
+
+@singleton
+def get_galamsey_detector():
+    import ee
+    try:
+        ee.Initialize()
+    except Exception as e:
+        print("🌍 Earth Engine not initialized. Authenticating and linking to project 'galamsey-ghana'...")
+        try:
+            ee.Authenticate()
+            ee.Initialize(project='galamsey-ghana')
+            print("✅ Earth Engine initialized successfully!")
+        except Exception as inner_e:
+            print(f"❌ Earth Engine initialization failed: {inner_e}")
+            print("Please run: earthengine authenticate")
+
+    from data_processor import GalamseyDetector
+    return GalamseyDetector()
+
+
+@singleton
+def get_real_detector():
+    # Also initializes Earth Engine for the imagery routes
+    from real_data_processor import RealGalamseyDetector
+    return RealGalamseyDetector()
+
+
+@singleton
+def get_demo_detector():
+    from demo_data_processor import DemoGalamseyDetector
+    return DemoGalamseyDetector()
+
+
+@singleton
+def get_raster_cache():
+    from raster_cache import RasterCache
+    return RasterCache()
+
+
+@singleton
+def get_data_fetcher():
+    from nasa_data_fetcher import NASADataFetcher
+    return NASADataFetcher(cache=get_raster_cache())
+
+
+@singleton
+def get_point_fetcher():
+    # No raster cache: every predicted point has a bbox of its own
+    from nasa_data_fetcher import NASADataFetcher
+    return NASADataFetcher()
+
+
+@singleton
+def get_model_registry():
+    from model_registry import ModelRegistry
+    registry = ModelRegistry()
+    registry.current()
+    return registry
+
+
+def get_ml_model():
+    # Not a singleton: the registry hot-swaps to newly published versions
+    return get_model_registry().current()
+
+
+@singleton
+def get_parallel_detector():
+    # One long-lived worker pool; closed by shutdown()
+    from parallel_detection import ParallelRegionDetector
+    return ParallelRegionDetector()
+
+
+@singleton
+def get_incremental_detector():
+    # Shared, so concurrent requests serialize on one manifest; tiles run on the shared worker pool
+    from incremental_detection import IncrementalDetector
+    return IncrementalDetector(detector=get_parallel_detector())
+
+
+@singleton
+def get_modis_cube():
+    from modis_cube import ModisCube
+    return ModisCube(fetcher=get_data_fetcher())
+
+
+@singleton
+def get_hotspot_store():
+    from hotspot_store import HotspotStore
+    return HotspotStore()
+
+
+def shutdown():
+    """Close singletons that hold worker pools, if they were created"""
+    with _lock:
+        detector = _singletons.pop('parallel_detector', None)
+    if detector is not None:
+        detector.close()
+
+
+def warm_up(names=None):
+    """Create singletons ahead of the first request, returning seconds spent on each
+
+    names defaults to the comma-separated GALAMSEY_WARMUP setting; "all"
+    creates every registered singleton. Failures are reported, not raised.
+    """
+    if names is None:
+        names = [name.strip() for name in os.getenv('GALAMSEY_WARMUP', '').split(',') if name.strip()]
+    if names == ['all']:
+        names = list(_factories)
+
+    timings = {}
+    for name in names:
+        if name not in _factories:
+            print(f"⚠️ Unknown warm-up target: {name}")
+            continue
+        start = time.perf_counter()
+        try:
+            globals()[f"get_{name}"]()
+        except Exception as e:
+            print(f"❌ Warm-up of {name} failed: {e}")
+        timings[name] = round(time.perf_counter() - start, 3)
+    return timings
@@ -1,72 +1,185 @@
 from fastapi import APIRouter
-import ee
 import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tile_renderer import tile_bounds
+from dependencies import get_real_detector
 
 router = APIRouter()
 
+# Map IDs and thumbnail URLs are refreshed this long before their tokens expire
+MAP_TOKEN_LIFETIME = int(os.getenv('EE_MAP_TOKEN_LIFETIME', '3600'))
+REFRESH_MARGIN = int(os.getenv('EE_MAP_REFRESH_MARGIN', '300'))
+# Thumbnails are cached per tile footprint, so bound how many are kept
+MAP_CACHE_ENTRIES = int(os.getenv('EE_MAP_CACHE_ENTRIES', '4096'))
+
+VIS_PARAMS = {
+    # RGB visualization
+    'landsat': {
+        'bands': ['SR_B4', 'SR_B3', 'SR_B2'],
+        'min': 0.0,
+        'max': 0.3,
+        'gamma': 1.4
+    },
+    # NDVI visualization
+    'ndvi': {
+        'min': -1,
+        'max': 1,
+        'palette': ['red', 'yellow', 'green']
+    }
+}
+
+class _Flight:
+    """A load in progress that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """Thread-safe cache with per-entry TTL and single-flight loading
+
+    Concurrent misses for the same key share one call to load(); the
+    others block until it finishes and receive its value (or error).
+    A ttl of None keeps entries until evicted. With max_entries set, the
+    least recently used entries are evicted past that size; expired
+    entries are dropped whenever a new one is stored.
+    """
+
+    def __init__(self, ttl=None, clock=time.monotonic, max_entries=None):
+        self.ttl = ttl
+        self.clock = clock
+        self.max_entries = max_entries
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or self.clock() < entry[1]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = load()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.value)
+                    self.loads += 1
+                del self._inflight[key]
+            flight.done.set()
+
+        return flight.value
+
+    def _store(self, key, value):
+        """Insert under the lock, dropping expired entries and then the least recently used"""
+        now = self.clock()
+        if self.ttl is not None:
+            for stale in [k for k, (_, expires) in self._entries.items() if expires <= now]:
+                del self._entries[stale]
+        self._entries[key] = (value, None if self.ttl is None else now + self.ttl)
+        self._entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'loads': self.loads, 'evictions': self.evictions,
+                'entries': len(self._entries)}
+
+# ee.Image graphs are built once; map IDs and thumbnails expire with their tokens
+image_cache = TTLCache()
+map_cache = TTLCache(ttl=MAP_TOKEN_LIFETIME - REFRESH_MARGIN, max_entries=MAP_CACHE_ENTRIES)
+
+def _earth_engine():
+    """The ee module, imported and initialized on first use"""
+    get_real_detector()
+    import ee
+    return ee
+
+def _landsat_composite():
+    """Latest Landsat composite over Ghana"""
+    ee = _earth_engine()
+    ghana = ee.FeatureCollection("USDOS/LSIB_SIMPLE/2017").filter(
+        ee.Filter.eq('country_na', 'Ghana')
+    )
+
+    return ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
+        .filterBounds(ghana.geometry()) \
+        .filterDate('2024-01-01', '2024-12-31') \
+        .filter(ee.Filter.lt('CLOUD_COVER', 20)) \
+        .median()
+
+def dataset_image(dataset):
+    """Cached ee.Image for a map dataset"""
+    if dataset == "landsat":
+        return image_cache.get('landsat', _landsat_composite)
+    elif dataset == "ndvi":
+        return image_cache.get('ndvi', lambda: dataset_image('landsat').normalizedDifference(['SR_B5', 'SR_B4']))
+    raise ValueError(f"Unknown dataset: {dataset}")
+
+def _vis_key(vis_params):
+    return json.dumps(vis_params, sort_keys=True)
+
+def get_map_id(dataset, vis_params=None):
+    """Map ID for a dataset and visualization, shared until shortly before the token expires"""
+    vis_params = vis_params or VIS_PARAMS[dataset]
+    key = ('map', dataset, _vis_key(vis_params))
+    return map_cache.get(key, lambda: dataset_image(dataset).getMapId(vis_params))
+
+def get_thumb_url(dataset, region_coords, vis_params=None):
+    """Thumbnail URL for a dataset over a rectangle, cached like map IDs"""
+    vis_params = vis_params or VIS_PARAMS[dataset]
+    key = ('thumb', dataset, tuple(region_coords), _vis_key(vis_params))
+    return map_cache.get(key, lambda: dataset_image(dataset).getThumbURL({
+        'region': _earth_engine().Geometry.Rectangle(list(region_coords)),
+        'dimensions': 256,
+        'format': 'png',
+        **vis_params
+    }))
+
 @router.get("/ee-tiles/{z}/{x}/{y}")
 def get_ee_tiles(z: int, x: int, y: int, dataset: str = "landsat"):
     """Get Earth Engine tiles for map display"""
     try:
-        if dataset == "landsat":
-            # Get latest Landsat composite
-            ghana = ee.FeatureCollection("USDOS/LSIB_SIMPLE/2017").filter(
-                ee.Filter.eq('country_na', 'Ghana')
-            )
-            
-            landsat = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-                .filterBounds(ghana.geometry()) \
-                .filterDate('2024-01-01', '2024-12-31') \
-                .filter(ee.Filter.lt('CLOUD_COVER', 20)) \
-                .median()
-            
-            # RGB visualization
-            vis_params = {
-                'bands': ['SR_B4', 'SR_B3', 'SR_B2'],
-                'min': 0.0,
-                'max': 0.3,
-                'gamma': 1.4
-            }
-            
-            # Get tile URL
-            tile_url = landsat.getThumbURL({
-                'region': ee.Geometry.Rectangle([x, y, x+1, y+1]),
-                'dimensions': 256,
-                'format': 'png',
-                **vis_params
-            })
-            
-            return {"tile_url": tile_url}
-            
-        elif dataset == "ndvi":
-            # NDVI visualization
-            ghana = ee.FeatureCollection("USDOS/LSIB_SIMPLE/2017").filter(
-                ee.Filter.eq('country_na', 'Ghana')
-            )
-            
-            landsat = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-                .filterBounds(ghana.geometry()) \
-                .filterDate('2024-01-01', '2024-12-31') \
-                .filter(ee.Filter.lt('CLOUD_COVER', 20)) \
-                .median()
-            
-            ndvi = landsat.normalizedDifference(['SR_B5', 'SR_B4'])
-            
-            vis_params = {
-                'min': -1,
-                'max': 1,
-                'palette': ['red', 'yellow', 'green']
-            }
-            
-            tile_url = ndvi.getThumbURL({
-                'region': ee.Geometry.Rectangle([x, y, x+1, y+1]),
-                'dimensions': 256,
-                'format': 'png',
-                **vis_params
-            })
-            
-            return {"tile_url": tile_url}
-            
+        if dataset not in VIS_PARAMS:
+            return {"error": f"Unknown dataset: {dataset}"}
+
+        # Thumbnail covering the XYZ tile's footprint
+        tile_url = get_thumb_url(dataset, tile_bounds(z, x, y))
+
+        return {"tile_url": tile_url}
+
     except Exception as e:
         return {"error": str(e)}
 
@@ -74,48 +187,21 @@ def get_ee_tiles(z: int, x: int, y: int, dataset: str = "landsat"):
 def get_ee_map_id(dataset: str = "landsat"):
     """Get Earth Engine map ID for tile layer"""
     try:
-        ghana = ee.FeatureCollection("USDOS/LSIB_SIMPLE/2017").filter(
-            ee.Filter.eq('country_na', 'Ghana')
-        )
-        
-        if dataset == "landsat":
-            landsat = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-                .filterBounds(ghana.geometry()) \
-                .filterDate('2024-01-01', '2024-12-31') \
-                .filter(ee.Filter.lt('CLOUD_COVER', 20)) \
-                .median()
-            
-            vis_params = {
-                'bands': ['SR_B4', 'SR_B3', 'SR_B2'],
-                'min': 0.0,
-                'max': 0.3,
-                'gamma': 1.4
-            }
-            
-            map_id = landsat.getMapId(vis_params)
-            
-        elif dataset == "ndvi":
-            landsat = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-                .filterBounds(ghana.geometry()) \
-                .filterDate('2024-01-01', '2024-12-31') \
-                .filter(ee.Filter.lt('CLOUD_COVER', 20)) \
-                .median()
-            
-            ndvi = landsat.normalizedDifference(['SR_B5', 'SR_B4'])
-            
-            vis_params = {
-                'min': -1,
-                'max': 1,
-                'palette': ['red', 'yellow', 'green']
-            }
-            
-            map_id = ndvi.getMapId(vis_params)
-        
+        if dataset not in VIS_PARAMS:
+            return {"error": f"Unknown dataset: {dataset}"}
+
+        map_id = get_map_id(dataset)
+
         return {
             "mapid": map_id['mapid'],
             "token": map_id['token'],
             "tile_url": f"https://earthengine.googleapis.com/v1alpha/projects/earthengine-legacy/maps/{map_id['mapid']}/tiles/{{z}}/{{x}}/{{y}}?token={map_id['token']}"
         }
-        
+
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@router.get("/ee-cache/stats")
+def get_ee_cache_stats():
+    """Map ID / thumbnail cache counters"""
+    return {"status": "success", "images": image_cache.stats(), "maps": map_cache.stats()}
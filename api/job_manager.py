@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DEFAULT_JOB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'jobs')
+
+ACTIVE_STATES = ('queued', 'running')
+
+# Finished jobs (and their result files) kept for polling before the oldest are pruned
+MAX_FINISHED_JOBS = 100
+
+class JobCancelled(BaseException):
+    """Raised inside a job when it has been cancelled
+
+    Derives from BaseException, like asyncio.CancelledError, so the broad
+    ``except Exception`` handlers in the analysis code don't swallow it.
+    """
+
+class Job:
+    """One background run with progress reported by the work function"""
+
+    def __init__(self, key, commit_stage=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.commit_stage = commit_stage
+        self.committed = False
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.progress = 0.0
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def report(self, stage, progress=None):
+        """Record the current stage; raises JobCancelled once cancel is requested
+
+        Reaching commit_stage is the last point the job can be cancelled:
+        past it the work has side effects (such as a stored run) that a
+        cancel could not undo, so later cancel requests are refused.
+        """
+        with self._lock:
+            if not self.committed:
+                if self.cancelled:
+                    raise JobCancelled(self.id)
+                self.committed = stage == self.commit_stage
+        self.stage = stage
+        if progress is not None:
+            self.progress = round(float(progress), 3)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'key': self.key,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+class JobManager:
+    """Runs background jobs on a bounded pool, one in-flight job per key
+
+    Submitting a key that already has a queued or running job returns that
+    job instead of starting a duplicate. Each finished job's result is
+    written atomically to its own JSON file under result_dir; only the
+    newest max_finished finished jobs and their results are kept.
+    """
+
+    def __init__(self, result_dir=None, max_concurrent=None, max_finished=MAX_FINISHED_JOBS):
+        self.result_dir = result_dir or os.getenv('GALAMSEY_JOB_DIR', DEFAULT_JOB_DIR)
+        self.max_concurrent = max_concurrent or int(os.getenv('GALAMSEY_MAX_JOBS', '2'))
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='job')
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, work, commit_stage=None):
+        """Start work(job) for key, or join the in-flight job; returns (job, created)
+
+        Once work reports commit_stage the job can no longer be cancelled.
+        """
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job, False
+
+            job = Job(key, commit_stage)
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._executor.submit(self._run, job, work)
+        return job, True
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def latest(self, key):
+        """Newest job submitted for key, in any state, or None"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.key == key]
+        return max(jobs, key=lambda job: job.created_at, default=None)
+
+    def jobs(self, limit=20):
+        """Recent jobs, newest first"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)[:limit]
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs stop before starting, running ones at their next stage
+
+        Returns False for unknown, finished and committed jobs.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        with job._lock:
+            if job.status not in ACTIVE_STATES or job.committed:
+                return False
+            job._cancel.set()
+        return True
+
+    def result_path(self, job_id):
+        return os.path.join(self.result_dir, f"{job_id}.json")
+
+    def result(self, job_id):
+        """Stored result of a finished job, or None"""
+        try:
+            with open(self.result_path(job_id), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_result(self, job, result):
+        os.makedirs(self.result_dir, exist_ok=True)
+        path = self.result_path(job.id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def _run(self, job, work):
+        try:
+            job.report('starting', 0.0)
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+
+            result = work(job)
+
+            # The work may have committed by now, so a late cancel no longer applies
+            job.stage = 'saving'
+            self._write_result(job, result)
+            job.status = 'succeeded'
+            job.stage = 'done'
+            job.progress = 1.0
+        except JobCancelled:
+            job.status = 'cancelled'
+            job.stage = 'cancelled'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs past max_finished, with their result files"""
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+            try:
+                os.remove(self.result_path(job.id))
+            except FileNotFoundError:
+                pass
@@ -3,35 +3,21 @@ from fastapi.middleware.cors import CORSMiddleware
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from data_processor import GalamseyDetector
-from real_data_processor import RealGalamseyDetector
-from nasa_data_fetcher import NASADataFetcher
-from ml_model import GalamseyMLModel
+from dependencies import get_galamsey_detector, get_incremental_detector, get_parallel_detector, shutdown, warm_up
 from nasa_endpoints import router as nasa_router
 from real_data_endpoints import router as real_router
 from demo_endpoints import router as demo_router
+from job_manager import JobManager
 import uvicorn
-import ee
-
-# --- Earth Engine Initialization ---
-try:
-    ee.Initialize()
-except Exception as e:
-    print("🌍 Earth Engine not initialized. Authenticating and linking to project 'galamsey-ghana'...")
-    try:
-        ee.Authenticate()
-        ee.Initialize(project='galamsey-ghana')
-        print("✅ Earth Engine initialized successfully!")
-    except Exception as inner_e:
-        print(f"❌ Earth Engine initialization failed: {inner_e}")
-        print("Please run: earthengine authenticate")
-
 
 app = FastAPI(title="GalamseyWatch API")
 app.include_router(nasa_router)
 app.include_router(real_router)
 app.include_router(demo_router)
 
+# Incremental sweeps that have tiles to recompute run here instead of in the request
+detection_jobs = JobManager(max_concurrent=1)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -40,10 +26,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-detector = GalamseyDetector()
-real_detector = RealGalamseyDetector()
-data_fetcher = NASADataFetcher()
-ml_model = GalamseyMLModel()
+@app.on_event("startup")
+def startup_warm_up():
+    """Optionally create heavy singletons before the first request (GALAMSEY_WARMUP)"""
+    timings = warm_up()
+    if timings:
+        print(f"🔥 Warm-up: {timings}")
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    """Stop the detection worker pools"""
+    shutdown()
 
 @app.get("/")
 def read_root():
@@ -58,17 +51,85 @@ def read_root():
         "tools": ["Google Earth Engine", "TensorFlow", "scikit-learn"]
     }
 
+def _incremental_sweep(job, start_date, end_date, bbox):
+    """Job body: recompute the dirty tiles and return the run summary"""
+    job.report('detect', 0.0)
+    results = get_incremental_detector().run(
+        start_date, end_date, bbox=bbox,
+        progress=lambda done, total: job.report('detect', done / total if total else 1.0)
+    )
+    summary = {key: value for key, value in results.items() if key != 'hotspots'}
+    summary['hotspot_count'] = len(results['hotspots'])
+    return summary
+
+@app.get("/hotspots/jobs/{job_id}")
+def get_hotspots_job(job_id: str):
+    """Status of an incremental detection sweep, with its summary once finished"""
+    job = detection_jobs.get(job_id)
+    if job is None:
+        return {"status": "not_found", "message": f"Unknown job: {job_id}"}
+    
+    response = {"status": "success", "job": job.to_dict()}
+    if job.status == 'succeeded':
+        response["result"] = detection_jobs.result(job_id)
+    return response
+
 @app.get("/hotspots")
-def get_hotspots(region: str = None, start_date: str = "2023-01-01", end_date: str = "2025-07-30"):
-    """Get detected galamsey hotspots using comprehensive NASA data"""
+def get_hotspots(region: str = None, start_date: str = "2023-01-01", end_date: str = "2025-07-30",
+                 backend: str = "ee"):
+    """Get detected galamsey hotspots using comprehensive NASA data
+    
+    backend="local" runs the offline detector over the mining regions in parallel worker processes;
+    backend="incremental" runs it over the fixed tile grid, recomputing only tiles with new scenes;
+    when any tile needs recomputing (always on the first sweep) that runs as a background job, and the
+    hotspots are served once it has finished.
+    """
     try:
-        region_coords = {
-            "western": [-3.25, 4.74, -1.5, 6.5],
-            "ashanti": [-2.5, 5.5, -0.5, 7.5],
-            "eastern": [-1.0, 5.5, 0.5, 7.5]
-        }
+        from real_data_processor import MINING_REGIONS
+        
+        if backend in ("incremental", "local") and region and region.lower() not in MINING_REGIONS:
+            return {
+                "status": "error",
+                "message": f"Unknown region '{region}'. Choose one of: {', '.join(sorted(MINING_REGIONS))}"
+            }
+        
+        if backend == "incremental":
+            bbox = MINING_REGIONS[region.lower()] if region else None
+            detector = get_incremental_detector()
+            if detector.pending(start_date, end_date, bbox=bbox):
+                # Concurrent requests for the same sweep join one job
+                job, created = detection_jobs.submit(
+                    f"incremental:{start_date}:{end_date}:{region.lower() if region else 'all'}",
+                    lambda job: _incremental_sweep(job, start_date, end_date, bbox)
+                )
+                return {
+                    "status": "started" if created else "already_running",
+                    "job": job.to_dict(),
+                    "message": f"Tiles with new scenes are being recomputed. Poll /hotspots/jobs/{job.id} "
+                               f"and repeat this request once it has finished."
+                }
+            results = detector.run(start_date, end_date, bbox=bbox)
+            
+            return {
+                "status": "success",
+                "hotspots": results['hotspots'],
+                "tiles": results['tiles'],
+                "data_sources_used": ["Landsat 8/9 (local rasters)"]
+            }
+        
+        if backend == "local":
+            regions = {region.lower(): MINING_REGIONS[region.lower()]} if region else MINING_REGIONS
+            # Shared worker pool; only hotspots are needed, so no rasters come back
+            results = get_parallel_detector().detect_regions(regions, start_date, end_date, arrays=False)
+            
+            return {
+                "status": "success",
+                "hotspots": [hotspot for result in results.values() for hotspot in result['hotspots']],
+                "data_sources_used": ["Landsat 8/9 (local rasters)"]
+            }
         
-        coords = region_coords.get(region.lower()) if region else None
+        coords = MINING_REGIONS.get(region.lower()) if region else None
+        detector = get_galamsey_detector()
         results = detector.comprehensive_detection(start_date, end_date, coords)
         hotspots = detector.get_hotspots(results)
         
@@ -0,0 +1,126 @@
+import bisect
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from queue import Empty, Full, Queue
+
+import numpy as np
+
+# Upper bounds (ms) of the queue-wait histogram buckets
+WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class MicroBatcher:
+    """Merges concurrent single-item predictions into batched calls
+
+    Callers block in predict(item) while a background thread gathers
+    whatever else arrives within ``max_wait`` seconds of the first queued
+    item (up to ``max_batch_size``) and makes one ``predict_batch(items)``
+    call, which must return one result per item. At most ``max_queue``
+    items wait at once; submitting beyond that raises RuntimeError instead
+    of letting queue wait grow without bound.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=256, max_wait=0.005, max_queue=4096):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue = Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.rejected = 0
+        self._batch_sizes = Counter()
+        self._wait_buckets = Counter()
+        self._waits = deque(maxlen=10000)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def submit(self, item):
+        """Queue an item; the returned Future resolves to its prediction"""
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except Full:
+            self.rejected += 1
+            raise RuntimeError(f"Prediction queue is full ({self.max_queue} waiting); retry shortly")
+        return future
+
+    def predict(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        """Block for one item, then take more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Items already queued always join; only an empty queue waits out the window
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+
+            try:
+                results = self.predict_batch(items)
+            except Exception as e:
+                self.errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            self.batches += 1
+            self.items += len(batch)
+            self._batch_sizes[1 << (len(batch) - 1).bit_length()] += 1
+            for _, _, enqueued in batch:
+                wait_ms = (started - enqueued) * 1e3
+                self._waits.append(wait_ms)
+                self._wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def stats(self):
+        """Batch-size histogram (power-of-two buckets), queue-wait histogram (ms) and percentiles"""
+        waits = np.array(self._waits)
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'queued': self._queue.qsize(),
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0,
+            'batch_size_histogram': {f"<={size}": count for size, count in sorted(self._batch_sizes.items())},
+            'queue_wait_ms_histogram': {
+                (f"<={WAIT_BUCKETS_MS[bucket]}" if bucket < len(WAIT_BUCKETS_MS) else f">{WAIT_BUCKETS_MS[-1]}"): count
+                for bucket, count in sorted(self._wait_buckets.items())
+            },
+            'queue_wait_ms': {
+                'mean': round(float(waits.mean()), 3),
+                'p50': round(float(np.percentile(waits, 50)), 3),
+                'p95': round(float(np.percentile(waits, 95)), 3),
+                'max': round(float(waits.max()), 3)
+            } if len(waits) else None,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1e3,
+            'max_queue': self.max_queue
+        }
@@ -1,37 +1,205 @@
 from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import List, Optional
+import numpy as np
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from nasa_data_fetcher import NASADataFetcher
-from ml_model import GalamseyMLModel
+from dependencies import (get_data_fetcher, get_ml_model, get_model_registry, get_modis_cube, get_point_fetcher,
+                          get_raster_cache)
+from micro_batcher import MicroBatcher
+from raster_grid import output_size
+from job_manager import JobManager
 
 router = APIRouter()
-data_fetcher = NASADataFetcher()
-ml_model = GalamseyMLModel()
+
+# Cube updates and trend maps take tens of seconds; one job at a time, so they
+# never overlap, and trend results are kept per cube state
+cube_jobs = JobManager(max_concurrent=1)
+
+# Largest batch accepted by /ml-prediction/batch
+MAX_BATCH_ITEMS = int(os.getenv('GALAMSEY_MAX_BATCH_ITEMS', '100000'))
+
+class Point(BaseModel):
+    lat: float
+    lon: float
+
+class BatchPredictionRequest(BaseModel):
+    points: Optional[List[Point]] = None
+    features: Optional[List[List[float]]] = None
+
+# Points are scored by the Random Forest on features read around them; the
+# location rule only answers while no trained forest is loaded
+LOCATION_MODEL = "Location rule (Obuasi proximity)"
+FEATURE_MODEL = "Random Forest"
+
+# Scene window of the point features (build_dataset's default, which the served models are trained on)
+POINT_FEATURE_DATES = ('2024-01-01', '2024-12-31')
+
+def location_scores(lats, lons):
+    """Location-based galamsey score, used when no trained model is loaded"""
+    near_obuasi = (np.abs(lats - 6.2027) < 0.1) & (np.abs(lons + 1.6640) < 0.1)
+    return np.where(near_obuasi, 0.75, 0.25)
+
+def point_feature_rows(points):
+    """Random Forest feature rows for (lat, lon) pairs, built like the training shards"""
+    from training_dataset import point_features
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+    return point_features(get_point_fetcher(), coords[:, 0], coords[:, 1],
+                          start_date=POINT_FEATURE_DATES[0], end_date=POINT_FEATURE_DATES[1])
+
+def predict_points(points):
+    """(scores, model used) for a list of (lat, lon) pairs in one model call"""
+    if get_ml_model().rf_model is None:
+        coords = np.asarray(points, dtype=float).reshape(-1, 2)
+        return location_scores(coords[:, 0], coords[:, 1]).tolist(), LOCATION_MODEL
+    return predict_feature_rows(point_feature_rows(points)), FEATURE_MODEL
+
+def predict_feature_rows(rows):
+    """Random Forest probabilities for feature rows in one predict_proba call"""
+    ml_model = get_ml_model()
+    if ml_model.rf_model is None:
+        raise ValueError("No trained Random Forest model loaded")
+    return ml_model.predict_galamsey(np.asarray(rows, dtype=float)).tolist()
+
+def confidence_label(score):
+    return "high" if score > 0.7 else "medium" if score > 0.4 else "low"
+
+# Concurrent single-point requests are merged into one predict_proba call
+point_batcher = MicroBatcher(
+    predict_feature_rows,
+    max_batch_size=int(os.getenv('GALAMSEY_BATCH_MAX_SIZE', '256')),
+    max_wait=float(os.getenv('GALAMSEY_BATCH_WAIT_MS', '5')) / 1000,
+    max_queue=int(os.getenv('GALAMSEY_BATCH_MAX_QUEUE', '4096'))
+)
+
+# Longest a single-point request waits for its batch
+PREDICTION_TIMEOUT = 30
 
 @router.get("/nasa-data/{data_source}")
-def get_nasa_data(data_source: str, bbox: str, start_date: str = "2023-01-01", end_date: str = "2023-12-31"):
-    """Fetch specific NASA data source"""
+def get_nasa_data(data_source: str, bbox: str, start_date: str = "2023-01-01", end_date: str = "2023-12-31",
+                  max_size: Optional[int] = None):
+    """Fetch specific NASA data source
+    
+    With max_size (pixels on the longer side), the coarsest cached overview
+    of at least that size is read and per-variable statistics are returned.
+    """
     try:
         bbox_coords = [float(x) for x in bbox.split(',')]
+        data_fetcher = get_data_fetcher()
+        size = None
+        if max_size:
+            west, south, east, north = bbox_coords
+            size = output_size(bbox_coords, max(east - west, north - south) / max_size)
         
         if data_source == "modis":
-            data = data_fetcher.get_modis_ndvi(bbox_coords, start_date, end_date)
+            data = data_fetcher.get_modis_ndvi(bbox_coords, start_date, end_date, size=size)
         elif data_source == "landsat":
-            data = data_fetcher.get_landsat_surface_reflectance(bbox_coords, start_date, end_date)
+            data = data_fetcher.get_landsat_surface_reflectance(bbox_coords, start_date, end_date, size=size)
+        elif data_source == "indices":
+            data = data_fetcher.get_landsat_indices(bbox_coords, start_date, end_date, size=size)
         elif data_source == "hansen":
-            data = data_fetcher.get_hansen_forest_data(bbox_coords)
+            data = data_fetcher.get_hansen_forest_data(bbox_coords, size=size)
         elif data_source == "sentinel2":
-            data = data_fetcher.get_sentinel2_data(bbox_coords, start_date, end_date)
+            data = data_fetcher.get_sentinel2_data(bbox_coords, start_date, end_date, size=size)
         else:
             return {"status": "error", "message": "Invalid data source"}
         
-        return {
+        response = {
             "status": "success",
             "data_source": data_source,
-            "shape": data.dims,
+            "shape": dict(data.sizes),
             "variables": list(data.data_vars.keys())
         }
+        if max_size:
+            response["stats"] = {
+                name: {"mean": float(variable.mean()), "min": float(variable.min()), "max": float(variable.max())}
+                for name, variable in data.data_vars.items()
+            }
+        return response
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.get("/nasa-cache/stats")
+def get_nasa_cache_stats():
+    """Raster cache hit/miss counters and disk usage"""
+    return {"status": "success", "cache": get_raster_cache().stats()}
+
+def _cube_update(job, end_date):
+    """Job body: append new composites, reporting the share fetched so far"""
+    cube = get_modis_cube()
+    job.report('append', 0.0)
+    added = cube.update(end_date, progress=lambda done, total: job.report('append', done / total))
+    return {"appended": added, "stored": len(cube.dates())}
+
+@router.post("/modis-cube/update")
+def update_modis_cube(end_date: Optional[str] = None):
+    """Start appending the MODIS composites published since the last update, or join the running update"""
+    try:
+        job, created = cube_jobs.submit(f"modis-update:{end_date}", lambda job: _cube_update(job, end_date))
+        return {
+            "status": "started" if created else "already_running",
+            "job": job.to_dict(),
+            "message": f"Poll /modis-cube/jobs/{job.id} for progress."
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.get("/modis-cube/jobs/{job_id}")
+def get_modis_cube_job(job_id: str):
+    """Status of a cube update or trend job, with its result once finished"""
+    job = cube_jobs.get(job_id)
+    if job is None:
+        return {"status": "not_found", "message": f"Unknown job: {job_id}"}
+    
+    response = {"status": "success", "job": job.to_dict()}
+    if job.status == 'succeeded':
+        response["result"] = cube_jobs.result(job_id)
+    return response
+
+def _trend_summary(job, start_date, end_date, group):
+    """Job body: trend maps over the cube, reduced to the summary served by the API"""
+    job.report('trends', 0.0)
+    start = time.perf_counter()
+    trends = get_modis_cube().trends(
+        start_date, end_date, workers=int(os.getenv('GALAMSEY_WORKERS', os.cpu_count() or 1)), group=group
+    )
+    decline = trends['decline']
+    return {
+        **trends.attrs,
+        "pixels": int(decline.size),
+        "decline_fraction": float(decline.mean()),
+        "mean_theil_sen_slope": float(trends['theil_sen_slope'].mean()),
+        "mean_ols_slope": float(trends['ols_slope'].mean()),
+        "seconds": round(time.perf_counter() - start, 2)
+    }
+
+@router.get("/modis-cube/trends")
+def get_modis_cube_trends(start_date: Optional[str] = None, end_date: Optional[str] = None, group: int = 1):
+    """Per-pixel NDVI trend summary over the stored composites
+    
+    Computed in a background job and cached until the cube gains composites;
+    until then the job's progress is returned and the call can be repeated.
+    """
+    try:
+        dates = get_modis_cube().dates()
+        key = f"modis-trends:{start_date}:{end_date}:{group}:{len(dates)}:{dates[-1] if len(dates) else None}"
+        
+        job = cube_jobs.latest(key)
+        if job is not None and job.status == 'succeeded':
+            result = cube_jobs.result(job.id)
+            if result is not None:
+                return {"status": "success", **result}
+        if job is None or job.status not in ('queued', 'running'):
+            # Concurrent requests for the same key join one job
+            job, _ = cube_jobs.submit(key, lambda job: _trend_summary(job, start_date, end_date, group))
+        
+        return {
+            "status": job.status,
+            "job": job.to_dict(),
+            "message": "Trend maps are being computed; repeat this request for the result."
+        }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -39,14 +207,61 @@ def get_nasa_data(data_source: str, bbox: str, start_date: str = "2023-01-01", e
 def get_ml_prediction(lat: float, lon: float):
     """Get ML-based galamsey prediction for a location"""
     try:
-        prediction_score = 0.75 if abs(lat - 6.2027) < 0.1 and abs(lon + 1.6640) < 0.1 else 0.25
+        if get_ml_model().rf_model is None:
+            prediction_score, model_used = float(location_scores(np.array(lat), np.array(lon))), LOCATION_MODEL
+        else:
+            # Features are read in this request's thread; only the model call is batched
+            row = point_feature_rows([(lat, lon)])[0]
+            prediction_score, model_used = point_batcher.predict(row, timeout=PREDICTION_TIMEOUT), FEATURE_MODEL
         
         return {
             "status": "success",
             "location": {"lat": lat, "lon": lon},
             "galamsey_probability": prediction_score,
-            "model_used": "Random Forest + CNN Ensemble",
-            "confidence": "high" if prediction_score > 0.7 else "medium" if prediction_score > 0.4 else "low"
+            "model_used": model_used,
+            "confidence": confidence_label(prediction_score)
         }
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+@router.post("/ml-prediction/batch")
+def post_ml_prediction_batch(request: BatchPredictionRequest):
+    """Predictions for many points and/or feature rows in one call"""
+    try:
+        points = request.points or []
+        features = request.features or []
+        if len(points) + len(features) > MAX_BATCH_ITEMS:
+            return {"status": "error", "message": f"At most {MAX_BATCH_ITEMS} items per batch"}
+        
+        response = {"status": "success", "model_used": []}
+        if points:
+            scores, model_used = predict_points([(p.lat, p.lon) for p in points])
+            response["model_used"].append(model_used)
+            response["points"] = [
+                {"lat": p.lat, "lon": p.lon, "galamsey_probability": score, "confidence": confidence_label(score)}
+                for p, score in zip(points, scores)
+            ]
+        if features:
+            if FEATURE_MODEL not in response["model_used"]:
+                response["model_used"].append(FEATURE_MODEL)
+            response["features"] = [
+                {"galamsey_probability": score, "confidence": confidence_label(score)}
+                for score in predict_feature_rows(features)
+            ]
+        response["total_count"] = len(points) + len(features)
+        
+        return response
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.get("/ml-prediction/stats")
+def get_ml_prediction_stats():
+    """Micro-batching metrics: batch-size and queue-wait histograms"""
+    return {"status": "success", "micro_batching": point_batcher.stats()}
+
+@router.get("/ml-prediction/model")
+def get_ml_prediction_model():
+    """Active model version and this worker's resident memory before/after loading it"""
+    registry = get_model_registry()
+    registry.current()
+    return {"status": "success", "model": registry.status()}
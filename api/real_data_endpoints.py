@@ -1,40 +1,90 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from real_data_processor import RealGalamseyDetector
-import json
-from datetime import datetime
+from dependencies import get_hotspot_store, get_real_detector
+from hotspot_index import HotspotIndex, HotspotIndexCache, parse_bbox
+from response_cache import response_cache, json_response
+from job_manager import JobManager
 
 router = APIRouter()
-real_detector = RealGalamseyDetector()
+analysis_jobs = JobManager()
+
+def _analysis_job(job):
+    """Job body: run the analysis with stage progress and return its summary
+    
+    Regions whose scenes haven't changed since the last run reuse its hotspots.
+    """
+    from incremental_detection import TileManifest
+    results = get_real_detector().run_real_analysis(store=get_hotspot_store(), progress=job.report,
+                                                    manifest=TileManifest('real_regions'))
+    if 'error' in results:
+        raise RuntimeError(results['error'])
+    
+    summary = {key: value for key, value in results.items() if key != 'hotspots'}
+    summary['hotspot_count'] = len(results['hotspots'])
+    return summary
 
 @router.get("/real-analysis")
-async def run_real_analysis(background_tasks: BackgroundTasks):
-    """Run real NASA satellite data analysis"""
+async def run_real_analysis():
+    """Start real NASA satellite data analysis, or join the one already running"""
     try:
-        # Run analysis in background
-        def analyze():
-            results = real_detector.run_real_analysis()
-            with open('latest_real_analysis.json', 'w') as f:
-                json.dump(results, f, indent=2)
-        
-        background_tasks.add_task(analyze)
+        # Once the run is being stored it can no longer be cancelled
+        job, created = analysis_jobs.submit('real-analysis', _analysis_job, commit_stage='store')
         
         return {
-            "status": "started",
-            "message": "Real satellite data analysis started. Check /real-results for updates.",
+            "status": "started" if created else "already_running",
+            "job_id": job.id,
+            "job": job.to_dict(),
+            "message": f"Real satellite data analysis {'started' if created else 'already in progress'}. "
+                       f"Poll /real-analysis/jobs/{job.id} for progress.",
             "estimated_time": "2-5 minutes"
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@router.get("/real-analysis/jobs")
+def list_analysis_jobs(limit: int = 20):
+    """Recent analysis jobs, newest first"""
+    return {"status": "success", "jobs": [job.to_dict() for job in analysis_jobs.jobs(limit)]}
+
+@router.get("/real-analysis/jobs/{job_id}")
+def get_analysis_job(job_id: str):
+    """Status and progress of an analysis job, with its result once finished"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return {"status": "not_found", "message": f"Unknown job: {job_id}"}
+    
+    response = {"status": "success", "job": job.to_dict()}
+    if job.status == 'succeeded':
+        response["result"] = analysis_jobs.result(job_id)
+    return response
+
+@router.delete("/real-analysis/jobs/{job_id}")
+def cancel_analysis_job(job_id: str):
+    """Cancel a queued or running analysis job"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return {"status": "not_found", "message": f"Unknown job: {job_id}"}
+    if not analysis_jobs.cancel(job_id):
+        return {"status": "not_cancellable", "job": job.to_dict()}
+    return {"status": "cancelling", "job": job.to_dict()}
+
 @router.get("/real-results")
 def get_real_results():
     """Get latest real analysis results"""
     try:
-        with open('latest_real_analysis.json', 'r') as f:
-            results = json.load(f)
+        run = get_hotspot_store().latest_run('real')
+        if run is None:
+            return {
+                "status": "no_data",
+                "message": "No analysis results found. Run /real-analysis first."
+            }
+        
+        results = dict(run['metadata'])
+        if 'error' not in results:
+            results['hotspots'] = get_hotspot_store().read_hotspots(run['run_id'])
+        results['run_id'] = run['run_id']
         
         return {
             "status": "success",
@@ -42,50 +92,62 @@ def get_real_results():
             "data_source": "Real NASA Landsat 8/9 + MODIS",
             "analysis_type": "Live satellite data"
         }
-    except FileNotFoundError:
-        return {
-            "status": "no_data",
-            "message": "No analysis results found. Run /real-analysis first."
-        }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+hotspot_indexes = HotspotIndexCache()
+
+def real_hotspots_payload(run, formatted_hotspots):
+    if run is None:
+        return {
+            "status": "no_data", 
+            "message": "No real analysis data available. Run /real-analysis first."
+        }
+    
+    if 'error' in run['metadata']:
+        return {"status": "no_hotspots", "message": "No hotspots detected in latest analysis"}
+    
+    return {
+        "status": "success",
+        "hotspots": formatted_hotspots,
+        "total_count": len(formatted_hotspots),
+        "data_source": "Real NASA satellite data",
+        "regions_analyzed": run['metadata'].get('regions_analyzed', [])
+    }
+
+def real_hotspot_index(run):
+    """Spatial index over a run's hotspots, rebuilt only when a new run lands"""
+    return hotspot_indexes.get(run['run_id'],
+                               lambda: HotspotIndex(get_hotspot_store().read_hotspots(run['run_id'])))
+
 @router.get("/real-hotspots")
-def get_real_hotspots():
-    """Get real detected hotspots for frontend"""
+def get_real_hotspots(bbox: str = None, lat: float = None, lon: float = None,
+                      radius_km: float = None, k: int = None, region: str = None,
+                      start_date: str = None, end_date: str = None, min_severity: float = None):
+    """Get real detected hotspots for frontend, optionally within a bbox, radius or k-nearest"""
     try:
-        with open('latest_real_analysis.json', 'r') as f:
-            results = json.load(f)
+        filters = dict(region=region, start_date=start_date, end_date=end_date, min_severity=min_severity)
+        spatial = dict(bbox=bbox, lat=lat, lon=lon, radius_km=radius_km, k=k)
         
-        if 'hotspots' in results:
-            # Format for frontend
-            formatted_hotspots = []
-            for i, hotspot in enumerate(results['hotspots']):
-                formatted_hotspots.append({
-                    'location': f"Site_{i+1}",
-                    'lat': hotspot['lat'],
-                    'lon': hotspot['lon'],
-                    'severity': hotspot['severity'],
-                    'region': hotspot['region'].title(),
-                    'date': results.get('timestamp', datetime.now().isoformat())[:10],
-                    'ndvi_change': hotspot['ndvi'],
-                    'bsi_change': hotspot['bsi']
-                })
+        if all(value is None for value in {**filters, **spatial}.values()):
+            # Unfiltered responses are served pre-encoded until the store changes
+            def build_payload():
+                run = get_hotspot_store().latest_run('real')
+                hotspots = real_hotspot_index(run).hotspots if run and 'error' not in run['metadata'] else []
+                return real_hotspots_payload(run, hotspots)
             
-            return {
-                "status": "success",
-                "hotspots": formatted_hotspots,
-                "total_count": len(formatted_hotspots),
-                "data_source": "Real NASA satellite data",
-                "regions_analyzed": results.get('regions_analyzed', [])
-            }
+            return json_response(response_cache.get('real-hotspots', get_hotspot_store().version(), build_payload))
+        
+        run = get_hotspot_store().latest_run('real')
+        if run is None or 'error' in run['metadata']:
+            return real_hotspots_payload(run, [])
+        
+        if any(value is not None for value in filters.values()):
+            # Attribute filters run in SQLite; the spatial query covers the subset
+            index = HotspotIndex(get_hotspot_store().read_hotspots(run['run_id'], **filters))
         else:
-            return {"status": "no_hotspots", "message": "No hotspots detected in latest analysis"}
-            
-    except FileNotFoundError:
-        return {
-            "status": "no_data", 
-            "message": "No real analysis data available. Run /real-analysis first."
-        }
+            index = real_hotspot_index(run)
+        
+        return real_hotspots_payload(run, index.query(parse_bbox(bbox), lat, lon, radius_km, k))
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
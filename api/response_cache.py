@@ -0,0 +1,64 @@
+import json
+import threading
+from fastapi import Response
+
+try:
+    import orjson
+    
+    def encode_json(payload):
+        """Serialize a payload to JSON bytes"""
+        return orjson.dumps(payload)
+except ImportError:
+    def encode_json(payload):
+        """Serialize a payload to JSON bytes"""
+        return json.dumps(payload, separators=(',', ':')).encode()
+
+class ResponseCache:
+    """Encoded JSON responses keyed by name and the version of their source data"""
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, name, version, build_payload):
+        """Cached bytes for name at version, rebuilding with build_payload() on change"""
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        
+        with self._lock:
+            # Another request may have rebuilt it while we waited
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            
+            body = encode_json(build_payload())
+            self._entries[name] = (version, body)
+            self.misses += 1
+            return body
+    
+    def clear(self, name=None):
+        """Drop the cached response for name, or every cached response"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+    
+    def stats(self):
+        """Hit/miss counters and cached payload sizes"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': {name: len(body) for name, (_, body) in self._entries.items()}
+        }
+
+def json_response(body):
+    """Response for pre-encoded JSON bytes"""
+    return Response(content=body, media_type='application/json')
+
+response_cache = ResponseCache()
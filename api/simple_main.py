@@ -2,15 +2,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import sys
 import os
-import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from demo_data_processor import DemoGalamseyDetector
-from real_data_processor import RealGalamseyDetector
+from dependencies import get_demo_detector, get_hotspot_store, warm_up
+from hotspot_index import HotspotIndex, HotspotIndexCache, parse_bbox
 from ee_imagery import router as ee_router
+from tile_endpoints import router as tile_router
+from response_cache import response_cache, json_response
 import uvicorn
 
 app = FastAPI(title="GalamseyWatch API - Demo Mode")
 app.include_router(ee_router)
+app.include_router(tile_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,8 +26,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-demo_detector = DemoGalamseyDetector()
-real_detector = RealGalamseyDetector()
+@app.on_event("startup")
+def startup_warm_up():
+    """Optionally create heavy singletons before the first request (GALAMSEY_WARMUP)"""
+    timings = warm_up()
+    if timings:
+        print(f"🔥 Warm-up: {timings}")
 
 @app.get("/")
 def read_root():
@@ -39,42 +45,64 @@ def read_root():
         ]
     }
 
+hotspot_indexes = HotspotIndexCache()
+
+@app.on_event("startup")
+def import_legacy_results():
+    """Import the legacy JSON result into the store once, whichever worker starts first"""
+    get_hotspot_store().ensure_imported(
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'real_galamsey_data.json'), 'real'
+    )
+
+def latest_hotspot_run():
+    """Latest real analysis run with hotspots, falling back to a demo run"""
+    run = get_hotspot_store().latest_run('real')
+    if run is None or run['hotspot_count'] == 0:
+        run = get_hotspot_store().latest_run('demo')
+        if run is None:
+            get_demo_detector().run_analysis(store=get_hotspot_store())
+            run = get_hotspot_store().latest_run('demo')
+    return run
+
+def hotspots_payload(formatted_hotspots):
+    return {
+        "status": "success",
+        "hotspots": formatted_hotspots,
+        "total_count": len(formatted_hotspots),
+        "data_source": "Real NASA Landsat 8/9 + MODIS satellite data"
+    }
+
+def latest_hotspot_index(run=None):
+    """Spatial index over the latest run, rebuilt only when a new run lands"""
+    run = run or latest_hotspot_run()
+    return hotspot_indexes.get(run['run_id'],
+                               lambda: HotspotIndex(get_hotspot_store().read_hotspots(run['run_id'])))
+
 @app.get("/hotspots")
-def get_hotspots():
-    """Get real NASA satellite hotspots"""
+def get_hotspots(bbox: str = None, lat: float = None, lon: float = None,
+                 radius_km: float = None, k: int = None, region: str = None,
+                 start_date: str = None, end_date: str = None, min_severity: float = None):
+    """Get real NASA satellite hotspots, optionally within a bbox, radius or k-nearest"""
     try:
-        # Try to load real analysis results
-        try:
-            with open('../real_galamsey_data.json', 'r') as f:
-                results = json.load(f)
-            if 'hotspots' not in results or len(results['hotspots']) == 0:
-                raise FileNotFoundError("No hotspots in real data")
-        except (FileNotFoundError, json.JSONDecodeError):
-            # Fallback to demo data
-            results = demo_detector.run_analysis()
+        filters = dict(region=region, start_date=start_date, end_date=end_date, min_severity=min_severity)
+        spatial = dict(bbox=bbox, lat=lat, lon=lon, radius_km=radius_km, k=k)
         
-        # Format for frontend compatibility
-        formatted_hotspots = []
-        hotspots_data = results.get('hotspots', [])
+        if all(value is None for value in {**filters, **spatial}.values()):
+            # Unfiltered responses are served pre-encoded per run. The run is resolved
+            # first, since a demo run may be appended to the store on first use
+            run = latest_hotspot_run()
+            body = response_cache.get('hotspots', run['run_id'],
+                                      lambda: hotspots_payload(latest_hotspot_index(run).hotspots))
+            return json_response(body)
         
-        for i, hotspot in enumerate(hotspots_data):
-            formatted_hotspots.append({
-                'location': hotspot.get('location', f'Site_{i+1}'),
-                'lat': hotspot['lat'],
-                'lon': hotspot['lon'], 
-                'severity': hotspot['severity'],
-                'region': hotspot.get('region', 'Unknown'),
-                'date': hotspot.get('date', '2024-01-01'),
-                'ndvi_change': hotspot.get('ndvi_change', hotspot.get('ndvi', 0)),
-                'bsi_change': hotspot.get('bsi_change', hotspot.get('bsi', 0))
-            })
+        if any(value is not None for value in filters.values()):
+            # Attribute filters run in SQLite; the spatial query covers the subset
+            run = latest_hotspot_run()
+            index = HotspotIndex(get_hotspot_store().read_hotspots(run['run_id'], **filters))
+        else:
+            index = latest_hotspot_index()
         
-        return {
-            "status": "success",
-            "hotspots": formatted_hotspots,
-            "total_count": len(formatted_hotspots),
-            "data_source": "Real NASA Landsat 8/9 + MODIS satellite data"
-        }
+        return hotspots_payload(index.query(parse_bbox(bbox), lat, lon, radius_km, k))
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -82,7 +110,7 @@ def get_hotspots():
 def run_demo_analysis():
     """Run demo analysis"""
     try:
-        results = demo_detector.run_analysis()
+        results = get_demo_detector().run_analysis(store=get_hotspot_store())
         return {
             "status": "success",
             "summary": results['summary'],
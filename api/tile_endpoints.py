@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Request, Response
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dependencies import get_data_fetcher
+from tile_renderer import GHANA_BBOX, TileRenderer
+
+router = APIRouter()
+
+# Browsers and CDNs may keep tiles for a day; the ETag changes with the source raster
+TILE_CACHE_CONTROL = "public, max-age=86400"
+
+def load_tile_source(dataset, size=None):
+    """Locally cached Landsat composite or indices over Ghana, at the overview level for size"""
+    tile_fetcher = get_data_fetcher()
+    if dataset == "ndvi":
+        return tile_fetcher.get_landsat_indices(GHANA_BBOX, '2024-01-01', '2024-12-31', size=size)
+    return tile_fetcher.get_landsat_surface_reflectance(GHANA_BBOX, '2024-01-01', '2024-12-31', size=size)
+
+tile_renderer = TileRenderer(load_tile_source, extent=GHANA_BBOX)
+
+@router.get("/tiles/{dataset}/{z}/{x}/{y}.png")
+def get_tile(dataset: str, z: int, x: int, y: int, request: Request):
+    """Slippy-map PNG tile rendered from local rasters"""
+    try:
+        png, etag = tile_renderer.get_tile(dataset, z, x, y)
+    except ValueError as e:
+        return Response(content=str(e), status_code=404, media_type="text/plain")
+    
+    headers = {"Cache-Control": TILE_CACHE_CONTROL, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=png, media_type="image/png", headers=headers)
@@ -7,6 +7,9 @@ from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 
+from analytics_cube import AnalyticsCube
+from hotspot_layers import hotspot_layer
+
 # Page config
 st.set_page_config(
     page_title="GalamseyWatch",
@@ -22,7 +25,7 @@ st.markdown("**Satellite-based Detection of Illegal Mining in Ghana**")
 st.sidebar.header("Controls")
 region = st.sidebar.selectbox(
     "Select Region",
-    ["Western Region", "Ashanti Region", "Eastern Region", "All Regions"]
+    ["All Regions", "Western Region", "Ashanti Region", "Eastern Region"]
 )
 
 date_range = st.sidebar.date_input(
@@ -31,35 +34,78 @@ date_range = st.sidebar.date_input(
     max_value=datetime.now()
 )
 
+detection_count = st.sidebar.select_slider(
+    "Simulated detections",
+    options=[120, 1000, 10000, 100000]
+)
+
 # Mock data for demonstration
 @st.cache_data
-def load_mock_data():
+def load_mock_data(n_detections=120):
     # Ghana mining regions coordinates
-    locations = [
+    locations = pd.DataFrame([
         {"name": "Obuasi", "lat": 6.2027, "lon": -1.6640, "severity": 0.8, "region": "Ashanti"},
         {"name": "Tarkwa", "lat": 5.3006, "lon": -1.9959, "severity": 0.9, "region": "Western"},
         {"name": "Dunkwa", "lat": 5.9667, "lon": -1.7833, "severity": 0.7, "region": "Central"},
         {"name": "Prestea", "lat": 5.4333, "lon": -2.1333, "severity": 0.6, "region": "Western"},
-    ]
-    
-    data = []
-    for loc in locations:
-        for i in range(30):
-            date = datetime.now() - timedelta(days=i*3)
-            data.append({
-                "location": loc["name"],
-                "lat": loc["lat"] + np.random.normal(0, 0.01),
-                "lon": loc["lon"] + np.random.normal(0, 0.01),
-                "severity": max(0, loc["severity"] + np.random.normal(0, 0.1)),
-                "region": loc["region"],
-                "date": date,
-                "ndvi_change": np.random.uniform(-0.3, -0.1),
-                "bsi_change": np.random.uniform(0.1, 0.4)
-            })
+    ])
     
-    return pd.DataFrame(data)
-
-df = load_mock_data()
+    # Built column by column: detections cycle through the sites, one every 3 days per site
+    site = np.arange(n_detections) % len(locations)
+    step = np.arange(n_detections) // len(locations) % 30
+    today = pd.Timestamp(datetime.now())
+    return pd.DataFrame({
+        "location": locations["name"].to_numpy()[site],
+        "lat": locations["lat"].to_numpy()[site] + np.random.normal(0, 0.01, n_detections),
+        "lon": locations["lon"].to_numpy()[site] + np.random.normal(0, 0.01, n_detections),
+        "severity": np.maximum(0, locations["severity"].to_numpy()[site] + np.random.normal(0, 0.1, n_detections)),
+        "region": locations["region"].to_numpy()[site],
+        "date": today - pd.to_timedelta(step * 3, unit="D"),
+        "ndvi_change": np.random.uniform(-0.3, -0.1, n_detections),
+        "bsi_change": np.random.uniform(0.1, 0.4, n_detections)
+    })
+
+def filter_mask(data, region_name, start_date, end_date):
+    """Rows matching the sidebar region and date range"""
+    mask = (data['date'].dt.date >= start_date) & (data['date'].dt.date <= end_date)
+    if region_name != "All Regions":
+        mask &= data['region'] == region_name.replace(" Region", "")
+    return mask
+
+# While a range is being picked the date input holds a single date
+start_date, end_date = (date_range[0], date_range[-1]) if isinstance(date_range, tuple) else (date_range, date_range)
+
+region_filter = None if region == "All Regions" else [region.replace(" Region", "")]
+
+@st.cache_resource(show_spinner=False)
+def load_analytics_cube(n_detections):
+    """Date x region x severity-bucket aggregates of the detections, built once per dataset"""
+    return AnalyticsCube.from_frame(load_mock_data(n_detections))
+
+@st.cache_data(show_spinner=False)
+def dashboard_views(regions, start_date, end_date, n_detections):
+    """Every metric and chart table for the active filters, read from the cube"""
+    cube = load_analytics_cube(n_detections)
+    filters = (list(regions) if regions else None, start_date, end_date)
+    return {
+        'metrics': cube.metrics(*filters),
+        'severity': cube.severity_histogram(*filters),
+        'daily': cube.daily(*filters),
+        'regional': cube.regional(*filters)
+    }
+
+views = dashboard_views(tuple(region_filter or ()), start_date, end_date, detection_count)
+
+@st.cache_data(show_spinner=False)
+def map_layer(region_name, start_date, end_date, n_detections):
+    """Hotspot GeoJSON for the active filters; grid cells instead of points for large counts"""
+    data = load_mock_data(n_detections)
+    visible = data[filter_mask(data, region_name, start_date, end_date) & (data['severity'] > 0.5)]
+    geojson, mode = hotspot_layer(
+        visible['lat'].to_numpy(), visible['lon'].to_numpy(), visible['severity'].to_numpy(),
+        labels=visible['location'].to_numpy()
+    )
+    return geojson, mode, len(visible)
 
 # Main dashboard
 col1, col2 = st.columns([2, 1])
@@ -70,40 +116,46 @@ with col1:
     # Create map centered on Ghana
     m = folium.Map(location=[7.9465, -1.0232], zoom_start=7)
     
-    # Add markers for detected mining activities
-    for _, row in df.iterrows():
-        if row['severity'] > 0.5:
-            color = 'red' if row['severity'] > 0.7 else 'orange'
-            folium.CircleMarker(
-                location=[row['lat'], row['lon']],
-                radius=row['severity'] * 10,
-                popup=f"{row['location']}<br>Severity: {row['severity']:.2f}",
-                color=color,
-                fillColor=color,
-                fillOpacity=0.6
-            ).add_to(m)
+    # One GeoJSON layer for every detection (or grid cell); styles come from feature properties
+    geojson, layer_mode, visible_count = map_layer(region, start_date, end_date, detection_count)
+    if layer_mode == 'points':
+        popup = folium.GeoJsonPopup(fields=['label', 'severity'], aliases=['Location', 'Severity'])
+    else:
+        popup = folium.GeoJsonPopup(fields=['count', 'severity', 'max_severity'],
+                                    aliases=['Detections', 'Mean severity', 'Max severity'])
+    if geojson['features']:
+        folium.GeoJson(
+            geojson,
+            marker=folium.CircleMarker(fill=True, fill_opacity=0.6),
+            style_function=lambda feature: {
+                'radius': feature['properties']['radius'],
+                'color': feature['properties']['color'],
+                'fillColor': feature['properties']['color']
+            },
+            popup=popup
+        ).add_to(m)
     
-    # Display map
-    map_data = st_folium(m, width=700, height=500)
+    # Display map; panning and zooming don't need to rerun the script
+    st_folium(m, width=700, height=500, returned_objects=[])
+    if layer_mode == 'cells':
+        st.caption(f"{visible_count:,} detections aggregated into {len(geojson['features']):,} grid cells")
 
 with col2:
     st.subheader("📊 Detection Summary")
     
     # Key metrics
-    total_hotspots = len(df[df['severity'] > 0.5])
-    high_severity = len(df[df['severity'] > 0.7])
-    avg_severity = df['severity'].mean()
-    
-    st.metric("Total Hotspots", total_hotspots)
-    st.metric("High Severity Sites", high_severity)
-    st.metric("Average Severity", f"{avg_severity:.2f}")
+    metrics = views['metrics']
+    st.metric("Total Hotspots", f"{metrics['total_hotspots']:,}")
+    st.metric("High Severity Sites", f"{metrics['high_severity']:,}")
+    st.metric("Average Severity", f"{metrics['avg_severity']:.2f}" if metrics['detections'] else "—")
     
     # Severity distribution
-    fig_severity = px.histogram(
-        df, x='severity', bins=20,
+    fig_severity = px.bar(
+        views['severity'], x='severity', y='count',
         title="Severity Distribution",
         labels={'severity': 'Severity Score', 'count': 'Frequency'}
     )
+    fig_severity.update_traces(width=0.05)
     st.plotly_chart(fig_severity, use_container_width=True)
 
 # Time series analysis
@@ -113,9 +165,8 @@ col3, col4 = st.columns(2)
 
 with col3:
     # NDVI change over time
-    daily_ndvi = df.groupby('date')['ndvi_change'].mean().reset_index()
     fig_ndvi = px.line(
-        daily_ndvi, x='date', y='ndvi_change',
+        views['daily'], x='date', y='ndvi_change',
         title="Vegetation Loss (NDVI Change)",
         labels={'ndvi_change': 'NDVI Change', 'date': 'Date'}
     )
@@ -123,9 +174,8 @@ with col3:
 
 with col4:
     # BSI change over time
-    daily_bsi = df.groupby('date')['bsi_change'].mean().reset_index()
     fig_bsi = px.line(
-        daily_bsi, x='date', y='bsi_change',
+        views['daily'], x='date', y='bsi_change',
         title="Soil Exposure (BSI Change)",
         labels={'bsi_change': 'BSI Change', 'date': 'Date'}
     )
@@ -134,11 +184,7 @@ with col4:
 # Regional analysis
 st.subheader("🏞️ Regional Impact Analysis")
 
-regional_stats = df.groupby('region').agg({
-    'severity': ['mean', 'count'],
-    'ndvi_change': 'mean',
-    'bsi_change': 'mean'
-}).round(3)
+regional_stats = views['regional'][['severity', 'count', 'ndvi_change', 'bsi_change']].round(3)
 
 regional_stats.columns = ['Avg Severity', 'Hotspot Count', 'Avg NDVI Change', 'Avg BSI Change']
 st.dataframe(regional_stats, use_container_width=True)
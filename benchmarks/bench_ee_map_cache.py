@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Show how the map ID cache collapses concurrent tile requests into one EE call
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'api'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import stub_ee
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=64, help="Concurrent map ID requests")
+    parser.add_argument('--latency', type=float, default=0.3, help="Simulated EE round trip (s)")
+    args = parser.parse_args()
+
+    ee = stub_ee.install(latency=args.latency)
+    import ee_imagery
+
+    for label in ['cold (concurrent)', 'warm']:
+        ee.reset()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.requests) as pool:
+            responses = list(pool.map(lambda _: ee_imagery.get_ee_map_id('landsat'), range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        mapids = {r['mapid'] for r in responses}
+        print(f"{label:>18}: {args.requests} requests, {ee.calls['getMapId']} getMapId call(s), "
+              f"{len(mapids)} distinct map ID(s), {elapsed * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+scikit-learn predict_proba versus the array-compiled forest from 1 to 10^7 rows
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from forest_compiler import compile_forest
+
+
+def best_of(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--max-rows', type=int, default=10 ** 6, help="Largest batch (use 10000000 for 10^7)")
+    parser.add_argument('--max-depth', type=int, default=10, help="0 for unlimited depth")
+    args = parser.parse_args()
+
+    # Same settings as GalamseyMLModel.train_random_forest, on the 8 ML features
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(20000, 8))
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=100, max_depth=args.max_depth or None, random_state=42).fit(X, y)
+    compiled = compile_forest(forest)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {}
+        for label, model in [('sklearn', forest), ('compiled', compiled)]:
+            path = os.path.join(tmp, f"{label}.pkl")
+            joblib.dump(model, path)
+            sizes[label] = os.path.getsize(path) / 1e6
+    print(f"model file: sklearn {sizes['sklearn']:.2f} MB, compiled {sizes['compiled']:.2f} MB")
+
+    print(f"{'rows':>10} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8} {'max |diff|':>11}")
+    rows = 1
+    while rows <= args.max_rows:
+        batch = rng.normal(size=(rows, 8))
+        repeats = 5 if rows <= 10 ** 4 else 1
+        expected, actual = forest.predict_proba(batch), compiled.predict_proba(batch)
+        sklearn_time = best_of(lambda: forest.predict_proba(batch), repeats)
+        compiled_time = best_of(lambda: compiled.predict_proba(batch), repeats)
+        print(f"{rows:>10} {sklearn_time * 1e3:>12.2f} {compiled_time * 1e3:>12.2f} "
+              f"{sklearn_time / compiled_time:>7.1f}x {np.abs(expected - actual).max():>11.1e}")
+        rows *= 10
+
+
+if __name__ == "__main__":
+    main()
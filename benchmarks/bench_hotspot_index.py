@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark HotspotIndex query latency with large numbers of detections
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hotspot_index import HotspotIndex
+
+
+def make_hotspots(n, seed=42):
+    """n random hotspots spread over Ghana's bounding box"""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(4.74, 11.17, n)
+    lons = rng.uniform(-3.25, 1.19, n)
+    return [{'lat': float(lat), 'lon': float(lon), 'severity': 0.5} for lat, lon in zip(lats, lons)]
+
+
+def time_query(fn, repeat):
+    """Median seconds per call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'hotspots':>10} {'build ms':>9} {'bbox ms':>8} {'radius ms':>10} {'k=10 ms':>8}")
+    for n in args.sizes:
+        hotspots = make_hotspots(n)
+        start = time.perf_counter()
+        index = HotspotIndex(hotspots)
+        build = time.perf_counter() - start
+
+        # Small viewport around Obuasi, a 5 km radius and 10 nearest
+        bbox = time_query(lambda: index.within_bbox(-1.70, 6.15, -1.60, 6.25), args.repeat)
+        radius = time_query(lambda: index.within_radius(6.2027, -1.6640, 5), args.repeat)
+        nearest = time_query(lambda: index.nearest(6.2027, -1.6640, 10), args.repeat)
+
+        print(f"{n:>10} {build * 1e3:>9.1f} {bbox * 1e3:>8.3f} {radius * 1e3:>10.3f} {nearest * 1e3:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fused index kernel against the original xarray expressions
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import xarray as xr
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nasa_data_fetcher import NASADataFetcher
+
+
+def legacy_calculate_indices(dataset):
+    """Original per-index xarray implementation (Landsat band map)"""
+    ndvi = (dataset['B5'] - dataset['B4']) / (dataset['B5'] + dataset['B4'])
+    ndwi = (dataset['B3'] - dataset['B5']) / (dataset['B3'] + dataset['B5'])
+    bsi = ((dataset['B6'] + dataset['B4']) - (dataset['B5'] + dataset['B2'])) / \
+          ((dataset['B6'] + dataset['B4']) + (dataset['B5'] + dataset['B2']))
+    dataset['NDVI'] = ndvi
+    dataset['NDWI'] = ndwi
+    dataset['BSI'] = bsi
+    return dataset
+
+
+def make_dataset(size, dtype):
+    """Random Landsat-like reflectance bands on a size x size grid"""
+    rng = np.random.default_rng(42)
+    data_vars = {
+        band: (['lat', 'lon'], rng.random((size, size), dtype=np.float32).astype(dtype, copy=False))
+        for band in ['B2', 'B3', 'B4', 'B5', 'B6']
+    }
+    return xr.Dataset(data_vars)
+
+
+def measure(fn, dataset):
+    """Return (seconds, peak traced bytes) for one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(dataset)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000],
+                        help="Grid edge lengths to benchmark")
+    parser.add_argument('--dtype', default='float64', choices=['float32', 'float64'],
+                        help="Input band dtype (synthetic fetchers produce float64)")
+    args = parser.parse_args()
+
+    fetcher = NASADataFetcher()
+    print(f"{'grid':>8} {'path':>8} {'seconds':>10} {'peak MB':>10}")
+
+    for size in args.sizes:
+        for name, fn in [
+            ('legacy', legacy_calculate_indices),
+            ('fused', lambda ds: fetcher.calculate_indices(ds, 'landsat')),
+        ]:
+            dataset = make_dataset(size, args.dtype)
+            elapsed, peak = measure(fn, dataset)
+            print(f"{size:>7}² {name:>8} {elapsed:>10.3f} {peak / 1e6:>10.1f}")
+            del dataset
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark local change detection as the number of scenes grows
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import xarray as xr
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from local_detection import LocalGalamseyDetector
+
+
+def make_stack(n_scenes, size, start_date='2023-01-01', end_date='2024-01-01'):
+    """Random Landsat-like time stack with n_scenes spread over the date range"""
+    rng = np.random.default_rng(42)
+    start, end = np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D')
+    offsets = np.linspace(0, (end - start).astype(int) - 1, n_scenes).astype(int)
+    times = start + offsets.astype('timedelta64[D]')
+
+    shape = (n_scenes, size, size)
+    data_vars = {}
+    for band in ['B2', 'B3', 'B4', 'B5', 'B6']:
+        data = rng.random(shape, dtype=np.float32) * 0.4
+        # Roughly 10% of pixels cloud-masked
+        data[rng.random(shape) < 0.1] = np.nan
+        data_vars[band] = (['time', 'lat', 'lon'], data)
+
+    return xr.Dataset(data_vars, coords={
+        'time': times,
+        'lat': np.linspace(5.0, 6.0, size),
+        'lon': np.linspace(-2.5, -1.5, size)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scenes', type=int, nargs='+', default=[4, 8, 16, 32, 64])
+    parser.add_argument('--size', type=int, default=1000, help="Grid edge length")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    detector = LocalGalamseyDetector()
+    print(f"{'scenes':>7} {'grid':>7} {'best s':>9} {'Mpix-scenes/s':>14}")
+
+    for n_scenes in args.scenes:
+        stack = make_stack(n_scenes, args.size)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            detector.detect_changes(stack, '2023-01-01', '2024-01-01')
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        rate = n_scenes * args.size ** 2 / best / 1e6
+        print(f"{n_scenes:>7} {args.size:>6}² {best:>9.3f} {rate:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
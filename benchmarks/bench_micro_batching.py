@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Per-request predict_proba calls versus micro-batched calls under concurrent load
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from micro_batcher import MicroBatcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    # Same forest shape as GalamseyMLModel.train_random_forest, on the 8 ML features
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(5000, 8))
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=0.5, size=5000) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42).fit(X, y)
+    rows = rng.normal(size=(args.requests, 8))
+
+    def single(row):
+        return forest.predict_proba(row[None, :])[0, 1]
+
+    batcher = MicroBatcher(lambda batch: forest.predict_proba(np.array(batch))[:, 1].tolist(),
+                           max_wait=args.wait_ms / 1000)
+
+    for label, predict in [('per request', single), ('micro-batched', batcher.predict)]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            scores = list(pool.map(predict, rows))
+        elapsed = time.perf_counter() - start
+        print(f"{label:>14}: {args.requests / elapsed:8.0f} predictions/s, {elapsed:.2f} s")
+
+    expected = forest.predict_proba(rows)[:, 1]
+    assert np.allclose(scores, expected), "micro-batched scores differ"
+
+    stats = batcher.stats()
+    print(f"{stats['batches']} batches, mean size {stats['mean_batch_size']}, "
+          f"histogram {stats['batch_size_histogram']}")
+    print(f"queue wait ms: {stats['queue_wait_ms']}, histogram {stats['queue_wait_ms_histogram']}")
+
+
+if __name__ == "__main__":
+    main()
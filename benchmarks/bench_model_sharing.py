@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Per-worker resident memory with the forest copied into each process versus
+memory-mapped from a ModelRegistry version, plus hot-swap latency
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ml_model import GalamseyMLModel
+from model_registry import ModelRegistry, RF_FILE, process_memory
+
+
+def _worker(mode, model_dir, legacy_path, ready, done, reports):
+    registry = ModelRegistry(model_dir)
+    if mode == 'copied':
+        # What every uvicorn worker did before: its own unpickled sklearn forest
+        before = process_memory()
+        model = GalamseyMLModel()
+        model.rf_model = joblib.load(legacy_path)
+        after = process_memory()
+    else:
+        model = registry.current()
+        before, after = registry.last_load['memory_before_mb'], registry.last_load['memory_after_mb']
+
+    # Touch every node, as serving traffic would
+    model.predict_galamsey(np.random.default_rng(0).normal(size=(5000, 8)))
+    ready.wait()
+    reports.put({'before': before, 'after': after, 'serving': process_memory()})
+    done.wait()
+
+
+def measure(mode, workers, model_dir, legacy_path):
+    ctx = multiprocessing.get_context('spawn')
+    ready, done, reports = ctx.Barrier(workers + 1), ctx.Event(), ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(mode, model_dir, legacy_path, ready, done, reports))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    ready.wait()
+    results = [reports.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return results
+
+
+def hot_swap_latency(registry, model, requests_per_second=1000):
+    """Seconds from activating a new version until a serving thread answers from it"""
+    registry.current()
+    swapped = threading.Event()
+    published = {}
+
+    def serve():
+        while not swapped.is_set():
+            registry.current().predict_galamsey(np.zeros((1, 8)))
+            if 'version' in published and registry.version == published['version']:
+                published['seen'] = time.perf_counter()
+                swapped.set()
+            time.sleep(1 / requests_per_second)
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    version = registry.publish(model, 'v2', activate=False, compiled=True)
+    start = time.perf_counter()
+    registry.activate(version)
+    published['version'] = version
+    thread.join(timeout=30)
+    return published['seen'] - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--trees', type=int, default=300)
+    parser.add_argument('--max-depth', type=int, default=0, help="0 for unlimited depth")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(50000, 8))
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=1.0, size=len(X)) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=args.trees, max_depth=args.max_depth or None,
+                                    random_state=42, n_jobs=-1).fit(X, y)
+    model = GalamseyMLModel()
+    model.rf_model = forest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, RF_FILE)
+        joblib.dump(forest, legacy_path)
+        registry = ModelRegistry(tmp)
+        version = registry.publish(model, 'v1', compiled=True)
+        shared_size = os.path.getsize(os.path.join(registry.version_dir(version), RF_FILE)) / 2 ** 20
+        print(f"forest: {args.trees} trees, sklearn pickle {os.path.getsize(legacy_path) / 2 ** 20:.1f} MB, "
+              f"compiled {shared_size:.1f} MB; {args.workers} workers")
+
+        print(f"{'mode':>8} {'load +MB':>9} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8} {'PSS MB':>8}")
+        for mode in ['copied', 'shared']:
+            results = measure(mode, args.workers, tmp, legacy_path)
+            load = np.mean([r['after']['rss'] - r['before']['rss'] for r in results])
+            serving = {key: np.mean([r['serving'][key] for r in results])
+                       for key in ['rss', 'rss_anon', 'rss_file', 'pss']}
+            print(f"{mode:>8} {load:>9.1f} {serving['rss']:>8.1f} {serving['rss_anon']:>8.1f} "
+                  f"{serving['rss_file']:>8.1f} {serving['pss']:>8.1f}")
+
+        print(f"hot swap: new version served {hot_swap_latency(registry, model) * 1e3:.1f} ms after activation")
+
+
+if __name__ == "__main__":
+    main()
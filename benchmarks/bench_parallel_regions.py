@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Scaling of local region/tile detection from 1 to N worker processes
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from local_detection import LocalGalamseyDetector
+from nasa_data_fetcher import NASADataFetcher
+from parallel_detection import ParallelRegionDetector, split_bbox
+from tile_renderer import GHANA_BBOX
+
+
+def serial(tiles, start_date, end_date):
+    """The previous approach: one region after another in this process"""
+    fetcher, detector = NASADataFetcher(), LocalGalamseyDetector()
+    hotspots = 0
+    for name, bbox in tiles.items():
+        stack = fetcher.get_landsat_time_series(bbox, start_date, end_date)
+        hotspots += len(detector.get_hotspots(detector.detect_changes(stack, start_date, end_date), min_area=1))
+    return hotspots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--grid', type=int, default=4, help="Split Ghana into grid x grid tiles")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--start', default='2023-01-01')
+    parser.add_argument('--end', default='2025-01-01')
+    args = parser.parse_args()
+
+    tiles = split_bbox(GHANA_BBOX, args.grid, args.grid)
+    print(f"{len(tiles)} tiles, {os.cpu_count()} CPU(s)")
+
+    start = time.perf_counter()
+    serial(tiles, args.start, args.end)
+    baseline = time.perf_counter() - start
+    print(f"{'serial loop':>12}: {baseline:7.2f} s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with ParallelRegionDetector(workers=workers, use_cache=False) as detector:
+            # Warm the pool so process start-up isn't counted
+            detector.detect_regions(dict(list(tiles.items())[:workers]), args.start, args.end, min_area=1)
+            start = time.perf_counter()
+            detector.detect_regions(tiles, args.start, args.end, min_area=1)
+            elapsed = time.perf_counter() - start
+        print(f"{workers:>4} workers: {elapsed:7.2f} s  ({baseline / elapsed:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Sliding-window CNN inference throughput (patches/s) over a synthetic feature cube on CPU
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from raster_inference import iter_probability_tiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1024, help="Cube height and width in pixels")
+    parser.add_argument('--channels', type=int, default=8)
+    parser.add_argument('--patch', type=int, default=64)
+    parser.add_argument('--stride', type=int, default=32)
+    parser.add_argument('--tile', type=int, default=512)
+    parser.add_argument('--batch', type=int, default=256)
+    parser.add_argument('--engine-only', action='store_true',
+                        help="Score patches with a channel mean to time windowing and blending alone")
+    args = parser.parse_args()
+
+    cube = np.random.default_rng(0).random((args.size, args.size, args.channels), dtype=np.float32)
+
+    if args.engine_only:
+        def predict_batch(batch):
+            return batch.mean(axis=(1, 2, 3))
+        label = "engine only"
+    else:
+        from ml_model import GalamseyMLModel
+        model = GalamseyMLModel()
+        model.create_cnn_model((args.patch, args.patch, args.channels))
+
+        def predict_batch(batch):
+            return model.cnn_model.predict(batch, batch_size=args.batch, verbose=0)
+        label = "CNN"
+
+    patches = 0
+
+    def counting(batch):
+        nonlocal patches
+        patches += len(batch)
+        return predict_batch(batch)
+
+    start = time.perf_counter()
+    for _ in iter_probability_tiles(cube, counting, args.patch, args.stride, args.tile, args.batch):
+        pass
+    elapsed = time.perf_counter() - start
+
+    print(f"{label}: {args.size}x{args.size}x{args.channels} cube, patch {args.patch}, stride {args.stride}, "
+          f"tile {args.tile}")
+    print(f"{patches} patches in {elapsed:.2f} s -> {patches / elapsed:,.0f} patches/s, "
+          f"{args.size * args.size / elapsed / 1e6:.2f} Mpx/s")
+
+
+if __name__ == "__main__":
+    main()
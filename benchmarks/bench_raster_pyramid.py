@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Raster overview pyramids: zoomed-out tiles and country-wide statistics read
+from the coarsest sufficient overview versus the full-resolution raster
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nasa_data_fetcher import NASADataFetcher
+from raster_cache import RasterCache
+from raster_pyramid import build_overviews, output_size
+from tile_renderer import GHANA_BBOX, TileRenderer
+
+DATES = ('2024-01-01', '2024-12-31')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=4096, help="Base grid pixels per side")
+    parser.add_argument('--zoom', type=int, default=7)
+    parser.add_argument('--max-size', type=int, default=512, help="Output size for the statistics read")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = NASADataFetcher(cache=RasterCache(os.path.join(tmp, 'rasters')))
+        fetcher.GRID_SIZES = {**NASADataFetcher.GRID_SIZES, 'landsat': args.size}
+
+        start = time.perf_counter()
+        indices = fetcher.get_landsat_indices(GHANA_BBOX, *DATES)
+        built = time.perf_counter() - start
+        full = indices.load()
+        start = time.perf_counter()
+        levels = build_overviews(full)
+        pyramid = time.perf_counter() - start
+        print(f"{args.size}^2 base, overviews {[level.sizes['lat'] for level in levels]}: "
+              f"fetch + cache {built:.2f} s, of which pyramid build {pyramid:.2f} s")
+
+        # Statistics for a country-wide summary
+        west, south, east, north = GHANA_BBOX
+        size = output_size(GHANA_BBOX, max(east - west, north - south) / args.max_size)
+        results = {}
+        for label, read_size in [('full resolution', None), (f"overview for {args.max_size} px", size)]:
+            start = time.perf_counter()
+            data = fetcher.get_landsat_indices(GHANA_BBOX, *DATES, size=read_size)
+            ndvi = data['NDVI'].values
+            mean = float(np.nanmean(ndvi))
+            results[label] = time.perf_counter() - start
+            print(f"NDVI mean from {label:<22} {ndvi.shape}: {mean:.5f} in {results[label] * 1e3:7.1f} ms, "
+                  f"{ndvi.nbytes / 2 ** 20:.1f} MB read")
+
+        # First zoomed-out tile: the source load dominates
+        for label, extent in [('full resolution', None), ('overview', GHANA_BBOX)]:
+            with tempfile.TemporaryDirectory() as tile_dir:
+                renderer = TileRenderer(
+                    lambda dataset, size=None: fetcher.get_landsat_indices(GHANA_BBOX, *DATES, size=size),
+                    cache_dir=tile_dir, extent=extent
+                )
+                start = time.perf_counter()
+                renderer.get_tile('ndvi', args.zoom, 2 ** (args.zoom - 1) - 1, 2 ** (args.zoom - 1) - 2)
+                elapsed = time.perf_counter() - start
+                source = next(iter(renderer._sources.values()))
+                print(f"first z{args.zoom} NDVI tile from {label:<16} {source['bands']['NDVI'].shape}: "
+                      f"{elapsed * 1e3:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
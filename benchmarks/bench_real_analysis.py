@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare Earth Engine round trips and wall time of the real-data analysis
+before and after batching/concurrent dispatch, against a stub EE
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import stub_ee
+
+
+def legacy_detector_class(base):
+    """The previous serial implementation: two size() calls and one sample per region"""
+    import ee
+    from real_data_processor import MINING_REGIONS, add_indices
+
+    class LegacyRealGalamseyDetector(base):
+        def get_real_landsat_data(self, start_date='2023-01-01', end_date='2024-01-01'):
+            results = {}
+            for region_name, coords in MINING_REGIONS.items():
+                geometry = ee.Geometry.Rectangle(coords)
+                collection = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
+                    .merge(ee.ImageCollection('LANDSAT/LC09/C02/T1_L2')) \
+                    .filterBounds(geometry) \
+                    .filterDate(start_date, end_date) \
+                    .filter(ee.Filter.lt('CLOUD_COVER', 20))
+                if collection.size().getInfo() > 0:
+                    results[region_name] = {
+                        'image': collection.map(add_indices).median(),
+                        'geometry': geometry,
+                        'image_count': collection.size().getInfo()
+                    }
+            return results
+
+        def detect_real_changes(self, region_data, pool=None):
+            hotspots = []
+            for region_name, data in region_data.items():
+                hotspots.extend(self._sample_region(region_name, data))
+            return hotspots
+
+        def run_real_analysis(self, store=None):
+            landsat_data = self.get_real_landsat_data()
+            hotspots = self.detect_real_changes(landsat_data)
+            modis_data = self.get_modis_ndvi()
+            return {'hotspots': hotspots, 'modis_samples': len(modis_data['features'])}
+
+    return LegacyRealGalamseyDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.5, help="Simulated EE round trip (s)")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    ee = stub_ee.install(latency=args.latency)
+    from real_data_processor import RealGalamseyDetector
+
+    detectors = {
+        'serial (before)': legacy_detector_class(RealGalamseyDetector)(),
+        'batched + concurrent': RealGalamseyDetector()
+    }
+
+    for label, detector in detectors.items():
+        best = float('inf')
+        for _ in range(args.repeats):
+            ee.reset()
+            start = time.perf_counter()
+            results = detector.run_real_analysis()
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:>22}: {ee.round_trips:>2} round trips, "
+              f"{len(results['hotspots'])} hotspots, {best:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
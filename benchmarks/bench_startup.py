@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Cold-start import time of the API entry points, via python -X importtime
+
+Fails (exit 1) when an entry point exceeds --max-ms or pulls in one of
+the --forbid modules, so start-up regressions show up in CI or before a
+deploy. Heavy libraries belong behind lazily created singletons, so the
+default limit sits well below what loading xarray and pandas costs.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+# Libraries the API must only load on first use
+LAZY_MODULES = ['xarray', 'pandas', 'scipy', 'sklearn', 'netCDF4', 'ee', 'tensorflow']
+
+
+def import_profile(module):
+    """(wall seconds, total us, {direct import: cumulative us}, all modules) for importing module in a fresh interpreter"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=API_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.splitlines()[-1]}")
+
+    total, imports, loaded = 0, {}, set()
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        loaded.add(name)
+        # importtime indents two spaces per nesting level below the entry point
+        if name == module and len(indent) == 1:
+            total = int(cumulative)
+        elif len(indent) == 3:
+            imports[name] = int(cumulative)
+    return wall, total, imports, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('modules', nargs='*', default=['simple_main', 'main'])
+    parser.add_argument('--top', type=int, default=8, help="Slowest direct imports to list")
+    parser.add_argument('--max-ms', type=float, default=750, help="Fail if an entry point imports slower")
+    parser.add_argument('--forbid', nargs='*', default=LAZY_MODULES,
+                        help="Fail if an entry point imports any of these modules")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            wall, total, imports, loaded = import_profile(module)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failed = True
+            continue
+
+        total_ms = total / 1000
+        print(f"{module}: import {total_ms:.0f} ms, process wall {wall * 1000:.0f} ms")
+        for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        if args.max_ms is not None and total_ms > args.max_ms:
+            print(f"❌ {module} import exceeds {args.max_ms:.0f} ms")
+            failed = True
+        eager = sorted(loaded.intersection(args.forbid))
+        if eager:
+            print(f"❌ {module} imports {', '.join(eager)} at start-up")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark rendering XYZ tiles versus serving them from the disk cache
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nasa_data_fetcher import NASADataFetcher
+from tile_renderer import GHANA_BBOX, TileRenderer
+
+
+def ghana_tiles(z):
+    """XYZ tiles covering Ghana at zoom z"""
+    n = 2 ** z
+    west, south, east, north = GHANA_BBOX
+    x0, x1 = int((west + 180) / 360 * n), int((east + 180) / 360 * n)
+
+    def tile_y(lat):
+        return int((1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2 * n)
+
+    return [(z, x, y) for x in range(x0, x1 + 1) for y in range(tile_y(north), tile_y(south) + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--zooms', type=int, nargs='+', default=[7, 9, 11])
+    parser.add_argument('--max-tiles', type=int, default=64, help="Tiles per zoom level")
+    args = parser.parse_args()
+
+    fetcher = NASADataFetcher()
+    landsat = fetcher.get_landsat_surface_reflectance(GHANA_BBOX, '2024-01-01', '2024-12-31')
+    sources = {'landsat': landsat, 'ndvi': fetcher.calculate_indices(landsat.copy(), 'landsat')}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        renderer = TileRenderer(lambda dataset: sources[dataset], cache_dir=cache_dir)
+        print(f"{'dataset':>8} {'zoom':>5} {'tiles':>6} {'render ms':>10} {'cached ms':>10}")
+
+        for dataset in ['landsat', 'ndvi']:
+            for z in args.zooms:
+                tiles = ghana_tiles(z)[:args.max_tiles]
+                timings = {}
+                for label in ['render', 'cached']:
+                    start = time.perf_counter()
+                    for tile in tiles:
+                        renderer.get_tile(dataset, *tile)
+                    timings[label] = (time.perf_counter() - start) / len(tiles)
+                print(f"{dataset:>8} {z:>5} {len(tiles):>6} "
+                      f"{timings['render'] * 1e3:>10.2f} {timings['cached'] * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Sharded training dataset: build throughput, streaming read throughput and
+peak memory against loading every patch at once (and the tf.data pipeline
+when TensorFlow is installed)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from training_dataset import build_dataset, split_shards
+
+READERS = {
+    'streaming': """
+from training_dataset import iter_shard
+n = sum(len(labels) for path in paths for _, labels in iter_shard(path))
+""",
+    'in-memory': """
+import numpy as np
+patches = np.concatenate([np.load(path)['patches'] for path in paths])
+n = len(patches)
+""",
+    'tf.data': """
+from training_dataset import make_tf_dataset
+n = sum(int(labels.shape[0]) for _, labels in make_tf_dataset(paths, batch_size=64))
+"""
+}
+
+
+def run_reader(name, paths):
+    """(samples, seconds, peak RSS MB) for one reader in a fresh interpreter"""
+    code = f"""
+import resource, sys, time
+sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})
+paths = {paths!r}
+start = time.perf_counter()
+{READERS[name]}
+print(n, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    n, seconds, peak = result.stdout.split()[-3:]
+    return int(n), float(seconds), float(peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples-per-site', type=int, default=400)
+    parser.add_argument('--shard-size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        manifest = build_dataset(tmp, samples_per_site=args.samples_per_site, shard_size=args.shard_size,
+                                 workers=args.workers)
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(tmp, shard['file'])) for shard in manifest['shards']) / 2 ** 20
+        print(f"build: {manifest['count']} samples in {len(manifest['shards'])} shards ({size:.0f} MB), "
+              f"{elapsed:.1f} s, {manifest['count'] / elapsed:.0f} samples/s")
+
+        train_paths, _ = split_shards(tmp)
+        print(f"{'reader':>10} {'samples':>8} {'samples/s':>10} {'peak RSS MB':>12}")
+        for name in READERS:
+            result = run_reader(name, train_paths)
+            if result is None:
+                print(f"{name:>10}  unavailable")
+                continue
+            n, seconds, peak = result
+            print(f"{name:>10} {n:>8} {n / seconds:>10.0f} {peak:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Stand-in for the earthengine-api module so EE code paths can run offline
+
+Every ee.* constructor and method returns a chainable node that records
+the call; only the server round trips (getInfo, getMapId, getThumbURL)
+sleep for a simulated latency and are counted.
+"""
+
+import sys
+import threading
+import time
+import types
+from collections import Counter
+
+
+class _Node:
+    """Client-side EE object: calling methods just extends the graph"""
+
+    def __init__(self, stub, op, args=(), kwargs=None, parent=None):
+        self._stub = stub
+        self._op = op
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._parent = parent
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return _Node(self._stub, name, args, kwargs, parent=self)
+        return method
+
+    def __call__(self, *args, **kwargs):
+        return _Node(self._stub, self._op, args, kwargs, parent=self)
+
+    def _evaluate(self):
+        """Value the server would return for this node"""
+        stub = self._stub
+        if self._op == 'size':
+            return stub.collection_size
+        if self._op in ('sample', 'reduceToVectors'):
+            num = self._kwargs.get('numPixels', stub.sample_size)
+            return {'type': 'FeatureCollection', 'features': [
+                {'type': 'Feature',
+                 'geometry': {'type': 'Point', 'coordinates': [-1.7 + i * 1e-3, 5.5 + i * 1e-3]},
+                 'properties': {'NDVI': 0.3, 'BSI': 0.2, 'NDWI': -0.1}}
+                for i in range(num)
+            ]}
+        if self._op == 'Dictionary':
+            source = self._args[0] if self._args else {}
+            return {key: value._evaluate() if isinstance(value, _Node) else value
+                    for key, value in source.items()}
+        if self._op == 'List':
+            source = self._args[0] if self._args else []
+            return [value._evaluate() if isinstance(value, _Node) else value for value in source]
+        return {}
+
+    def _round_trip(self, name):
+        self._stub._record(name)
+        time.sleep(self._stub.latency)
+
+    def getInfo(self):
+        self._round_trip('getInfo')
+        return self._evaluate()
+
+    def getMapId(self, vis_params=None):
+        self._round_trip('getMapId')
+        n = self._stub.calls['getMapId']
+        return {'mapid': f'stub-map-{n}', 'token': f'stub-token-{n}'}
+
+    def getThumbURL(self, params=None):
+        self._round_trip('getThumbURL')
+        return f"https://earthengine.stub/thumb/{self._stub.calls['getThumbURL']}.png"
+
+
+class StubEE(types.ModuleType):
+    """Module object installed as sys.modules['ee']"""
+
+    def __init__(self, latency=0.0, collection_size=12, sample_size=50):
+        super().__init__('ee')
+        self.latency = latency
+        self.collection_size = collection_size
+        self.sample_size = sample_size
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+        for name in ['FeatureCollection', 'ImageCollection', 'Image', 'Geometry', 'Filter',
+                     'Reducer', 'Dictionary', 'List', 'Number', 'String', 'Feature']:
+            setattr(self, name, _Node(self, name))
+
+    def _record(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    @property
+    def round_trips(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def Initialize(self, *args, **kwargs):
+        pass
+
+    def Authenticate(self, *args, **kwargs):
+        pass
+
+
+def install(**kwargs):
+    """Install a fresh stub as the ee module and return it"""
+    stub = StubEE(**kwargs)
+    sys.modules['ee'] = stub
+    return stub
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the raster, detection and API hot paths
+
+Every case runs at several input sizes with the stub ee module installed,
+timed as the median of many rounds. Results are compared against
+benchmarks/baselines.json; a case fails the run (exit 1) only when even its
+lower quartile is slower than the baseline by more than --threshold and its
+median is at least --min-delta-ms slower, so scheduler noise on shared
+machines and microsecond-scale cases do not trip it.
+
+    python benchmarks/suite.py                  # compare against baselines
+    python benchmarks/suite.py -k indices       # only matching cases
+    python benchmarks/suite.py --save-baseline  # record new baselines
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import xarray as xr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'api'))
+import stub_ee
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# name -> (setup(size) returning the callable to time, sizes)
+CASES = {}
+
+
+def case(*sizes):
+    """Register setup(size) as a benchmark case, run once per size"""
+    def register(setup):
+        CASES[setup.__name__] = (setup, sizes)
+        return setup
+    return register
+
+
+@case(256, 1024, 2048)
+def calculate_indices(size):
+    from nasa_data_fetcher import NASADataFetcher
+    rng = np.random.default_rng(42)
+    dataset = xr.Dataset({
+        band: (['lat', 'lon'], rng.random((size, size), dtype=np.float32))
+        for band in ['B2', 'B3', 'B4', 'B5', 'B6']
+    })
+    fetcher = NASADataFetcher()
+    return lambda: fetcher.calculate_indices(dataset)
+
+
+def _generator(source, method, *args):
+    def setup(size):
+        from nasa_data_fetcher import NASADataFetcher
+        fetcher = NASADataFetcher()
+        fetcher.GRID_SIZES = {**NASADataFetcher.GRID_SIZES, source: size}
+        return lambda: getattr(fetcher, method)([-2.5, 5.0, -1.5, 6.0], *args)
+    return setup
+
+
+CASES['landsat_generator'] = (_generator('landsat', '_fetch_landsat_surface_reflectance',
+                                         '2024-01-01', '2024-12-31'), (100, 500, 1000))
+CASES['landsat_series_generator'] = (_generator('landsat_series', '_fetch_landsat_time_series',
+                                                '2024-01-01', '2024-12-31'), (50, 100, 200))
+CASES['modis_generator'] = (_generator('modis', '_fetch_modis_ndvi', '2024-01-01', '2024-12-31'), (50, 200))
+
+
+@case(512, 2048)
+def synthetic_landsat_window(size):
+    from synthetic_rasters import SyntheticRasterGenerator
+    from tile_renderer import GHANA_BBOX
+    landsat = SyntheticRasterGenerator(seed=42, resolution_m=30).landsat_surface_reflectance(GHANA_BBOX)
+    window = dict(lat=slice(4096, 4096 + size), lon=slice(4096, 4096 + size))
+    return lambda: {band: variable.values for band, variable in landsat.isel(window).data_vars.items()}
+
+
+def _hotspot_rows(n):
+    rng = np.random.default_rng(42)
+    return [{
+        'lat': float(lat), 'lon': float(lon), 'severity': float(severity), 'region': 'Western',
+        'ndvi_change': -0.3, 'bsi_change': 0.2, 'confidence': 'high'
+    } for lat, lon, severity in zip(rng.uniform(4.74, 11.17, n), rng.uniform(-3.25, 1.19, n), rng.random(n))]
+
+
+def _simple_main(size):
+    """simple_main with a store whose latest real run has size hotspots"""
+    import simple_main
+    simple_main.get_hotspot_store().append_run('real', _hotspot_rows(size))
+    return simple_main
+
+
+@case(100, 1000, 10000)
+def get_hotspots_uncached(size):
+    simple_main = _simple_main(size)
+
+    def run():
+        # Force the index build, formatting and encoding on every call
+        simple_main.response_cache.clear('hotspots')
+        simple_main.hotspot_indexes.invalidate()
+        return simple_main.get_hotspots()
+    return run
+
+
+@case(1)
+def demo_hotspots(size):
+    from demo_data_processor import DemoGalamseyDetector
+    detector = DemoGalamseyDetector()
+
+    def run():
+        # Same number of hotspots on every call
+        np.random.seed(42)
+        return detector.generate_realistic_hotspots()
+    return run
+
+
+@case(100, 1000, 10000)
+def get_demo_hotspots_uncached(size):
+    import demo_endpoints
+    demo_endpoints.get_hotspot_store().append_run('demo', _hotspot_rows(size))
+
+    def run():
+        # Read, format and encode the latest demo run on every call
+        demo_endpoints.response_cache.clear('demo-hotspots')
+        return demo_endpoints.get_demo_hotspots()
+    return run
+
+
+@case(100, 1000, 10000)
+def get_hotspots_bbox(size):
+    simple_main = _simple_main(size)
+    simple_main.get_hotspots()
+    return lambda: simple_main.get_hotspots(bbox='-2.5,5.0,-1.0,7.0')
+
+
+@case(1000, 10000, 100000)
+def hotspot_map_layer(size):
+    from hotspot_layers import hotspot_layer
+    rng = np.random.default_rng(42)
+    sites = rng.uniform([5.0, -2.5], [7.0, -1.0], size=(40, 2))
+    points = sites[rng.integers(0, len(sites), size)] + rng.normal(0, 0.02, (size, 2))
+    severity = rng.uniform(0.5, 1.0, size)
+    return lambda: hotspot_layer(points[:, 0], points[:, 1], severity)
+
+
+@case(100000, 1000000)
+def analytics_cube_filter(size):
+    import pandas as pd
+    from analytics_cube import AnalyticsCube
+    rng = np.random.default_rng(42)
+    cube = AnalyticsCube.from_frame(pd.DataFrame({
+        'date': pd.Timestamp('2024-12-31') - pd.to_timedelta(rng.integers(0, 365, size), unit='D'),
+        'region': rng.choice(['Ashanti', 'Central', 'Eastern', 'Western'], size),
+        'severity': rng.uniform(0, 1.2, size),
+        'ndvi_change': rng.uniform(-0.3, -0.1, size),
+        'bsi_change': rng.uniform(0.1, 0.4, size)
+    }))
+    filters = (['Western'], '2024-03-01', '2024-09-30')
+    return lambda: (cube.metrics(*filters), cube.severity_histogram(*filters), cube.daily(*filters),
+                    cube.regional(*filters))
+
+
+def _forest_model(compiled):
+    from sklearn.ensemble import RandomForestClassifier
+    from ml_model import GalamseyMLModel
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(5000, 8))
+    y = (X[:, 0] - X[:, 2] > 0).astype(int)
+    model = GalamseyMLModel()
+    model.train_random_forest(X, y)
+    if compiled:
+        model.compile_random_forest()
+    return model
+
+
+@case(1, 1000, 100000)
+def predict_galamsey(size):
+    model = _forest_model(compiled=False)
+    features = np.random.default_rng(0).normal(size=(size, 8))
+    return lambda: model.predict_galamsey(features)
+
+
+@case(1, 1000, 100000)
+def predict_galamsey_compiled(size):
+    model = _forest_model(compiled=True)
+    features = np.random.default_rng(0).normal(size=(size, 8))
+    return lambda: model.predict_galamsey(features)
+
+
+def measure(fn, rounds=15, min_time=0.1):
+    """(median, lower quartile, upper quartile) per-call seconds over rounds of enough calls to last min_time
+
+    Cases slower than a second per call run 5 rounds.
+    """
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    if elapsed / number > 1:
+        rounds = 5
+    times = np.array(timer.repeat(repeat=rounds, number=number)) / number
+    median, q1, q3 = np.percentile(times, [50, 25, 75])
+    return float(median), float(q1), float(q3)
+
+
+def machine_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'results': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='filter', default=None, help="Run only cases whose name contains this")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help="Allowed slowdown of the lower quartile over the baseline before failing")
+    parser.add_argument('--min-delta-ms', type=float, default=0.1,
+                        help="Smallest median slowdown per call that can fail the run")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baselines")
+    parser.add_argument('--output', default=None, help="Also write results as JSON (e.g. one file per commit)")
+    args = parser.parse_args()
+
+    stub_ee.install()
+    tmp = tempfile.TemporaryDirectory()
+    # The API modules open their stores at import; keep them off the real ones
+    os.environ['GALAMSEY_DB_PATH'] = os.path.join(tmp.name, 'bench.db')
+    os.environ['GALAMSEY_CACHE_DIR'] = os.path.join(tmp.name, 'rasters')
+
+    baselines = load_baselines(args.baseline)
+    if baselines.get('machine', {}).get('cpus') not in (None, os.cpu_count()):
+        print(f"⚠️ Baselines were recorded with {baselines['machine']['cpus']} CPU(s), "
+              f"this machine has {os.cpu_count()}; re-record them with --save-baseline")
+
+    results, spreads, regressions = {}, {}, []
+    print(f"{'case':<28} {'size':>7} {'median':>11} {'iqr':>17} {'baseline':>11} {'ratio':>7}")
+    for name, (setup, sizes) in CASES.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name], spreads[name] = {}, {}
+        for size in sizes:
+            seconds, q1, q3 = measure(setup(size))
+            results[name][str(size)] = seconds
+            spreads[name][str(size)] = [q1, q3]
+            baseline = baselines['results'].get(name, {}).get(str(size))
+            ratio = seconds / baseline if baseline else None
+            flag = ''
+            if (baseline and q1 / baseline > args.threshold
+                    and (seconds - baseline) * 1e3 > args.min_delta_ms):
+                regressions.append((name, size, ratio))
+                flag = ' ❌'
+            compared = f"{baseline * 1e3:>9.3f}ms {ratio:>6.2f}x{flag}" if baseline else f"{'-':>11} {'-':>7}"
+            print(f"{name:<28} {size:>7} {seconds * 1e3:>9.3f}ms "
+                  f"{q1 * 1e3:>7.3f}-{q3 * 1e3:<7.3f}ms {compared}")
+
+    report = {'machine': machine_info(), 'results': results, 'iqr': spreads}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        # Cases not run this time keep their previous baselines
+        report['results'] = {**baselines['results'], **results}
+        report['iqr'] = {**baselines.get('iqr', {}), **spreads}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved baselines to {args.baseline}")
+    tmp.cleanup()
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold:.2f}x (median ratio shown): "
+              + ", ".join(f"{name}[{size}] {ratio:.2f}x" for name, size, ratio in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,6 @@ import ee
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import tensorflow as tf
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
 import requests
 import xarray as xr
 
@@ -176,6 +173,9 @@ class GalamseyDetector:
     
     def train_ml_model(self, training_data):
         """Train Random Forest model for galamsey detection"""
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        
         # Prepare training data
         X = training_data.drop(['galamsey'], axis=1)
         y = training_data['galamsey']
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import json
+from hotspot_store import HotspotStore
 
 class DemoGalamseyDetector:
     """Demo version that works without Earth Engine authentication"""
@@ -54,8 +54,8 @@ class DemoGalamseyDetector:
         
         return hotspots
     
-    def run_analysis(self):
-        """Run demo analysis with realistic results"""
+    def run_analysis(self, store=None):
+        """Run demo analysis with realistic results, appending them to store if given"""
         print("🛰️ Running demo satellite analysis...")
         print("📡 Simulating Landsat 8/9 data processing...")
         print("🌿 Simulating MODIS vegetation analysis...")
@@ -79,6 +79,9 @@ class DemoGalamseyDetector:
             }
         }
         
+        if store is not None:
+            results['summary']['run_id'] = store.append_run('demo', hotspots, results['summary'])
+        
         print(f"✅ Analysis complete! Found {len(hotspots)} potential mining sites")
         print(f"📊 High severity: {high_severity}, Medium severity: {medium_severity}")
         
@@ -87,10 +90,7 @@ class DemoGalamseyDetector:
 # Usage
 if __name__ == "__main__":
     detector = DemoGalamseyDetector()
-    results = detector.run_analysis()
-    
-    # Save results
-    with open('demo_galamsey_data.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    store = HotspotStore()
+    results = detector.run_analysis(store=store)
     
-    print("💾 Results saved to demo_galamsey_data.json")
\ No newline at end of file
+    print(f"💾 Results saved to {store.path} (run {results['summary']['run_id']})")
\ No newline at end of file
@@ -0,0 +1,154 @@
+import numpy as np
+
+# Rows scored per pass over the trees; bounds the per-chunk working arrays
+# (and keeps feature offsets, rows * n_features, within int32)
+CHUNK_ROWS = 1 << 16
+
+# Below this many rows all trees are walked together (fewer numpy calls);
+# above it, tree by tree (each tree's nodes stay in cache)
+SMALL_BATCH_ROWS = 2048
+
+
+def _float32_thresholds(thresholds):
+    """Largest float32 <= each float64 threshold
+
+    sklearn compares float32 features against float64 thresholds; for any
+    float32 x, ``x <= t`` holds exactly when ``x <= t32`` with t32 rounded
+    down, so the walk can stay in float32.
+    """
+    t32 = thresholds.astype(np.float32)
+    return np.where(t32.astype(np.float64) > thresholds, np.nextafter(t32, np.float32(-np.inf)), t32)
+
+
+class CompiledForest:
+    """A trained RandomForestClassifier flattened into contiguous node arrays
+
+    Each tree is stored breadth-first with the two children of a node next
+    to each other, so a step is ``node = first_child[node] + (x > threshold)``.
+    Leaves are their own first child with an infinite threshold, so rows
+    that reach a leaf early just stay there. predict_proba matches
+    scikit-learn's exactly.
+    """
+
+    def __init__(self, feature, threshold, first_child, value, roots, depths, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.first_child = first_child
+        self.value = value
+        self.roots = roots
+        self.depths = depths
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in [self.feature, self.threshold, self.first_child,
+                                              self.value, self.roots, self.depths])
+
+    def _proba_all_trees(self, X):
+        """Walk every tree at once over a (rows, trees) node matrix"""
+        n = len(X)
+        flat = X.ravel()
+        row_offsets = (np.arange(n, dtype=np.int64) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(int(self.depths.max())):
+            x = flat[row_offsets + self.feature[nodes]]
+            nodes = self.first_child[nodes] + (x > self.threshold[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    def _proba_by_tree(self, X):
+        """Walk one tree at a time over all rows, reusing preallocated buffers"""
+        n = len(X)
+        columns = np.ascontiguousarray(X.T).ravel()
+        rows = np.arange(n, dtype=np.int32)
+        feature_offsets = self.feature * np.int32(n)
+
+        total = np.zeros((n, len(self.classes_)), dtype=np.float64)
+        leaf_values = np.empty_like(total)
+        nodes = np.empty(n, dtype=np.int32)
+        index = np.empty(n, dtype=np.int32)
+        x = np.empty(n, dtype=np.float32)
+        threshold = np.empty(n, dtype=np.float32)
+        go_right = np.empty(n, dtype=bool)
+
+        for root, depth in zip(self.roots, self.depths):
+            nodes[:] = root
+            for _ in range(depth):
+                np.take(feature_offsets, nodes, out=index)
+                index += rows
+                np.take(columns, index, out=x)
+                np.take(self.threshold, nodes, out=threshold)
+                np.greater(x, threshold, out=go_right)
+                np.take(self.first_child, nodes, out=index)
+                np.add(index, go_right, out=nodes)
+            np.take(self.value, nodes, axis=0, out=leaf_values)
+            total += leaf_values
+
+        return total / self.n_trees
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features per row, got shape {X.shape}")
+        if len(X) <= SMALL_BATCH_ROWS:
+            return self._proba_all_trees(X)
+
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, len(X))
+            proba[start:stop] = self._proba_by_tree(X[start:stop])
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _breadth_first(tree):
+    """Node order with each node's children adjacent"""
+    order = [0]
+    for node in order:
+        if tree.children_left[node] != -1:
+            order += [tree.children_left[node], tree.children_right[node]]
+    return np.array(order)
+
+
+def compile_forest(forest):
+    """Flatten a fitted RandomForestClassifier into a CompiledForest"""
+    if getattr(forest, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    features, thresholds, first_children, values, roots, depths = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        order = _breadth_first(tree)
+        position = np.empty(tree.node_count, dtype=np.int64)
+        position[order] = np.arange(len(order))
+
+        is_leaf = tree.children_left[order] == -1
+        left = position[np.where(is_leaf, 0, tree.children_left[order])]
+        first_children.append(np.where(is_leaf, np.arange(len(order)), left) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature[order]))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+
+        value = tree.value[order, 0, :]
+        values.append(value / value.sum(axis=1, keepdims=True))
+
+        roots.append(offset)
+        depths.append(tree.max_depth)
+        offset += len(order)
+
+    return CompiledForest(
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=_float32_thresholds(np.concatenate(thresholds)),
+        first_child=np.concatenate(first_children).astype(np.int32),
+        value=np.concatenate(values).astype(np.float64),
+        roots=np.array(roots, dtype=np.int32),
+        depths=np.array(depths, dtype=np.int32),
+        classes=np.asarray(forest.classes_),
+        n_features=forest.n_features_in_
+    )
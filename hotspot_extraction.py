@@ -0,0 +1,182 @@
+import numpy as np
+from scipy import ndimage
+
+# 8-connectivity, matching reduceToVectors' default
+EIGHT_CONNECTED = np.ones((3, 3), dtype=bool)
+
+
+class _UnionFind:
+    """Growable union-find over integer component labels
+
+    The parent array doubles its capacity when full, so adding labels one
+    strip at a time costs amortised linear time overall.
+    """
+
+    def __init__(self):
+        self.parent = np.zeros(1, dtype=np.int64)
+        self.size = 1
+
+    def add(self, count):
+        start = self.size
+        self.size += count
+        if self.size > len(self.parent):
+            grown = np.empty(max(self.size, 2 * len(self.parent)), dtype=np.int64)
+            grown[:start] = self.parent[:start]
+            self.parent = grown
+        self.parent[start:self.size] = np.arange(start, self.size, dtype=np.int64)
+
+    def find(self, label):
+        root = label
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[label] != root:
+            self.parent[label], label = root, self.parent[label]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def roots(self):
+        """Root label for every label, fully compressed"""
+        parent = self.parent[:self.size].copy()
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent
+            parent = grandparent
+
+
+def _seam_pairs(above, below):
+    """Label pairs joined across a horizontal seam under 8-connectivity"""
+    pairs = []
+    for shift in (-1, 0, 1):
+        if shift < 0:
+            a, b = above[-shift:], below[:shift]
+        elif shift > 0:
+            a, b = above[:-shift], below[shift:]
+        else:
+            a, b = above, below
+        touching = (a > 0) & (b > 0)
+        pairs.append(np.stack([a[touching], b[touching]], axis=1))
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def _coord_at(coords, index):
+    """Coordinate value at (possibly fractional) pixel indices"""
+    return np.interp(index, np.arange(len(coords)), coords)
+
+
+def extract_components(mask, ndvi_change=None, bsi_change=None, min_area=100, tile_rows=512):
+    """Label connected components of a boolean mask one strip of rows at a time
+
+    ``mask`` and the optional change rasters are (lat, lon) DataArrays; only
+    one strip of each is loaded at once and labels are stitched across strip
+    seams with a union-find, so memory grows with the number of components
+    rather than the number of pixels. Returns one dict per component with at
+    least ``min_area`` pixels: centroid, bounding box, pixel count and mean
+    NDVI/BSI change.
+    """
+    n_rows, n_cols = mask.shape
+    lats = mask['lat'].values
+    lons = mask['lon'].values
+
+    forest = _UnionFind()
+    # Per-label accumulators, indexed by global label (0 is background)
+    stats = {name: [np.zeros(1)] for name in
+             ['count', 'row_sum', 'col_sum', 'ndvi_sum', 'ndvi_n', 'bsi_sum', 'bsi_n']}
+    extents = {name: [np.zeros(1, dtype=np.int64)] for name in
+               ['row_min', 'row_max', 'col_min', 'col_max']}
+
+    offset = 0
+    previous_last_row = None
+
+    for row_start in range(0, n_rows, tile_rows):
+        rows = slice(row_start, min(row_start + tile_rows, n_rows))
+        strip = np.asarray(mask.isel(lat=rows).values, dtype=bool)
+
+        labels, n_labels = ndimage.label(strip, structure=EIGHT_CONNECTED)
+        global_labels = np.where(labels > 0, labels + offset, 0)
+        forest.add(n_labels)
+
+        # Join components that continue from the strip above
+        if previous_last_row is not None and n_labels:
+            for a, b in _seam_pairs(previous_last_row, global_labels[0]):
+                forest.union(a, b)
+        previous_last_row = global_labels[-1]
+
+        if n_labels:
+            flat = labels.ravel()
+            row_idx, col_idx = np.indices(labels.shape)
+
+            stats['count'].append(np.bincount(flat, minlength=n_labels + 1)[1:].astype(float))
+            stats['row_sum'].append(np.bincount(flat, (row_idx + row_start).ravel(), n_labels + 1)[1:])
+            stats['col_sum'].append(np.bincount(flat, col_idx.ravel(), n_labels + 1)[1:])
+
+            for name, raster in [('ndvi', ndvi_change), ('bsi', bsi_change)]:
+                if raster is None:
+                    stats[f'{name}_sum'].append(np.zeros(n_labels))
+                    stats[f'{name}_n'].append(np.zeros(n_labels))
+                    continue
+                values = np.asarray(raster.isel(lat=rows).values, dtype=float).ravel()
+                valid = ~np.isnan(values)
+                stats[f'{name}_sum'].append(
+                    np.bincount(flat[valid], values[valid], n_labels + 1)[1:])
+                stats[f'{name}_n'].append(
+                    np.bincount(flat[valid], minlength=n_labels + 1)[1:].astype(float))
+
+            objects = ndimage.find_objects(labels)
+            extents['row_min'].append(np.array([s[0].start for s in objects]) + row_start)
+            extents['row_max'].append(np.array([s[0].stop - 1 for s in objects]) + row_start)
+            extents['col_min'].append(np.array([s[1].start for s in objects]))
+            extents['col_max'].append(np.array([s[1].stop - 1 for s in objects]))
+
+        offset += n_labels
+
+    if offset == 0:
+        return []
+
+    # Merge per-strip fragments onto their root component in one pass
+    roots = forest.roots()[1:]
+    stats = {name: np.concatenate(parts)[1:] for name, parts in stats.items()}
+    extents = {name: np.concatenate(parts)[1:] for name, parts in extents.items()}
+
+    unique_roots, component = np.unique(roots, return_inverse=True)
+    n_components = len(unique_roots)
+    totals = {name: np.bincount(component, values, n_components) for name, values in stats.items()}
+
+    row_min = np.full(n_components, n_rows, dtype=np.int64)
+    row_max = np.zeros(n_components, dtype=np.int64)
+    col_min = np.full(n_components, n_cols, dtype=np.int64)
+    col_max = np.zeros(n_components, dtype=np.int64)
+    np.minimum.at(row_min, component, extents['row_min'])
+    np.maximum.at(row_max, component, extents['row_max'])
+    np.minimum.at(col_min, component, extents['col_min'])
+    np.maximum.at(col_max, component, extents['col_max'])
+
+    keep = totals['count'] >= min_area
+    count = totals['count'][keep]
+
+    centroid_lat = _coord_at(lats, totals['row_sum'][keep] / count)
+    centroid_lon = _coord_at(lons, totals['col_sum'][keep] / count)
+    lat_a, lat_b = lats[row_min[keep]], lats[row_max[keep]]
+    lon_a, lon_b = lons[col_min[keep]], lons[col_max[keep]]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ndvi_mean = totals['ndvi_sum'][keep] / totals['ndvi_n'][keep]
+        bsi_mean = totals['bsi_sum'][keep] / totals['bsi_n'][keep]
+
+    order = np.argsort(-count, kind='stable')
+    return [
+        {
+            'lat': float(centroid_lat[i]),
+            'lon': float(centroid_lon[i]),
+            'bbox': [float(min(lon_a[i], lon_b[i])), float(min(lat_a[i], lat_b[i])),
+                     float(max(lon_a[i], lon_b[i])), float(max(lat_a[i], lat_b[i]))],
+            'count': int(count[i]),
+            'ndvi_change': None if np.isnan(ndvi_mean[i]) else float(ndvi_mean[i]),
+            'bsi_change': None if np.isnan(bsi_mean[i]) else float(bsi_mean[i])
+        }
+        for i in order
+    ]
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def parse_bbox(bbox):
+    """Parse 'west,south,east,north' into a list of floats"""
+    if bbox is None:
+        return None
+    coords = [float(c) for c in bbox.split(',')]
+    if len(coords) != 4:
+        raise ValueError("bbox must be 'west,south,east,north'")
+    return coords
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _chord(radius_km):
+    """Straight-line distance on the unit sphere for a great-circle distance"""
+    return 2 * np.sin(np.minimum(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+class HotspotIndex:
+    """In-memory spatial index over hotspot dicts with lat/lon keys
+
+    Bounding boxes are answered from a latitude-sorted copy of the
+    coordinates; radius and k-nearest queries use a KD-tree over unit
+    vectors, so distances are great-circle rather than planar degrees.
+    """
+
+    def __init__(self, hotspots, metadata=None):
+        self.hotspots = hotspots
+        self.metadata = metadata or {}
+        self.lat = np.array([h['lat'] for h in hotspots], dtype=float)
+        self.lon = np.array([h['lon'] for h in hotspots], dtype=float)
+
+        # scipy is only imported once an index is actually built
+        from scipy.spatial import cKDTree
+
+        self._lat_order = np.argsort(self.lat, kind='stable')
+        self._sorted_lat = self.lat[self._lat_order]
+        self._tree = cKDTree(_unit_vectors(self.lat, self.lon)) if len(hotspots) else None
+
+    def __len__(self):
+        return len(self.hotspots)
+
+    def within_bbox(self, west, south, east, north):
+        """Indices of hotspots inside a bounding box"""
+        lo = np.searchsorted(self._sorted_lat, south, side='left')
+        hi = np.searchsorted(self._sorted_lat, north, side='right')
+        candidates = self._lat_order[lo:hi]
+        lon = self.lon[candidates]
+        return np.sort(candidates[(lon >= west) & (lon <= east)])
+
+    def within_radius(self, lat, lon, radius_km):
+        """Indices of hotspots within radius_km, nearest first"""
+        if self._tree is None:
+            return np.array([], dtype=int)
+        point = _unit_vectors(lat, lon)[0]
+        indices = np.array(self._tree.query_ball_point(point, _chord(radius_km)), dtype=int)
+        distances = np.linalg.norm(self._tree.data[indices] - point, axis=1)
+        return indices[np.argsort(distances, kind='stable')]
+
+    def nearest(self, lat, lon, k, radius_km=None):
+        """Indices of the k nearest hotspots, optionally within radius_km"""
+        if self._tree is None or k <= 0:
+            return np.array([], dtype=int)
+        k = min(k, len(self.hotspots))
+        bound = _chord(radius_km) if radius_km is not None else np.inf
+        _, indices = self._tree.query(_unit_vectors(lat, lon)[0], k=k, distance_upper_bound=bound)
+        indices = np.atleast_1d(indices)
+        return indices[indices < len(self.hotspots)]
+
+    def query(self, bbox=None, lat=None, lon=None, radius_km=None, k=None):
+        """Hotspots matching a bbox, radius and/or k-nearest query"""
+        point_query = radius_km is not None or k is not None
+        if point_query and (lat is None or lon is None):
+            raise ValueError("lat and lon are required with radius_km or k")
+
+        if k is not None:
+            indices = self.nearest(lat, lon, k, radius_km)
+        elif radius_km is not None:
+            indices = self.within_radius(lat, lon, radius_km)
+        elif bbox is not None:
+            indices = self.within_bbox(*bbox)
+            bbox = None
+        else:
+            return self.hotspots
+
+        if bbox is not None:
+            west, south, east, north = bbox
+            lat_, lon_ = self.lat[indices], self.lon[indices]
+            indices = indices[(lat_ >= south) & (lat_ <= north) & (lon_ >= west) & (lon_ <= east)]
+
+        return [self.hotspots[i] for i in indices]
+
+
+class HotspotIndexCache:
+    """Holds one HotspotIndex, rebuilt only when its source version changes"""
+
+    def __init__(self):
+        self._version = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self, version, build_index):
+        """Index for version, calling build_index() to rebuild on change
+
+        A version of None means the source cannot be versioned, so the
+        index is rebuilt every time.
+        """
+        with self._lock:
+            if version is None or version != self._version or self._index is None:
+                self._index = build_index()
+                self._version = version
+            return self._index
+
+    def invalidate(self):
+        """Forget the held index, so the next get() rebuilds it"""
+        with self._lock:
+            self._index = None
+            self._version = None
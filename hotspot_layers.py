@@ -0,0 +1,95 @@
+import numpy as np
+
+# Above this many detections the map shows grid cells instead of points
+AGGREGATE_THRESHOLD = 5000
+
+# Cell sizes tried, finest first, when aggregating (degrees; 0.01 is ~1.1 km)
+CELL_SIZES = [0.01, 0.02, 0.05, 0.1, 0.25, 0.5]
+
+
+def severity_colors(severity):
+    """Marker colour per severity: red above 0.7, orange otherwise"""
+    return np.where(np.asarray(severity) > 0.7, 'red', 'orange')
+
+
+def aggregate_cells(lats, lons, severity, cell_deg):
+    """Bin detections into cell_deg grid cells, as columnar arrays
+
+    Returns the centroid, count and mean/max severity of every non-empty
+    cell, computed with one np.unique and a few bincounts.
+    """
+    lats, lons, severity = (np.asarray(a, dtype=np.float64) for a in (lats, lons, severity))
+    rows = np.floor(lats / cell_deg).astype(np.int64)
+    cols = np.floor(lons / cell_deg).astype(np.int64)
+    _, inverse = np.unique(rows * (1 << 32) + cols, return_inverse=True)
+    inverse = inverse.ravel()
+
+    count = np.bincount(inverse)
+    max_severity = np.full(len(count), -np.inf)
+    np.maximum.at(max_severity, inverse, severity)
+    return {
+        'lat': np.bincount(inverse, lats) / count,
+        'lon': np.bincount(inverse, lons) / count,
+        'count': count,
+        'severity': np.bincount(inverse, severity) / count,
+        'max_severity': max_severity
+    }
+
+
+def hotspot_cells(lats, lons, severity, max_features=AGGREGATE_THRESHOLD):
+    """Aggregate at the finest cell size in CELL_SIZES giving at most max_features cells"""
+    for cell_deg in CELL_SIZES:
+        cells = aggregate_cells(lats, lons, severity, cell_deg)
+        if len(cells['count']) <= max_features:
+            break
+    cells['cell_deg'] = cell_deg
+    return cells
+
+
+def points_geojson(lats, lons, properties):
+    """GeoJSON FeatureCollection of points from columnar arrays
+
+    ``properties`` maps names to arrays of the same length; numpy values
+    are converted to plain Python once per column, not per feature.
+    """
+    names = list(properties)
+    columns = [np.asarray(values).tolist() for values in properties.values()]
+    coordinates = np.column_stack([np.round(lons, 5), np.round(lats, 5)]).tolist()
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point},
+             'properties': dict(zip(names, values))}
+            for point, values in zip(coordinates, zip(*columns))
+        ]
+    }
+
+
+def hotspot_layer(lats, lons, severity, labels=None, threshold=AGGREGATE_THRESHOLD):
+    """GeoJSON for the hotspot map: one point per detection, or grid cells past threshold
+
+    Every feature carries its marker 'radius' and 'color', so the map only
+    has to copy properties into styles. Returns (geojson, mode) with mode
+    'points' or 'cells'.
+    """
+    severity = np.asarray(severity, dtype=np.float64)
+    if len(severity) <= threshold:
+        properties = {
+            'radius': np.round(severity * 10, 1),
+            'color': severity_colors(severity),
+            'severity': np.round(severity, 2)
+        }
+        if labels is not None:
+            properties['label'] = labels
+        return points_geojson(lats, lons, properties), 'points'
+
+    cells = hotspot_cells(lats, lons, severity, threshold)
+    properties = {
+        # Area grows with the number of detections in the cell
+        'radius': np.round(4 + 3 * np.log10(cells['count']) ** 1.5, 1),
+        'color': severity_colors(cells['severity']),
+        'count': cells['count'],
+        'severity': np.round(cells['severity'], 2),
+        'max_severity': np.round(cells['max_severity'], 2)
+    }
+    return points_geojson(cells['lat'], cells['lon'], properties), 'cells'
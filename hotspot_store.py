@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'galamsey_hotspots.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    hotspot_count INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hotspots (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    location TEXT,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    severity REAL NOT NULL,
+    region TEXT,
+    date TEXT,
+    ndvi_change REAL,
+    bsi_change REAL,
+    ndvi REAL,
+    bsi REAL,
+    ndwi REAL,
+    confidence TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_source ON runs (source, run_id);
+CREATE INDEX IF NOT EXISTS idx_hotspots_region ON hotspots (run_id, region COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_hotspots_date ON hotspots (run_id, date);
+CREATE INDEX IF NOT EXISTS idx_hotspots_severity ON hotspots (run_id, severity);
+"""
+
+HOTSPOT_COLUMNS = ['location', 'lat', 'lon', 'severity', 'region', 'date',
+                   'ndvi_change', 'bsi_change', 'ndvi', 'bsi', 'ndwi', 'confidence']
+
+
+def file_version(path):
+    """(mtime, size) of a file, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class HotspotStore:
+    """SQLite store for hotspot detections, appended one analysis run at a time"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('GALAMSEY_DB_PATH', DEFAULT_DB_PATH)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection that commits on success and always closes"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def version(self):
+        """Cheap change marker for the store: stat of the database and its WAL"""
+        return (file_version(self.path), file_version(f"{self.path}-wal"))
+
+    def append_run(self, source, hotspots, metadata=None):
+        """Store one analysis run and its hotspots, returning the run id"""
+        with self._connect() as conn:
+            return self._insert_run(conn, source, hotspots, metadata)
+
+    def _insert_run(self, conn, source, hotspots, metadata=None):
+        """Insert a run and its hotspot rows on conn, inside the caller's transaction"""
+        metadata = dict(metadata or {})
+        created_at = metadata.get('timestamp') or metadata.get('analysis_date') or datetime.now().isoformat()
+        run_date = created_at[:10]
+
+        rows = []
+        for i, hotspot in enumerate(hotspots):
+            rows.append((
+                hotspot.get('location') or f"Site_{i+1}",
+                hotspot['lat'],
+                hotspot['lon'],
+                hotspot['severity'],
+                (hotspot.get('region') or 'Unknown').title(),
+                hotspot.get('date') or run_date,
+                hotspot.get('ndvi_change'),
+                hotspot.get('bsi_change'),
+                hotspot.get('ndvi'),
+                hotspot.get('bsi'),
+                hotspot.get('ndwi'),
+                hotspot.get('confidence')
+            ))
+
+        cursor = conn.execute(
+            'INSERT INTO runs (source, created_at, hotspot_count, metadata) VALUES (?, ?, ?, ?)',
+            (source, created_at, len(rows), json.dumps(metadata))
+        )
+        run_id = cursor.lastrowid
+        conn.executemany(
+            f"INSERT INTO hotspots (run_id, {', '.join(HOTSPOT_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * len(HOTSPOT_COLUMNS))})",
+            [(run_id,) + row for row in rows]
+        )
+        return run_id
+
+    def _run_dict(self, row):
+        return {
+            'run_id': row['run_id'],
+            'source': row['source'],
+            'created_at': row['created_at'],
+            'hotspot_count': row['hotspot_count'],
+            'metadata': json.loads(row['metadata'])
+        }
+
+    def latest_run(self, source):
+        """Most recent run for a source, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT * FROM runs WHERE source = ? ORDER BY run_id DESC LIMIT 1', (source,)
+            ).fetchone()
+        return self._run_dict(row) if row else None
+
+    def runs(self, source=None, limit=20):
+        """Recent runs, newest first"""
+        query = 'SELECT * FROM runs'
+        params = []
+        if source:
+            query += ' WHERE source = ?'
+            params.append(source)
+        query += ' ORDER BY run_id DESC LIMIT ?'
+        params.append(limit)
+
+        with self._connect() as conn:
+            return [self._run_dict(row) for row in conn.execute(query, params)]
+
+    def read_hotspots(self, run_id, region=None, start_date=None, end_date=None,
+                      min_severity=None, max_severity=None):
+        """Hotspots of one run formatted for the frontend, with optional filters"""
+        query = (
+            'SELECT location, lat, lon, severity, region, date, '
+            'COALESCE(ndvi_change, ndvi, 0) AS ndvi_change, '
+            'COALESCE(bsi_change, bsi, 0) AS bsi_change, confidence '
+            'FROM hotspots WHERE run_id = ?'
+        )
+        params = [run_id]
+
+        if region:
+            query += ' AND region = ? COLLATE NOCASE'
+            params.append(region)
+        if start_date:
+            query += ' AND date >= ?'
+            params.append(start_date)
+        if end_date:
+            query += ' AND date <= ?'
+            params.append(end_date)
+        if min_severity is not None:
+            query += ' AND severity >= ?'
+            params.append(min_severity)
+        if max_severity is not None:
+            query += ' AND severity <= ?'
+            params.append(max_severity)
+        query += ' ORDER BY rowid'
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def import_json(self, path, source):
+        """Append a legacy whole-file JSON result as a run"""
+        return self.append_run(source, *_read_json_result(path))
+
+    def ensure_imported(self, path, source):
+        """Import a legacy JSON result once, if the source has no runs yet
+
+        The check and the insert share one write transaction, so several
+        processes starting together import the file only once.
+        """
+        if self.latest_run(source) is not None or not os.path.exists(path):
+            return None
+
+        hotspots, metadata = _read_json_result(path)
+        with self._connect() as conn:
+            # Take the write lock before checking, so a concurrent import waits for ours
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT 1 FROM runs WHERE source = ? LIMIT 1', (source,)).fetchone():
+                return None
+            return self._insert_run(conn, source, hotspots, metadata)
+
+
+def _read_json_result(path):
+    """(hotspots, metadata) of a legacy whole-file JSON result"""
+    with open(path, 'r') as f:
+        results = json.load(f)
+
+    metadata = {key: value for key, value in results.items() if key != 'hotspots'}
+    # Demo results keep their run metadata under 'summary'
+    metadata.update(metadata.pop('summary', {}))
+    return results.get('hotspots', []), metadata
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import legacy JSON results into the hotspot store")
+    parser.add_argument('json_path')
+    parser.add_argument('--source', required=True, choices=['demo', 'real'])
+    parser.add_argument('--db', default=None)
+    args = parser.parse_args()
+
+    run_id = HotspotStore(args.db).import_json(args.json_path, args.source)
+    print(f"💾 Imported {args.json_path} as {args.source} run {run_id}")
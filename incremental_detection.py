@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+
+from nasa_data_fetcher import NASADataFetcher
+from parallel_detection import ParallelRegionDetector, split_bbox
+from tile_renderer import GHANA_BBOX
+
+DEFAULT_MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'incremental')
+
+# Side of a detection tile in degrees (~28 km)
+TILE_DEG = 0.25
+
+# Date ranges kept per tile in the manifest; the least recently computed are dropped
+MAX_RANGES_PER_TILE = int(os.getenv('GALAMSEY_MANIFEST_RANGES', '4'))
+
+
+def ghana_tiles(tile_deg=TILE_DEG, bbox=None):
+    """Fixed grid of named tiles over Ghana; the same arguments always give the same tiles"""
+    bbox = bbox or GHANA_BBOX
+    rows = math.ceil(round((bbox[3] - bbox[1]) / tile_deg, 6))
+    cols = math.ceil(round((bbox[2] - bbox[0]) / tile_deg, 6))
+    return split_bbox(bbox, rows, cols)
+
+
+def fingerprint(scenes, params):
+    """Stable hash of a tile's input scenes and the parameters its result depends on"""
+    payload = json.dumps({'scenes': sorted(scene['id'] for scene in scenes), 'params': params}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class TileManifest:
+    """Per-tile record of the inputs behind each tile's last result, with that result
+
+    Stored as one JSON file; save() replaces it atomically through a
+    uniquely named temporary file, so a crashed run leaves the previous
+    manifest intact. Share one manifest object between concurrent runs;
+    separate objects for the same file overwrite each other's records.
+    """
+
+    def __init__(self, name='landsat_tiles', manifest_dir=None):
+        manifest_dir = manifest_dir or os.getenv('GALAMSEY_MANIFEST_DIR', DEFAULT_MANIFEST_DIR)
+        self.path = os.path.join(manifest_dir, f"{name}.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.tiles = json.load(f)['tiles']
+        except FileNotFoundError:
+            self.tiles = {}
+
+    def is_current(self, tile, tile_fingerprint):
+        entry = self.tiles.get(tile)
+        return entry is not None and entry['fingerprint'] == tile_fingerprint
+
+    def record(self, tile, tile_fingerprint, scenes, hotspots, **extra):
+        """Store a freshly computed tile result and the scenes it was computed from"""
+        with self._lock:
+            self.tiles[tile] = {
+                'fingerprint': tile_fingerprint,
+                'scenes': [scene['id'] for scene in scenes],
+                'latest_scene': max((scene['date'] for scene in scenes), default=None),
+                'computed_at': datetime.now().isoformat(),
+                'hotspots': hotspots,
+                **extra
+            }
+
+    def prune(self, prefix, keep):
+        """Keep only the ``keep`` most recently computed entries whose keys start with prefix"""
+        with self._lock:
+            keys = sorted((key for key in self.tiles if key.startswith(prefix)),
+                          key=lambda key: self.tiles[key]['computed_at'], reverse=True)
+            for key in keys[keep:]:
+                del self.tiles[key]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with self._lock:
+                with open(tmp_path, 'w') as f:
+                    json.dump({'tiles': self.tiles}, f)
+                os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class IncrementalDetector:
+    """Local change detection over a fixed tile grid, recomputing only dirty tiles
+
+    A tile is dirty when its scene inventory (or the detection parameters)
+    differs from what its cached result was computed from. Dirty tiles run
+    through ParallelRegionDetector; the rest reuse their cached hotspots.
+    Results are recorded per tile and date range, keeping the
+    MAX_RANGES_PER_TILE most recently computed ranges of each tile. Runs on
+    one detector are serialized.
+
+    Pass a long-lived ``detector`` to share its worker pool; otherwise one
+    is started on first use with ``workers`` and ``detector_kwargs`` and
+    stopped by close().
+    """
+
+    def __init__(self, manifest=None, fetcher=None, tiles=None, workers=None, detector=None,
+                 max_ranges=MAX_RANGES_PER_TILE, **detector_kwargs):
+        self.manifest = manifest or TileManifest()
+        self.fetcher = fetcher or NASADataFetcher()
+        self.tiles = tiles or ghana_tiles()
+        self.workers = workers
+        self.detector = detector
+        self.max_ranges = max_ranges
+        self.detector_kwargs = detector.detector_kwargs if detector is not None else detector_kwargs
+        self._owns_detector = detector is None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the worker pool if this detector started it"""
+        if self._owns_detector and self.detector is not None:
+            self.detector.close()
+            self.detector = None
+
+    @staticmethod
+    def entry_key(tile, start_date, end_date):
+        """Manifest key of a tile's result over one date range"""
+        return f"{tile}:{start_date}:{end_date}"
+
+    def _select(self, bbox):
+        if not bbox:
+            return self.tiles
+        return {tile: tile_bbox for tile, tile_bbox in self.tiles.items()
+                if tile_bbox[0] < bbox[2] and tile_bbox[2] > bbox[0]
+                and tile_bbox[1] < bbox[3] and tile_bbox[3] > bbox[1]}
+
+    def _plan(self, tiles, start_date, end_date, as_of, min_area):
+        """Scene inventory, fingerprint and manifest key of every tile, and the dirty ones"""
+        inventory_end = min(np.datetime64(end_date, 'D'), np.datetime64(as_of, 'D') + 1)
+        params = {'start_date': start_date, 'end_date': end_date, 'min_area': min_area, **self.detector_kwargs}
+        keys, scenes, fingerprints, dirty = {}, {}, {}, {}
+        for tile, tile_bbox in tiles.items():
+            keys[tile] = self.entry_key(tile, start_date, end_date)
+            scenes[tile] = self.fetcher.list_landsat_scenes(tile_bbox, start_date, str(inventory_end))
+            fingerprints[tile] = fingerprint(scenes[tile], {**params, 'bbox': tile_bbox})
+            if not self.manifest.is_current(keys[tile], fingerprints[tile]):
+                dirty[tile] = tile_bbox
+        return keys, scenes, fingerprints, dirty
+
+    def pending(self, start_date, end_date, as_of=None, min_area=100, bbox=None):
+        """Names of the tiles a run with these arguments would recompute
+
+        Only lists scenes, so callers can decide whether a run is cheap
+        enough to wait for.
+        """
+        as_of = as_of or date.today().isoformat()
+        return sorted(self._plan(self._select(bbox), start_date, end_date, as_of, min_area)[3])
+
+    def run(self, start_date, end_date, as_of=None, min_area=100, bbox=None, store=None, progress=None):
+        """Detect changes over [start_date, end_date) with the scenes available as of as_of
+
+        as_of (default: today) caps the scene inventory, so re-running as
+        new scenes arrive only recomputes the tiles under them. bbox limits
+        the run to intersecting tiles. Returns the merged hotspots and how
+        many tiles were skipped, recomputed or had no scenes.
+        """
+        started = time.perf_counter()
+        as_of = as_of or date.today().isoformat()
+        tiles = self._select(bbox)
+
+        with self._lock:
+            keys, scenes, fingerprints, dirty = self._plan(tiles, start_date, end_date, as_of, min_area)
+
+            # Tiles without scenes have nothing to detect
+            empty = [tile for tile in dirty if not scenes[tile]]
+            for tile in empty:
+                self.manifest.record(keys[tile], fingerprints[tile], [], [], image_count=0, mining_pixels=0)
+            to_detect = {tile: tile_bbox for tile, tile_bbox in dirty.items() if scenes[tile]}
+
+            if progress:
+                progress(0, len(to_detect))
+            if to_detect:
+                if self.detector is None:
+                    self.detector = ParallelRegionDetector(workers=self.workers, use_cache=False,
+                                                           **self.detector_kwargs)
+                scene_dates = {tile: [scene['date'] for scene in scenes[tile]] for tile in to_detect}
+                # Only hotspots and counts are kept, and each tile stack is read once per new scene
+                results = self.detector.detect_regions(to_detect, start_date, end_date, min_area, scene_dates,
+                                                       arrays=False, cached=False)
+                for tile, result in results.items():
+                    self.manifest.record(keys[tile], fingerprints[tile], scenes[tile], result['hotspots'],
+                                         image_count=result['image_count'], mining_pixels=result['mining_pixels'])
+            if dirty:
+                for tile in dirty:
+                    self.manifest.prune(f"{tile}:", self.max_ranges)
+                self.manifest.save()
+            if progress:
+                progress(len(to_detect), len(to_detect))
+
+            hotspots = [hotspot for tile in tiles for hotspot in self.manifest.tiles[keys[tile]]['hotspots']]
+        results = {
+            'hotspots': hotspots,
+            'tiles': {
+                'total': len(tiles),
+                'skipped': len(tiles) - len(dirty),
+                'recomputed': len(to_detect),
+                'empty': len(empty)
+            },
+            'recomputed_tiles': sorted(to_detect),
+            'as_of': as_of,
+            'seconds': round(time.perf_counter() - started, 2),
+            'timestamp': datetime.now().isoformat()
+        }
+        if store is not None:
+            metadata = {key: value for key, value in results.items() if key != 'hotspots'}
+            results['run_id'] = store.append_run('local', hotspots, metadata)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental tile-based change detection over Ghana")
+    parser.add_argument('--start-date', default='2024-01-01')
+    parser.add_argument('--end-date', default='2025-01-01')
+    parser.add_argument('--as-of', default=None, help="Only use scenes acquired up to this date (default: today)")
+    parser.add_argument('--min-area', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with IncrementalDetector(workers=args.workers) as detector:
+        results = detector.run(args.start_date, args.end_date, args.as_of, args.min_area)
+    tiles = results['tiles']
+    print(f"🧩 {tiles['total']} tiles: {tiles['recomputed']} recomputed, {tiles['skipped']} skipped, "
+          f"{tiles['empty']} without scenes; {len(results['hotspots'])} hotspots in {results['seconds']} s")
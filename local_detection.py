@@ -0,0 +1,128 @@
+import numpy as np
+import xarray as xr
+from datetime import datetime
+
+from hotspot_extraction import extract_components
+from raster_indices import BAND_MAPS, CHUNK_PIXELS, compute_indices
+
+INDEX_BANDS = ['NDVI', 'NDWI', 'BSI']
+
+
+def nan_median(stack, axis=0):
+    """Median along axis ignoring NaNs, NaN where every value is missing"""
+    ordered = np.sort(stack, axis=axis)  # NaNs sort to the end
+    valid = np.sum(~np.isnan(ordered), axis=axis, keepdims=True)
+
+    # Middle pair of the valid values (the same element for odd counts);
+    # all-NaN pixels pick index 0 and stay NaN
+    lo = np.take_along_axis(ordered, np.maximum(valid - 1, 0) // 2, axis=axis)
+    hi = np.take_along_axis(ordered, valid // 2, axis=axis)
+
+    return np.squeeze((lo + hi) / 2, axis=axis)
+
+
+class LocalGalamseyDetector:
+    """Offline change detection over local xarray time stacks (no Earth Engine)"""
+
+    def __init__(self, sensor='landsat', ndvi_threshold=-0.2, bsi_threshold=0.15, max_cloud_cover=20):
+        if sensor not in BAND_MAPS:
+            raise ValueError(f"Unknown sensor: {sensor}")
+        self.sensor = sensor
+        self.ndvi_threshold = ndvi_threshold
+        self.bsi_threshold = bsi_threshold
+        self.max_cloud_cover = max_cloud_cover
+
+    def _select_scenes(self, stack, start_date, end_date):
+        """Scenes in [start_date, end_date) passing the cloud filter"""
+        times = stack['time'].values.astype('datetime64[D]')
+        keep = (times >= np.datetime64(start_date, 'D')) & (times < np.datetime64(end_date, 'D'))
+
+        if 'CLOUD_COVER' in stack.coords or 'CLOUD_COVER' in stack.data_vars:
+            keep &= stack['CLOUD_COVER'].values < self.max_cloud_cover
+
+        return np.flatnonzero(keep), times
+
+    def _index_chunk(self, stack, scenes, rows):
+        """NDVI, NDWI and BSI for the selected scenes over a block of rows"""
+        def block(name):
+            return stack[name].isel(time=scenes, lat=rows).transpose('time', 'lat', 'lon').values
+
+        if all(band in stack for band in INDEX_BANDS):
+            return [block(band).astype(np.float32) for band in INDEX_BANDS]
+
+        bands = BAND_MAPS[self.sensor]
+        arrays = [block(bands[role]) for role in ['blue', 'green', 'red', 'nir', 'swir1']]
+        return list(compute_indices(*arrays))
+
+    def detect_changes(self, stack, start_date, end_date, chunk_rows=None):
+        """Detect land cover changes indicating potential mining
+
+        Mirrors GalamseyDetector.detect_changes: scenes are split at the
+        midpoint of the date range, reduced to nan-aware median composites
+        and the NDVI/BSI deltas are thresholded. ``stack`` is a Dataset with
+        (time, lat, lon) band variables, or precomputed NDVI/NDWI/BSI.
+        """
+        scenes, times = self._select_scenes(stack, start_date, end_date)
+
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        mid_date = start + (datetime.strptime(end_date, '%Y-%m-%d') - start) / 2
+        before_mask = times[scenes] < np.datetime64(mid_date.strftime('%Y-%m-%d'), 'D')
+        before_scenes = scenes[before_mask]
+        after_scenes = scenes[~before_mask]
+
+        n_rows, n_cols = stack.sizes['lat'], stack.sizes['lon']
+        if chunk_rows is None:
+            chunk_rows = max(1, CHUNK_PIXELS // max(n_cols * max(len(scenes), 1), 1))
+
+        before = np.full((len(INDEX_BANDS), n_rows, n_cols), np.nan, dtype=np.float32)
+        after = np.full((len(INDEX_BANDS), n_rows, n_cols), np.nan, dtype=np.float32)
+
+        # Indices and composites are computed one block of rows at a time
+        for row_start in range(0, n_rows, chunk_rows):
+            rows = slice(row_start, min(row_start + chunk_rows, n_rows))
+            for scene_ids, composite in [(before_scenes, before), (after_scenes, after)]:
+                if len(scene_ids) == 0:
+                    continue
+                indices = self._index_chunk(stack, scene_ids, rows)
+                for band, values in enumerate(indices):
+                    composite[band, rows] = nan_median(values, axis=0)
+
+        ndvi_change = after[0] - before[0]
+        bsi_change = after[2] - before[2]
+
+        # Mining detection criteria:
+        # - Significant NDVI decrease (vegetation loss)
+        # - Significant BSI increase (soil exposure)
+        mining_mask = (ndvi_change < self.ndvi_threshold) & (bsi_change > self.bsi_threshold)
+
+        coords = {'lat': stack['lat'].values, 'lon': stack['lon'].values}
+        dims = ['lat', 'lon']
+
+        def composite_dataset(composite):
+            return xr.Dataset(
+                {band: (dims, composite[i]) for i, band in enumerate(INDEX_BANDS)},
+                coords=coords
+            )
+
+        return {
+            'ndvi_change': xr.DataArray(ndvi_change, dims=dims, coords=coords, name='NDVI_change'),
+            'bsi_change': xr.DataArray(bsi_change, dims=dims, coords=coords, name='BSI_change'),
+            'mining_mask': xr.DataArray(mining_mask, dims=dims, coords=coords, name='mining_mask'),
+            'before_image': composite_dataset(before),
+            'after_image': composite_dataset(after)
+        }
+
+    def get_hotspots(self, detection_result, min_area=100, tile_rows=512):
+        """Extract hotspot components from detection results
+
+        Local replacement for reduceToVectors: connected components of the
+        mining mask with at least ``min_area`` pixels, each with centroid,
+        bounding box, pixel count and mean NDVI/BSI change.
+        """
+        return extract_components(
+            detection_result['mining_mask'],
+            detection_result.get('ndvi_change'),
+            detection_result.get('bsi_change'),
+            min_area=min_area,
+            tile_rows=tile_rows
+        )
@@ -1,8 +1,8 @@
-import tensorflow as tf
+import os
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix
 import joblib
+from raster_inference import predict_raster
+from forest_compiler import CompiledForest, compile_forest
 
 class GalamseyMLModel:
     def __init__(self):
@@ -11,6 +11,9 @@ class GalamseyMLModel:
         
     def create_cnn_model(self, input_shape=(64, 64, 8)):
         """Create CNN model for satellite image classification"""
+        # TensorFlow and scikit-learn are imported on first use to keep API start-up fast
+        import tensorflow as tf
+        
         model = tf.keras.Sequential([
             tf.keras.layers.Conv2D(32, (3, 3), activation='relu', input_shape=input_shape),
             tf.keras.layers.MaxPooling2D((2, 2)),
@@ -34,6 +37,8 @@ class GalamseyMLModel:
     
     def train_random_forest(self, X_train, y_train):
         """Train Random Forest on tabular features"""
+        from sklearn.ensemble import RandomForestClassifier
+        
         self.rf_model = RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
@@ -44,7 +49,19 @@ class GalamseyMLModel:
         return self.rf_model
     
     def train_cnn(self, X_train, y_train, X_val, y_val, epochs=50):
-        """Train CNN on satellite image patches"""
+        """Train CNN on satellite image patches
+        
+        X_train and X_val may also be batched tf.data datasets of
+        (patches, labels), with y_train and y_val None.
+        """
+        import tensorflow as tf
+        
+        callbacks = [tf.keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True)]
+        if isinstance(X_train, tf.data.Dataset):
+            if self.cnn_model is None:
+                self.create_cnn_model(tuple(X_train.element_spec[0].shape[1:]))
+            return self.cnn_model.fit(X_train, validation_data=X_val, epochs=epochs, callbacks=callbacks)
+        
         if self.cnn_model is None:
             self.create_cnn_model(X_train.shape[1:])
         
@@ -53,13 +70,35 @@ class GalamseyMLModel:
             validation_data=(X_val, y_val),
             epochs=epochs,
             batch_size=32,
-            callbacks=[
-                tf.keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True)
-            ]
+            callbacks=callbacks
         )
         
         return history
     
+    def train_from_dataset(self, dataset_dir, epochs=50, batch_size=32, validation_shards=1, cache=None,
+                           train_cnn=True):
+        """Train both models from a sharded dataset (see training_dataset.build_dataset)
+        
+        The forest is fit on the tabular features only, which are read
+        without the patches; the CNN streams patches through tf.data, so
+        the dataset never has to fit in memory.
+        """
+        from training_dataset import load_features, make_tf_dataset, split_shards
+        
+        train_paths, val_paths = split_shards(dataset_dir, validation_shards)
+        X, y = load_features(train_paths)
+        self.train_random_forest(X, y)
+        
+        if not train_cnn:
+            return None
+        return self.train_cnn(
+            make_tf_dataset(train_paths, batch_size=batch_size, cache=cache),
+            None,
+            make_tf_dataset(val_paths, batch_size=batch_size, training=False),
+            None,
+            epochs=epochs
+        )
+    
     def predict_galamsey(self, features, image_patches=None):
         """Ensemble prediction using both RF and CNN"""
         predictions = []
@@ -82,22 +121,60 @@ class GalamseyMLModel:
         
         return final_pred
     
-    def save_models(self, rf_path='models/rf_model.pkl', cnn_path='models/cnn_model.h5'):
-        """Save trained models"""
+    def predict_probability_map(self, cube, stride=32, tile_size=1024, batch_size=256, out=None):
+        """Galamsey probability for every pixel of a (height, width, channels) feature cube
+        
+        Overlapping CNN patches are scored in batches and blended tile by
+        tile (see raster_inference.predict_raster).
+        """
+        if self.cnn_model is None:
+            raise ValueError("No CNN model loaded")
+        
+        patch_size = self.cnn_model.input_shape[1]
+        return predict_raster(
+            cube,
+            lambda batch: self.cnn_model.predict(batch, batch_size=batch_size, verbose=0),
+            patch_size=patch_size,
+            stride=stride,
+            tile_size=tile_size,
+            batch_size=batch_size,
+            out=out
+        )
+    
+    def compile_random_forest(self):
+        """Swap the sklearn forest for its array-compiled equivalent (same probabilities)
+        
+        Worth it for small batches; scikit-learn is faster from about 10^4 rows.
+        """
+        if self.rf_model is not None and not isinstance(self.rf_model, CompiledForest):
+            self.rf_model = compile_forest(self.rf_model)
+        return self.rf_model
+    
+    def save_models(self, rf_path='models/rf_model.pkl', cnn_path='models/cnn_model.h5', compiled=False):
+        """Save trained models
+        
+        With compiled=True the forest is stored as a CompiledForest: plain
+        node arrays, smaller than the pickled sklearn model and loadable by
+        load_models without scikit-learn's tree objects.
+        """
         if self.rf_model:
-            joblib.dump(self.rf_model, rf_path)
+            rf_model = compile_forest(self.rf_model) if compiled and not isinstance(self.rf_model, CompiledForest) else self.rf_model
+            joblib.dump(rf_model, rf_path)
         
         if self.cnn_model:
             self.cnn_model.save(cnn_path)
     
     def load_models(self, rf_path='models/rf_model.pkl', cnn_path='models/cnn_model.h5'):
-        """Load pre-trained models"""
+        """Load pre-trained models (the forest may be sklearn or compiled)"""
         try:
             self.rf_model = joblib.load(rf_path)
         except:
             print("RF model not found")
         
         try:
+            if not os.path.exists(cnn_path):
+                raise FileNotFoundError(cnn_path)
+            import tensorflow as tf
             self.cnn_model = tf.keras.models.load_model(cnn_path)
         except:
             print("CNN model not found")
@@ -0,0 +1,243 @@
+import argparse
+import os
+import re
+import resource
+import threading
+import time
+
+import joblib
+
+from forest_compiler import CompiledForest, compile_forest
+from ml_model import GalamseyMLModel
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+RF_FILE = 'rf_model.pkl'
+CNN_FILE = 'cnn_model.h5'
+CURRENT_FILE = 'CURRENT'
+
+
+def process_memory():
+    """Resident memory of this process in MB
+
+    rss_file counts pages mapped from files (e.g. memory-mapped model
+    arrays), which other processes mapping the same file share; pss splits
+    shared pages between those processes. Falls back to peak RSS where
+    /proc is not available.
+    """
+    fields = {}
+    for path in ['/proc/self/status', '/proc/self/smaps_rollup']:
+        try:
+            with open(path) as f:
+                for line in f:
+                    match = re.match(r'(VmRSS|RssAnon|RssFile|RssShmem|Pss):\s+(\d+) kB', line)
+                    if match:
+                        fields[match.group(1)] = int(match.group(2)) / 1024
+        except OSError:
+            pass
+
+    if 'VmRSS' not in fields:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {'pid': os.getpid(), 'rss_peak': round(peak, 1)}
+
+    return {
+        'pid': os.getpid(),
+        'rss': round(fields['VmRSS'], 1),
+        'rss_anon': round(fields.get('RssAnon', 0), 1),
+        'rss_file': round(fields.get('RssFile', 0), 1),
+        'pss': round(fields['Pss'], 1) if 'Pss' in fields else None
+    }
+
+
+class ModelRegistry:
+    """Versioned models shared between API worker processes
+
+    Each published version lives in ``<model_dir>/versions/<version>/``,
+    uncompressed, and every worker loads it with ``joblib.load(mmap_mode='r')``.
+    A forest published compiled is then shared: its node arrays are mapped
+    from the same file and the OS keeps one copy of their pages for all
+    workers. A scikit-learn forest is copied into each worker, but scores
+    large batches faster.
+    The CURRENT file names the active version; publish() and activate()
+    replace it atomically, and each worker swaps to the new version on its
+    next current() call, without a restart. Requests already holding the
+    old model finish on it.
+
+    With no published version, the legacy ``<model_dir>/rf_model.pkl`` and
+    ``cnn_model.h5`` are loaded instead. CNN weights are loaded per process
+    (Keras models cannot be memory-mapped).
+    """
+
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir or os.getenv('GALAMSEY_MODEL_DIR', DEFAULT_MODEL_DIR)
+        self.versions_dir = os.path.join(self.model_dir, 'versions')
+        self.current_path = os.path.join(self.model_dir, CURRENT_FILE)
+        self._lock = threading.Lock()
+        self._model = None
+        self._version = None
+        self._pointer = None
+        self.last_load = None
+
+    def _read_pointer(self):
+        """(mtime, version) of the CURRENT file, or None"""
+        try:
+            stat = os.stat(self.current_path)
+            with open(self.current_path) as f:
+                return (stat.st_mtime_ns, f.read().strip() or None)
+        except OSError:
+            return None
+
+    def active_version(self):
+        pointer = self._read_pointer()
+        return pointer[1] if pointer else None
+
+    def versions(self):
+        """Published versions: complete version directories holding at least one model file
+
+        Leftover ``<version>.tmp`` directories from an interrupted publish
+        are not versions.
+        """
+        try:
+            names = os.listdir(self.versions_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            name for name in names
+            if not name.endswith('.tmp') and any(
+                os.path.exists(os.path.join(self.version_dir(name), filename)) for filename in (RF_FILE, CNN_FILE)
+            )
+        )
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def load(self, version=None):
+        """A GalamseyMLModel for a version (None: legacy model files), forest memory-mapped"""
+        directory = self.version_dir(version) if version else self.model_dir
+        rf_path = os.path.join(directory, RF_FILE)
+        cnn_path = os.path.join(directory, CNN_FILE)
+        if version and not os.path.exists(rf_path):
+            raise ValueError(f"Unknown model version: {version}")
+
+        before = process_memory()
+        start = time.perf_counter()
+        model = GalamseyMLModel()
+        if os.path.exists(rf_path):
+            # Only compiled forests are shared; sklearn trees copy their nodes on unpickle
+            model.rf_model = joblib.load(rf_path, mmap_mode='r')
+        else:
+            print("RF model not found")
+        if os.path.exists(cnn_path):
+            import tensorflow as tf
+            model.cnn_model = tf.keras.models.load_model(cnn_path)
+
+        self.last_load = {
+            'version': version,
+            'shared': isinstance(model.rf_model, CompiledForest),
+            'seconds': round(time.perf_counter() - start, 3),
+            'memory_before_mb': before,
+            'memory_after_mb': process_memory()
+        }
+        return model
+
+    def current(self):
+        """Model for the active version, reloaded when CURRENT changes"""
+        pointer = self._read_pointer()
+        if self._model is None or pointer != self._pointer:
+            with self._lock:
+                if self._model is None or pointer != self._pointer:
+                    version = pointer[1] if pointer else None
+                    if self._model is None or version != self._version:
+                        model = self.load(version)
+                        self._model, self._version = model, version
+                    self._pointer = pointer
+        return self._model
+
+    @property
+    def version(self):
+        return self._version
+
+    def _write_pointer(self, version):
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_path = f"{self.current_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_path)
+
+    def publish(self, model, version=None, activate=True, compiled=False):
+        """Store a trained GalamseyMLModel as a new version, by default making it active
+
+        The version directory is written under a temporary name and renamed
+        into place, so workers never see a partial version. With
+        compiled=True the forest is stored as a CompiledForest, shared by
+        all workers; it is faster than scikit-learn for small batches but
+        slower from about 10^4 rows, so leave it off for bulk per-pixel
+        scoring.
+        """
+        version = version or time.strftime('%Y%m%d-%H%M%S')
+        final_dir = self.version_dir(version)
+        if os.path.exists(final_dir):
+            raise ValueError(f"Model version {version} already exists")
+
+        tmp_dir = f"{final_dir}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        if model.rf_model is not None:
+            rf_model = model.rf_model
+            if compiled and not isinstance(rf_model, CompiledForest):
+                rf_model = compile_forest(rf_model)
+            # Uncompressed, so the arrays can be memory-mapped on load
+            joblib.dump(rf_model, os.path.join(tmp_dir, RF_FILE))
+        if model.cnn_model is not None:
+            model.cnn_model.save(os.path.join(tmp_dir, CNN_FILE))
+        os.replace(tmp_dir, final_dir)
+
+        if activate:
+            self._write_pointer(version)
+        return version
+
+    def activate(self, version):
+        """Make an existing version active (also used to roll back)"""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        self._write_pointer(version)
+
+    def status(self):
+        return {
+            'active_version': self.active_version(),
+            'loaded_version': self._version,
+            'versions': self.versions(),
+            'last_load': self.last_load,
+            'memory_mb': process_memory()
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish, list and activate shared model versions")
+    parser.add_argument('--model-dir', default=None)
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="Publish model files as a new version")
+    publish.add_argument('--rf', default=None, help="Random Forest (sklearn or compiled) joblib file")
+    publish.add_argument('--cnn', default=None, help="Keras CNN model file")
+    publish.add_argument('--version', default=None)
+    publish.add_argument('--no-activate', action='store_true')
+    publish.add_argument('--compiled', action='store_true',
+                         help="Store the forest compiled, shared by all workers (faster for small batches)")
+    activate = commands.add_parser('activate', help="Make a published version active")
+    activate.add_argument('version')
+    commands.add_parser('list', help="List published versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.model_dir)
+    if args.command == 'publish':
+        model = GalamseyMLModel()
+        model.load_models(rf_path=args.rf or os.path.join(registry.model_dir, RF_FILE),
+                          cnn_path=args.cnn or os.path.join(registry.model_dir, CNN_FILE))
+        version = registry.publish(model, args.version, activate=not args.no_activate, compiled=args.compiled)
+        print(f"📦 Published model version {version}" + ("" if args.no_activate else " (active)"))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"✅ Model version {args.version} is now active")
+    else:
+        active = registry.active_version()
+        for version in registry.versions():
+            print(f"{'*' if version == active else ' '} {version}")
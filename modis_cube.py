@@ -0,0 +1,263 @@
+import argparse
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import netCDF4
+import numpy as np
+import xarray as xr
+
+from nasa_data_fetcher import NASADataFetcher
+from tile_renderer import GHANA_BBOX
+from trend_analysis import TREND_VARIABLES, compute_trends, decline_mask
+
+DEFAULT_CUBE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'modis', 'ndvi_cube.nc')
+
+TIME_UNITS = 'days since 1970-01-01'
+
+# Raw composites read per trend window (time steps x rows x cols, float32): bounds memory per worker
+WINDOW_BYTES = 64 << 20
+
+
+def composite_dates(start_date, end_date):
+    """MOD13 16-day composite start dates (day 1, 17, 33, ... of each year) within [start, end]"""
+    start, end = np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D')
+    dates = []
+    for year in range(start.astype(object).year, end.astype(object).year + 1):
+        first = np.datetime64(f"{year}-01-01", 'D')
+        year_dates = first + np.arange(0, 366, 16)
+        dates.append(year_dates[year_dates < np.datetime64(f"{year + 1}-01-01", 'D')])
+    dates = np.concatenate(dates) if dates else np.array([], dtype='datetime64[D]')
+    return dates[(dates >= start) & (dates <= end)]
+
+
+def _file_identity(path):
+    """(inode, mtime, size) of the cube file, or None if it doesn't exist yet"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def trend_windows(rows, cols, time_steps, max_rows=256, window_bytes=WINDOW_BYTES):
+    """(r0, r1, c0, c1) windows covering the grid, each reading at most window_bytes of float32 composites
+
+    Windows span full rows when they fit, up to max_rows of them; when a
+    single row is too large, rows are split into column ranges.
+    """
+    row_bytes = time_steps * cols * 4
+    if row_bytes <= window_bytes:
+        height = max(1, min(max_rows, window_bytes // row_bytes))
+        return [(r0, min(r0 + height, rows), 0, cols) for r0 in range(0, rows, height)]
+    width = max(1, window_bytes // (time_steps * 4))
+    return [(r0, r0 + 1, c0, min(c0 + width, cols)) for r0 in range(rows) for c0 in range(0, cols, width)]
+
+
+def _trend_strip(path, t0, t1, window, times, block_size, group=1):
+    """Worker: trend maps for one (r0, r1, c0, c1) window over time steps t0:t1 of the cube file
+
+    With group > 1, consecutive composites are averaged first (len(times)
+    is then the number of groups).
+    """
+    r0, r1, c0, c1 = window
+    with netCDF4.Dataset(path) as nc:
+        nc.set_auto_mask(False)
+        slab = nc['NDVI'][t0:t0 + len(times) * group, r0:r1, c0:c1]
+    if group > 1:
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            slab = np.nanmean(slab.reshape(len(times), group, *slab.shape[1:]), axis=1)
+    return window, compute_trends(slab, times, block_size)
+
+
+class ModisCube:
+    """Append-only MODIS NDVI time cube in one chunked NetCDF file
+
+    The time dimension is unlimited, so update() only fetches and appends
+    the 16-day composites newer than the last one stored. Each composite
+    is one (1, chunk, chunk)-chunked slab, so an append touches nothing
+    already written. trends() reads the cube window by window. update()
+    and trends() hold the cube's lock, so in one process the file is never
+    read while a composite is being appended.
+    """
+
+    def __init__(self, path=None, bbox=None, fetcher=None, chunk_size=256):
+        self.path = path or os.getenv('GALAMSEY_MODIS_CUBE', DEFAULT_CUBE_PATH)
+        self.bbox = bbox or GHANA_BBOX
+        self.fetcher = fetcher or NASADataFetcher()
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._dates = None
+        self._dates_identity = None
+
+    def _load_dates(self):
+        """Re-read the stored dates; the caller holds the lock"""
+        identity = _file_identity(self.path)
+        if identity is None:
+            dates = np.array([], dtype='datetime64[D]')
+        else:
+            with netCDF4.Dataset(self.path) as nc:
+                dates = np.datetime64('1970-01-01', 'D') + nc['time'][:].astype(np.int64)
+        self._dates, self._dates_identity = dates, identity
+        return dates
+
+    def dates(self):
+        """Composite dates stored so far (datetime64[D])
+
+        Kept in memory and re-read when the file changes. While an update or
+        trend computation holds the cube, the last dates read are returned
+        instead of waiting for it.
+        """
+        if self._dates is None or _file_identity(self.path) != self._dates_identity:
+            if self._lock.acquire(blocking=self._dates is None):
+                try:
+                    return self._load_dates()
+                finally:
+                    self._lock.release()
+        return self._dates
+
+    def _create(self, lats, lons):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with netCDF4.Dataset(tmp_path, 'w') as nc:
+            nc.createDimension('time', None)
+            nc.createDimension('lat', len(lats))
+            nc.createDimension('lon', len(lons))
+            time_var = nc.createVariable('time', 'i4', ('time',))
+            time_var.units = TIME_UNITS
+            time_var.calendar = 'standard'
+            nc.createVariable('lat', 'f8', ('lat',))[:] = lats
+            nc.createVariable('lon', 'f8', ('lon',))[:] = lons
+            nc.createVariable(
+                'NDVI', 'f4', ('time', 'lat', 'lon'), fill_value=np.float32(np.nan),
+                chunksizes=(1, min(self.chunk_size, len(lats)), min(self.chunk_size, len(lons)))
+            )
+            nc.bbox = self.bbox
+        # Only a complete, empty cube ever appears at self.path
+        os.replace(tmp_path, self.path)
+
+    def update(self, end_date=None, start_date='2020-01-01', progress=None):
+        """Fetch and append every composite after the last stored one, up to end_date
+
+        Returns the dates appended. start_date only matters for an empty cube.
+        """
+        end_date = end_date or date.today().isoformat()
+        with self._lock:
+            stored = self._load_dates()
+            pending = composite_dates(start_date, end_date)
+            if len(stored):
+                pending = pending[pending > stored[-1]]
+
+            for i, composite in enumerate(pending):
+                day = str(composite)
+                # Appended once, so kept out of the raster cache
+                data = self.fetcher.get_modis_ndvi(self.bbox, day, day, cached=False)
+                if not os.path.exists(self.path):
+                    self._create(data['lat'].values, data['lon'].values)
+                ndvi = np.asarray(data['NDVI'].isel(time=0).values, dtype=np.float32)
+
+                with netCDF4.Dataset(self.path, 'a') as nc:
+                    if ndvi.shape != nc['NDVI'].shape[1:]:
+                        raise ValueError(f"Composite {day} has grid {ndvi.shape}, cube has {nc['NDVI'].shape[1:]}")
+                    index = len(nc.dimensions['time'])
+                    # Data first, then the time stamp that makes the step visible
+                    nc['NDVI'][index] = ndvi
+                    nc['time'][index] = (composite - np.datetime64('1970-01-01', 'D')).astype(np.int64)
+                self._load_dates()
+                if progress:
+                    progress(i + 1, len(pending))
+
+            return [str(d) for d in pending]
+
+    def open(self):
+        """The cube as a lazily loaded xarray Dataset"""
+        return xr.open_dataset(self.path, cache=False)
+
+    def trends(self, start_date=None, end_date=None, workers=1, block_size=256, min_decline=0.01, max_p=0.05,
+               group=1):
+        """Per-pixel NDVI trend maps over the stored composites in [start, end]
+
+        Returns a Dataset of OLS and Theil-Sen slopes (NDVI per year),
+        Mann-Kendall z and p, observation counts and the significant
+        ``decline`` mask. Windows of at most WINDOW_BYTES of composites are
+        spread over ``workers`` processes; ``block_size`` caps their height.
+
+        Theil-Sen and Mann-Kendall cost grows with the square of the number
+        of time steps; ``group`` averages that many consecutive composites
+        first (23 gives annual means, which also removes the seasonal cycle).
+        """
+        with self._lock:
+            return self._trends(start_date, end_date, workers, block_size, min_decline, max_p, group)
+
+    def _trends(self, start_date, end_date, workers, block_size, min_decline, max_p, group):
+        times = self._load_dates()
+        selected = np.ones(len(times), dtype=bool)
+        if start_date:
+            selected &= times >= np.datetime64(start_date, 'D')
+        if end_date:
+            selected &= times <= np.datetime64(end_date, 'D')
+        if selected.sum() < 3:
+            raise ValueError("At least 3 composites are needed for trends")
+        t0, t1 = np.flatnonzero(selected)[[0, -1]]
+        t1 += 1
+        # Each group is stamped with its mean date; a trailing partial group is left out
+        n_steps = (t1 - t0) // group
+        if n_steps < 3:
+            raise ValueError("At least 3 time steps are needed for trends")
+        days = (times[t0:t0 + n_steps * group] - np.datetime64('1970-01-01', 'D')).astype(np.int64)
+        times = np.datetime64('1970-01-01', 'D') + days.reshape(n_steps, group).mean(axis=1).round().astype(np.int64)
+
+        with netCDF4.Dataset(self.path) as nc:
+            lats, lons = nc['lat'][:], nc['lon'][:]
+        rows = len(lats)
+        out = {name: np.empty((rows, len(lons)), dtype=np.float32) for name in TREND_VARIABLES}
+        windows = trend_windows(rows, len(lons), n_steps * group, block_size)
+
+        def store(result):
+            (r0, r1, c0, c1), strip = result
+            for name, values in strip.items():
+                out[name][r0:r1, c0:c1] = values
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_trend_strip, self.path, t0, t1, window, times, block_size, group)
+                           for window in windows]
+                for future in futures:
+                    store(future.result())
+        else:
+            for window in windows:
+                store(_trend_strip(self.path, t0, t1, window, times, block_size, group))
+
+        trends = xr.Dataset(
+            {name: (['lat', 'lon'], values) for name, values in out.items()},
+            coords={'lat': lats, 'lon': lons},
+            attrs={'start_date': str(times[0]), 'end_date': str(times[-1]), 'time_steps': len(times),
+                   'composites_per_step': group}
+        )
+        trends['decline'] = (['lat', 'lon'], decline_mask(out, min_decline, max_p))
+        return trends
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append new MODIS composites to the NDVI cube and map trends")
+    parser.add_argument('--path', default=None)
+    parser.add_argument('--start-date', default='2020-01-01', help="First composite for an empty cube")
+    parser.add_argument('--end-date', default=None)
+    parser.add_argument('--trends', action='store_true', help="Also compute the trend maps")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--group', type=int, default=1, help="Composites averaged per trend time step")
+    args = parser.parse_args()
+
+    cube = ModisCube(args.path)
+    added = cube.update(args.end_date, args.start_date)
+    print(f"🌿 Appended {len(added)} composites ({len(cube.dates())} stored) to {cube.path}")
+
+    if args.trends:
+        start = time.perf_counter()
+        trends = cube.trends(workers=args.workers, group=args.group)
+        print(f"📉 Trends over {trends.attrs['time_steps']} time steps in {time.perf_counter() - start:.1f} s: "
+              f"{float(trends['decline'].mean()) * 100:.2f}% of pixels in significant decline")
@@ -1,12 +1,63 @@
 import requests
 import xarray as xr
 import numpy as np
-from datetime import datetime, timedelta
 import os
+from raster_indices import BAND_MAPS, compute_indices
+from raster_pyramid import build_overviews, pick_level
+
+# Approximate WRS-2 layout: ground-track paths about 1.55 degrees apart at
+# Ghana's latitude, numbered westward from path 192 (eastern Ghana)
+LANDSAT_PATH_DEG = 1.55
+LANDSAT_EAST_PATH = (192, 1.2)
+# Landsat 8 and 9 together revisit a path every 8 days; adjacent paths are
+# acquired 7 days apart
+LANDSAT_REVISIT_DAYS = 8
+
+
+def landsat_path(lon):
+    """WRS-2 path covering a longitude (approximate)"""
+    path, east = LANDSAT_EAST_PATH
+    return path + int(np.floor((east - lon) / LANDSAT_PATH_DEG))
+
+
+def landsat_scenes(bbox, start_date, end_date):
+    """Scenes acquired over a bbox in [start_date, end_date), as [{'id', 'date'}]
+
+    A bbox is assigned to the path through its centre; every scene on that
+    path is listed, alternating between Landsat 8 and 9.
+    """
+    path = landsat_path((bbox[0] + bbox[2]) / 2)
+    epoch = np.datetime64('1970-01-01', 'D')
+    offset = (7 * path) % LANDSAT_REVISIT_DAYS
+    start, end = np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D')
+    first = start + (offset - (start - epoch).astype(np.int64)) % LANDSAT_REVISIT_DAYS
+    dates = np.arange(first, end, np.timedelta64(LANDSAT_REVISIT_DAYS, 'D'))
+    return [
+        {'id': f"LC0{8 + ((date - epoch).astype(np.int64) // LANDSAT_REVISIT_DAYS) % 2}_{path:03d}_"
+               f"{str(date).replace('-', '')}",
+         'date': str(date)}
+        for date in dates
+    ]
+
 
 class NASADataFetcher:
-    def __init__(self, username=None, password=None):
-        """Initialize NASA Earthdata credentials"""
+    # Synthetic grid size (pixels per side) produced for each source
+    GRID_SIZES = {'modis': 50, 'landsat': 100, 'landsat_series': 100, 'hansen': 200, 'sentinel2': 200}
+    
+    def __init__(self, username=None, password=None, cache=None, generator=None):
+        """Initialize NASA Earthdata credentials, optional raster cache and synthetic generator
+        
+        With a SyntheticRasterGenerator (or GALAMSEY_SYNTHETIC_SEED set) every
+        product is generated lazily at the generator's resolution instead,
+        bypassing the cache.
+        """
+        if generator is None and os.getenv('GALAMSEY_SYNTHETIC_SEED'):
+            from synthetic_rasters import SyntheticRasterGenerator
+            resolution = os.getenv('GALAMSEY_SYNTHETIC_RESOLUTION_M')
+            generator = SyntheticRasterGenerator(seed=int(os.getenv('GALAMSEY_SYNTHETIC_SEED')),
+                                                 resolution_m=float(resolution) if resolution else None)
+        self.generator = generator
+        self.cache = cache
         self.username = username or os.getenv('NASA_USERNAME')
         self.password = password or os.getenv('NASA_PASSWORD')
         self.session = requests.Session()
@@ -14,30 +65,102 @@ class NASADataFetcher:
         if self.username and self.password:
             self.session.auth = (self.username, self.password)
     
-    def get_modis_ndvi(self, bbox, start_date, end_date):
-        """Fetch MODIS NDVI data from NASA"""
+    def _cached(self, source, fetch, bbox, start_date=None, end_date=None, size=None, grid=None):
+        """Serve a product from the raster cache, fetching it on a miss
+        
+        size=(rows, cols) asks for the coarsest overview level at least that
+        large. Lazily generated synthetic products are generated at that level
+        directly: fetch(generator) is called with the generator's overview.
+        grid names the GRID_SIZES entry of a derived product's source.
+        """
+        if self.generator is not None:
+            return fetch(self.generator if size is None else self.generator.overview(bbox, grid or source, size))
+        if self.cache is None:
+            dataset = fetch()
+            if size is None:
+                return dataset
+            levels = [dataset] + build_overviews(dataset)
+            return levels[pick_level([(level.sizes['lat'], level.sizes['lon']) for level in levels], size)]
+        
+        key = self.cache.make_key(source, bbox, start_date, end_date, self.GRID_SIZES[grid or source])
+        return self.cache.get_or_create(key, fetch, size)
+    
+    def get_modis_ndvi(self, bbox, start_date, end_date, size=None, cached=True):
+        """Fetch MODIS NDVI data from NASA
+        
+        cached=False fetches at full resolution without reading or writing the
+        raster cache, for one-off products such as single composites.
+        """
+        if not cached:
+            return self._fetch_modis_ndvi(bbox, start_date, end_date)
+        return self._cached('modis', lambda generator=None: self._fetch_modis_ndvi(bbox, start_date, end_date,
+                                                                                   generator),
+                            bbox, start_date, end_date, size)
+    
+    def get_landsat_surface_reflectance(self, bbox, start_date, end_date, size=None):
+        """Fetch Landsat 8/9 Surface Reflectance data"""
+        return self._cached('landsat',
+                            lambda generator=None: self._fetch_landsat_surface_reflectance(bbox, start_date, end_date,
+                                                                                           generator),
+                            bbox, start_date, end_date, size)
+    
+    def get_landsat_indices(self, bbox, start_date, end_date, size=None):
+        """Landsat NDVI, NDWI and BSI, cached (with overviews) as a product of their own
+        
+        Overviews of the indices are averages of full-resolution index values,
+        not indices of averaged bands.
+        """
+        def fetch(generator=None):
+            if generator is not None:
+                landsat = self._fetch_landsat_surface_reflectance(bbox, start_date, end_date, generator)
+            else:
+                landsat = self.get_landsat_surface_reflectance(bbox, start_date, end_date)
+            return self.calculate_indices(landsat.copy(), 'landsat')[['NDVI', 'NDWI', 'BSI']]
+        return self._cached('landsat_indices', fetch, bbox, start_date, end_date, size, grid='landsat')
+    
+    def get_landsat_time_series(self, bbox, start_date, end_date):
+        """Fetch a time stack of Landsat 8/9 scenes for change detection"""
+        return self._cached('landsat_series',
+                            lambda generator=None: self._fetch_landsat_time_series(bbox, start_date, end_date,
+                                                                                   generator),
+                            bbox, start_date, end_date)
+    
+    def list_landsat_scenes(self, bbox, start_date, end_date):
+        """Landsat 8/9 scenes available over a bbox, without fetching any pixels"""
+        return landsat_scenes(bbox, start_date, end_date)
+    
+    def get_hansen_forest_data(self, bbox, size=None):
+        """Fetch Hansen Global Forest Change data"""
+        return self._cached('hansen', lambda generator=None: self._fetch_hansen_forest_data(bbox, generator),
+                            bbox, size=size)
+    
+    def get_sentinel2_data(self, bbox, start_date, end_date, size=None):
+        """Fetch Sentinel-2 data via NASA Earthdata"""
+        return self._cached('sentinel2',
+                            lambda generator=None: self._fetch_sentinel2_data(bbox, start_date, end_date, generator),
+                            bbox, start_date, end_date, size)
+    
+    def _fetch_modis_ndvi(self, bbox, start_date, end_date, generator=None):
+        generator = generator or self.generator
+        if generator is not None:
+            return generator.modis_ndvi(bbox, start_date, end_date)
+        size = self.GRID_SIZES['modis']
         # MODIS Terra/Aqua NDVI
         base_url = "https://modis.gsfc.nasa.gov/data/dataprod/"
         
-        # Simulate MODIS data structure
-        dates = []
-        current = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        while current <= end:
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=16)  # MODIS 16-day composite
+        # Simulate MODIS data structure: 16-day composites, end date included
+        dates = np.arange(
+            np.datetime64(start_date, 'D'),
+            np.datetime64(end_date, 'D') + 1,
+            np.timedelta64(16, 'D')
+        ).astype(str)
         
         # Generate synthetic MODIS-like NDVI data
-        lats = np.linspace(bbox[1], bbox[3], 50)  # south to north
-        lons = np.linspace(bbox[0], bbox[2], 50)  # west to east
+        lats = np.linspace(bbox[1], bbox[3], size)  # south to north
+        lons = np.linspace(bbox[0], bbox[2], size)  # west to east
         
-        ndvi_data = []
-        for date in dates:
-            # Simulate vegetation patterns
-            ndvi = np.random.normal(0.6, 0.2, (50, 50))
-            ndvi = np.clip(ndvi, -1, 1)
-            ndvi_data.append(ndvi)
+        # Simulate vegetation patterns for the whole stack in one draw
+        ndvi_data = np.clip(np.random.normal(0.6, 0.2, (len(dates), size, size)), -1, 1)
         
         # Create xarray dataset
         ds = xr.Dataset({
@@ -50,26 +173,29 @@ class NASADataFetcher:
         
         return ds
     
-    def get_landsat_surface_reflectance(self, bbox, start_date, end_date):
-        """Fetch Landsat 8/9 Surface Reflectance data"""
+    def _fetch_landsat_surface_reflectance(self, bbox, start_date, end_date, generator=None):
+        generator = generator or self.generator
+        if generator is not None:
+            return generator.landsat_surface_reflectance(bbox)
+        size = self.GRID_SIZES['landsat']
         # This would typically use USGS API or Google Earth Engine
         # For demo, return structure that matches Landsat bands
         
         bands = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']  # Landsat 8/9 bands
         
         # Generate synthetic Landsat data
-        lats = np.linspace(bbox[1], bbox[3], 100)
-        lons = np.linspace(bbox[0], bbox[2], 100)
+        lats = np.linspace(bbox[1], bbox[3], size)
+        lons = np.linspace(bbox[0], bbox[2], size)
         
         data_vars = {}
         for band in bands:
             # Different spectral characteristics per band
             if band in ['B2', 'B3', 'B4']:  # Visible
-                data = np.random.normal(0.1, 0.05, (100, 100))
+                data = np.random.normal(0.1, 0.05, (size, size))
             elif band in ['B5', 'B6', 'B7']:  # NIR/SWIR
-                data = np.random.normal(0.3, 0.1, (100, 100))
+                data = np.random.normal(0.3, 0.1, (size, size))
             else:  # Coastal/Aerosol
-                data = np.random.normal(0.05, 0.02, (100, 100))
+                data = np.random.normal(0.05, 0.02, (size, size))
             
             data_vars[band] = (['lat', 'lon'], np.clip(data, 0, 1))
         
@@ -80,23 +206,56 @@ class NASADataFetcher:
         
         return ds
     
-    def get_hansen_forest_data(self, bbox):
-        """Fetch Hansen Global Forest Change data"""
+    def _fetch_landsat_time_series(self, bbox, start_date, end_date, generator=None):
+        generator = generator or self.generator
+        if generator is not None:
+            return generator.landsat_time_series(bbox, start_date, end_date)
+        size = self.GRID_SIZES['landsat_series']
+        # Landsat 8 and 9 combined revisit every 8 days
+        dates = np.array([scene['date'] for scene in landsat_scenes(bbox, start_date, end_date)],
+                         dtype='datetime64[D]')
+        
+        lats = np.linspace(bbox[1], bbox[3], size)
+        lons = np.linspace(bbox[0], bbox[2], size)
+        shape = (len(dates), size, size)
+        
+        data_vars = {}
+        for band in ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']:
+            if band in ['B2', 'B3', 'B4']:  # Visible
+                data = np.random.normal(0.1, 0.05, shape)
+            else:  # NIR/SWIR
+                data = np.random.normal(0.3, 0.1, shape)
+            
+            data_vars[band] = (['time', 'lat', 'lon'], np.clip(data, 0, 1).astype(np.float32))
+        
+        ds = xr.Dataset(data_vars, coords={
+            'time': dates,
+            'lat': lats,
+            'lon': lons
+        })
+        
+        return ds
+    
+    def _fetch_hansen_forest_data(self, bbox, generator=None):
+        generator = generator or self.generator
+        if generator is not None:
+            return generator.hansen_forest_data(bbox)
+        size = self.GRID_SIZES['hansen']
         # Hansen data is typically accessed via Google Earth Engine
         # This simulates the data structure
         
-        lats = np.linspace(bbox[1], bbox[3], 200)
-        lons = np.linspace(bbox[0], bbox[2], 200)
+        lats = np.linspace(bbox[1], bbox[3], size)
+        lons = np.linspace(bbox[0], bbox[2], size)
         
         # Simulate forest cover and loss data
-        tree_cover = np.random.exponential(30, (200, 200))  # Tree cover percentage
+        tree_cover = np.random.exponential(30, (size, size))  # Tree cover percentage
         tree_cover = np.clip(tree_cover, 0, 100)
         
         # Forest loss (binary)
-        forest_loss = np.random.binomial(1, 0.05, (200, 200))
+        forest_loss = np.random.binomial(1, 0.05, (size, size))
         
         # Loss year (2001-2022)
-        loss_year = np.random.randint(1, 23, (200, 200)) * forest_loss
+        loss_year = np.random.randint(1, 23, (size, size)) * forest_loss
         
         ds = xr.Dataset({
             'treecover2000': (['lat', 'lon'], tree_cover),
@@ -109,22 +268,25 @@ class NASADataFetcher:
         
         return ds
     
-    def get_sentinel2_data(self, bbox, start_date, end_date):
-        """Fetch Sentinel-2 data via NASA Earthdata"""
+    def _fetch_sentinel2_data(self, bbox, start_date, end_date, generator=None):
+        generator = generator or self.generator
+        if generator is not None:
+            return generator.sentinel2_data(bbox)
+        size = self.GRID_SIZES['sentinel2']
         # Sentinel-2 bands for vegetation analysis
         bands = ['B2', 'B3', 'B4', 'B8', 'B11', 'B12']  # Blue, Green, Red, NIR, SWIR1, SWIR2
         
-        lats = np.linspace(bbox[1], bbox[3], 200)  # Higher resolution
-        lons = np.linspace(bbox[0], bbox[2], 200)
+        lats = np.linspace(bbox[1], bbox[3], size)  # Higher resolution
+        lons = np.linspace(bbox[0], bbox[2], size)
         
         data_vars = {}
         for band in bands:
             if band in ['B2', 'B3', 'B4']:  # Visible
-                data = np.random.normal(0.08, 0.03, (200, 200))
+                data = np.random.normal(0.08, 0.03, (size, size))
             elif band == 'B8':  # NIR
-                data = np.random.normal(0.4, 0.15, (200, 200))
+                data = np.random.normal(0.4, 0.15, (size, size))
             else:  # SWIR
-                data = np.random.normal(0.2, 0.08, (200, 200))
+                data = np.random.normal(0.2, 0.08, (size, size))
             
             data_vars[band] = (['lat', 'lon'], np.clip(data, 0, 1))
         
@@ -135,30 +297,27 @@ class NASADataFetcher:
         
         return ds
     
-    def calculate_indices(self, dataset, sensor='landsat'):
+    def calculate_indices(self, dataset, sensor='landsat', chunk_rows=None):
         """Calculate vegetation and soil indices"""
-        if sensor == 'landsat':
-            # NDVI = (NIR - Red) / (NIR + Red)
-            ndvi = (dataset['B5'] - dataset['B4']) / (dataset['B5'] + dataset['B4'])
-            
-            # NDWI = (Green - NIR) / (Green + NIR)
-            ndwi = (dataset['B3'] - dataset['B5']) / (dataset['B3'] + dataset['B5'])
-            
-            # BSI = ((SWIR1 + Red) - (NIR + Blue)) / ((SWIR1 + Red) + (NIR + Blue))
-            bsi = ((dataset['B6'] + dataset['B4']) - (dataset['B5'] + dataset['B2'])) / \
-                  ((dataset['B6'] + dataset['B4']) + (dataset['B5'] + dataset['B2']))
+        if sensor not in BAND_MAPS:
+            raise ValueError(f"Unknown sensor: {sensor}")
+        bands = BAND_MAPS[sensor]
         
-        elif sensor == 'sentinel2':
-            # Sentinel-2 indices
-            ndvi = (dataset['B8'] - dataset['B4']) / (dataset['B8'] + dataset['B4'])
-            ndwi = (dataset['B3'] - dataset['B8']) / (dataset['B3'] + dataset['B8'])
-            bsi = ((dataset['B11'] + dataset['B4']) - (dataset['B8'] + dataset['B2'])) / \
-                  ((dataset['B11'] + dataset['B4']) + (dataset['B8'] + dataset['B2']))
+        # NDVI, NDWI and BSI computed together per chunk in float32
+        ndvi, ndwi, bsi = compute_indices(
+            dataset[bands['blue']],
+            dataset[bands['green']],
+            dataset[bands['red']],
+            dataset[bands['nir']],
+            dataset[bands['swir1']],
+            chunk_rows=chunk_rows
+        )
         
         # Add indices to dataset
-        dataset['NDVI'] = ndvi
-        dataset['NDWI'] = ndwi
-        dataset['BSI'] = bsi
+        dims = dataset[bands['red']].dims
+        dataset['NDVI'] = (dims, ndvi)
+        dataset['NDWI'] = (dims, ndwi)
+        dataset['BSI'] = (dims, bsi)
         
         return dataset
 
@@ -0,0 +1,206 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import xarray as xr
+
+from local_detection import LocalGalamseyDetector
+from nasa_data_fetcher import NASADataFetcher
+from raster_cache import RasterCache
+
+# Rasters returned from workers through shared memory
+RESULT_ARRAYS = ['ndvi_change', 'bsi_change', 'mining_mask']
+
+
+def split_bbox(bbox, rows, cols):
+    """Split [west, south, east, north] into a rows x cols grid of named tiles"""
+    west, south, east, north = bbox
+    lats = np.linspace(south, north, rows + 1)
+    lons = np.linspace(west, east, cols + 1)
+    return {
+        f"tile_{r}_{c}": [float(lons[c]), float(lats[r]), float(lons[c + 1]), float(lats[r + 1])]
+        for r in range(rows) for c in range(cols)
+    }
+
+
+class SharedArrays:
+    """Picklable handle to named arrays packed into one shared memory block
+
+    The worker packs its result arrays and returns only this handle; the
+    parent attaches to the block and reads the arrays in place, then
+    release() frees the memory.
+    """
+
+    def __init__(self, name, specs):
+        self.name = name
+        self.specs = specs  # [(key, dtype str, shape, offset)]
+        self._shm = None
+
+    @classmethod
+    def pack(cls, arrays):
+        specs, offset = [], 0
+        for key, array in arrays.items():
+            offset = -(-offset // 16) * 16  # keep every array 16-byte aligned
+            specs.append((key, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (key, dtype, shape, start), array in zip(specs, arrays.values()):
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+        handle = cls(shm.name, specs)
+        shm.close()
+        # Ownership passes to whoever attaches; stop this process' tracker
+        # from unlinking the block when the worker exits. POSIX blocks are
+        # tracked under their name with a leading slash
+        if os.name == 'posix':
+            resource_tracker.unregister(f"/{shm.name}", 'shared_memory')
+        return handle
+
+    def __getstate__(self):
+        return {'name': self.name, 'specs': self.specs}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], state['specs'])
+
+    def attach(self):
+        """Zero-copy views of the packed arrays, valid until release()"""
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        return {
+            key: np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+            for key, dtype, shape, offset in self.specs
+        }
+
+    def release(self):
+        """Free the shared block; views returned by attach() must no longer be used"""
+        shm, self._shm = self._shm, None
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=self.name)
+        shm.close()
+        shm.unlink()
+
+
+# Per-process state, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(use_cache, detector_kwargs):
+    # Forked workers inherit the parent's RNG state; reseed so the synthetic
+    # fetcher doesn't hand every worker the same rasters
+    np.random.seed()
+    _worker['fetcher'] = NASADataFetcher(cache=RasterCache() if use_cache else None)
+    _worker['uncached_fetcher'] = NASADataFetcher()
+    _worker['detector'] = LocalGalamseyDetector(**detector_kwargs)
+
+
+def _detect_region(name, bbox, start_date, end_date, min_area, scene_dates=None, arrays=True, cached=True):
+    """Worker: fetch a region's time stack, detect changes and extract hotspots
+
+    With scene_dates, only the scenes acquired on those dates are used.
+    Without arrays, the change rasters are not packed into shared memory.
+    cached=False fetches the stack without the raster cache.
+    """
+    fetcher = _worker['fetcher'] if cached else _worker['uncached_fetcher']
+    stack = fetcher.get_landsat_time_series(bbox, start_date, end_date)
+    if scene_dates is not None:
+        times = stack['time'].values.astype('datetime64[D]')
+        stack = stack.isel(time=np.flatnonzero(np.isin(times, np.asarray(scene_dates, dtype='datetime64[D]'))))
+    result = _worker['detector'].detect_changes(stack, start_date, end_date)
+    hotspots = _worker['detector'].get_hotspots(result, min_area=min_area)
+    for hotspot in hotspots:
+        hotspot['region'] = name
+
+    output = {'hotspots': hotspots, 'image_count': stack.sizes['time'],
+              'mining_pixels': int(result['mining_mask'].values.sum())}
+    if arrays:
+        output['arrays'] = SharedArrays.pack({key: result[key].values for key in RESULT_ARRAYS})
+        output['lat'] = result['mining_mask']['lat'].values
+        output['lon'] = result['mining_mask']['lon'].values
+    return output
+
+
+class ParallelRegionDetector:
+    """Runs LocalGalamseyDetector over many regions on a process pool
+
+    Each region (or tile of a larger bbox) is fetched and analysed in a
+    worker process. The change rasters come back through shared memory;
+    they stay valid until close(), so use the detector as a context manager
+    or keep one open for the life of the process and ask only for hotspots.
+    """
+
+    def __init__(self, workers=None, use_cache=True, **detector_kwargs):
+        self.workers = workers or int(os.getenv('GALAMSEY_WORKERS', '0')) or os.cpu_count() or 1
+        self.detector_kwargs = detector_kwargs
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(use_cache, detector_kwargs)
+        )
+        self._handles = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def detect_regions(self, regions, start_date, end_date, min_area=100, scene_dates=None, arrays=True,
+                       cached=True):
+        """Detection results keyed by region name, computed in parallel
+
+        ``regions`` maps names to [west, south, east, north]. Each result
+        holds ndvi_change, bsi_change and mining_mask DataArrays backed by
+        shared memory, plus that region's hotspots, scene count and mining
+        pixel count. ``scene_dates`` optionally maps names to the scene
+        dates to use. With arrays=False only hotspots and counts are
+        returned and no shared memory is allocated; cached=False keeps the
+        fetched stacks out of the raster cache.
+        """
+        scene_dates = scene_dates or {}
+        futures = {
+            name: self._pool.submit(_detect_region, name, bbox, start_date, end_date, min_area,
+                                    scene_dates.get(name), arrays, cached)
+            for name, bbox in regions.items()
+        }
+
+        results = {}
+        for name, future in futures.items():
+            try:
+                output = future.result()
+            except Exception:
+                self._collect_remaining(futures.values())
+                raise
+            results[name] = {}
+            if arrays:
+                handle = output['arrays']
+                self._handles.append(handle)
+
+                coords = {'lat': output['lat'], 'lon': output['lon']}
+                views = handle.attach()
+                results[name] = {
+                    key: xr.DataArray(views[key], dims=['lat', 'lon'], coords=coords, name=key)
+                    for key in RESULT_ARRAYS
+                }
+            results[name]['hotspots'] = output['hotspots']
+            results[name]['image_count'] = output['image_count']
+            results[name]['mining_pixels'] = output['mining_pixels']
+
+        return results
+
+    def _collect_remaining(self, futures):
+        """Track buffers of regions that finished after another one failed, so close() frees them"""
+        for future in futures:
+            try:
+                handle = future.result().get('arrays')
+            except Exception:
+                continue
+            if handle is not None and handle not in self._handles:
+                self._handles.append(handle)
+
+    def close(self):
+        """Free every shared result buffer and shut the pool down"""
+        handles, self._handles = self._handles, []
+        for handle in handles:
+            handle.release()
+        self._pool.shutdown()
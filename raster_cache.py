@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+import xarray as xr
+
+from raster_pyramid import build_overviews, pick_level
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'rasters')
+
+
+class RasterCache:
+    """Persistent NetCDF cache for raster products with LRU eviction"""
+
+    def __init__(self, cache_dir=None, max_bytes=None, chunk_size=256):
+        self.cache_dir = cache_dir or os.getenv('GALAMSEY_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('GALAMSEY_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(source, bbox, start_date=None, end_date=None, resolution=None):
+        """Stable cache key for (source, bbox, date range, resolution)"""
+        payload = json.dumps({
+            'source': source,
+            'bbox': [round(float(c), 6) for c in bbox],
+            'start_date': start_date,
+            'end_date': end_date,
+            'resolution': resolution
+        }, sort_keys=True)
+        return f"{source}-{hashlib.sha1(payload.encode()).hexdigest()[:20]}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.nc")
+
+    def _open(self, key, size=None):
+        path = self._path(key)
+        try:
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+            dataset = xr.open_dataset(path, cache=False)
+        except (FileNotFoundError, OSError):
+            return None
+
+        shapes = np.asarray(dataset.attrs.get('overview_shapes', []), dtype=int).reshape(-1, 2)
+        if size is None or not len(shapes):
+            return dataset
+        level = pick_level([(dataset.sizes['lat'], dataset.sizes['lon'])] + shapes.tolist(), size)
+        if level == 0:
+            return dataset
+        dataset.close()
+        try:
+            return xr.open_dataset(path, group=f"overview_{level}", cache=False)
+        except (FileNotFoundError, OSError):
+            return None
+
+    def get(self, key, size=None):
+        """Open a cached dataset lazily, or return None on a miss
+
+        With size=(rows, cols), the coarsest overview level still at least
+        that large is opened instead of the full resolution.
+        """
+        dataset = self._open(key, size)
+        with self._lock:
+            if dataset is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dataset
+
+    def _encoding(self, dataset):
+        encoding = {}
+        for name, var in dataset.data_vars.items():
+            if var.ndim:
+                chunks = [min(self.chunk_size, n) if dim in ('lat', 'lon') else 1
+                          for dim, n in zip(var.dims, var.shape)]
+                encoding[name] = {'chunksizes': tuple(chunks)}
+        return encoding
+
+    def put(self, key, dataset):
+        """Write a dataset to the cache with chunked storage and overview levels
+
+        Lat/lon rasters get a pyramid of halved overviews, stored as groups
+        overview_1, overview_2, ... of the same file (so they are evicted
+        with it); their shapes are listed in the overview_shapes attribute.
+        """
+        overviews = build_overviews(dataset) if {'lat', 'lon'} <= set(dataset.dims) else []
+        if overviews:
+            shapes = [n for level in overviews for n in (level.sizes['lat'], level.sizes['lon'])]
+            dataset = dataset.assign_attrs(overview_shapes=shapes)
+
+        # Write to a temporary file so readers never see a partial product
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            dataset.to_netcdf(tmp_path, encoding=self._encoding(dataset))
+            for level, overview in enumerate(overviews, start=1):
+                overview.to_netcdf(tmp_path, mode='a', group=f"overview_{level}", encoding=self._encoding(overview))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.evict()
+
+    def get_or_create(self, key, builder, size=None):
+        """Return the cached dataset for key (at the overview level for size), building and storing it on a miss"""
+        dataset = self.get(key, size)
+        if dataset is not None:
+            return dataset
+
+        dataset = builder()
+        self.put(key, dataset)
+
+        # Serve the lazily opened copy so the built arrays can be released
+        cached = self._open(key, size)
+        return cached if cached is not None else dataset
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.nc'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Remove least recently used files until the cache fits max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every cached product"""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Hit/miss counters and current disk usage"""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
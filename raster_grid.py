@@ -0,0 +1,12 @@
+import math
+
+
+def output_size(bbox, degrees_per_pixel):
+    """(rows, cols) needed to show bbox at degrees_per_pixel
+
+    Kept free of numpy and xarray so the API can size requests without
+    loading the raster stack at start-up.
+    """
+    west, south, east, north = bbox
+    return (max(1, math.ceil((north - south) / degrees_per_pixel)),
+            max(1, math.ceil((east - west) / degrees_per_pixel)))
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Band names per sensor for the spectral roles used by the indices
+BAND_MAPS = {
+    'landsat': {'blue': 'B2', 'green': 'B3', 'red': 'B4', 'nir': 'B5', 'swir1': 'B6'},
+    'sentinel2': {'blue': 'B2', 'green': 'B3', 'red': 'B4', 'nir': 'B8', 'swir1': 'B11'},
+}
+
+# Target number of pixels processed per chunk (~4 MB per float32 buffer)
+CHUNK_PIXELS = 1 << 20
+
+
+def _normalized_difference(a, b, out, denom):
+    """Write (a - b) / (a + b) into out, NaN where the denominator is zero"""
+    np.add(a, b, out=denom)
+    np.subtract(a, b, out=out)
+    zero = denom == 0
+    denom[zero] = 1
+    np.divide(out, denom, out=out)
+    out[zero] = np.nan
+
+
+def compute_indices(blue, green, red, nir, swir1, chunk_rows=None, out=None):
+    """Compute NDVI, NDWI and BSI in one float32 pass over row chunks
+
+    Bands may be NumPy arrays, memmaps or xarray DataArrays of identical
+    shape (..., rows, cols); only one chunk of each band is loaded at a time.
+    Results are written into preallocated float32 arrays, either the
+    (ndvi, ndwi, bsi) tuple passed as ``out`` or newly allocated ones.
+    """
+    shape = tuple(red.shape)
+    if len(shape) < 2:
+        raise ValueError("Bands must have at least two dimensions (rows, cols)")
+
+    if out is None:
+        out = tuple(np.empty(shape, dtype=np.float32) for _ in range(3))
+    ndvi, ndwi, bsi = out
+
+    rows, cols = shape[-2], shape[-1]
+    if rows == 0:
+        return ndvi, ndwi, bsi
+    if chunk_rows is None:
+        chunk_rows = max(1, CHUNK_PIXELS // max(cols, 1))
+    chunk_rows = min(chunk_rows, rows)
+
+    # Scratch buffers reused for every chunk
+    scratch = np.empty((3, chunk_rows, cols), dtype=np.float32)
+
+    for lead in np.ndindex(*shape[:-2]):
+        for start in range(0, rows, chunk_rows):
+            stop = min(start + chunk_rows, rows)
+            key = lead + (slice(start, stop),)
+            n = stop - start
+            denom, soil, cover = scratch[0, :n], scratch[1, :n], scratch[2, :n]
+
+            r = np.asarray(red[key], dtype=np.float32)
+            n_ir = np.asarray(nir[key], dtype=np.float32)
+            g = np.asarray(green[key], dtype=np.float32)
+
+            # NDVI = (NIR - Red) / (NIR + Red)
+            _normalized_difference(n_ir, r, ndvi[key], denom)
+            # NDWI = (Green - NIR) / (Green + NIR)
+            _normalized_difference(g, n_ir, ndwi[key], denom)
+
+            # BSI = ((SWIR1 + Red) - (NIR + Blue)) / ((SWIR1 + Red) + (NIR + Blue))
+            np.add(np.asarray(swir1[key], dtype=np.float32), r, out=soil)
+            np.add(n_ir, np.asarray(blue[key], dtype=np.float32), out=cover)
+            _normalized_difference(soil, cover, bsi[key], denom)
+
+    return ndvi, ndwi, bsi
@@ -0,0 +1,118 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def blend_window(patch_size):
+    """Separable sine taper: patch centres dominate, edges fade but never reach zero"""
+    taper = np.sin(np.pi * (np.arange(patch_size) + 0.5) / patch_size)
+    return np.outer(taper, taper).astype(np.float32)
+
+
+def _reflect(indices, size):
+    """Map indices outside [0, size) back inside by mirroring at the edges (numpy 'reflect')"""
+    if size == 1:
+        return np.zeros_like(indices)
+    period = 2 * (size - 1)
+    indices = np.mod(indices, period)
+    return np.where(indices >= size, period - indices, indices)
+
+
+def _read_padded(cube, rows, cols):
+    """cube[rows, cols] for a window that may extend past the raster, reflect-padded
+
+    Padding mirrors the whole raster, so a tile reads the same values
+    whatever its position.
+    """
+    height, width = cube.shape[:2]
+    row_idx = _reflect(np.arange(*rows), height)
+    col_idx = _reflect(np.arange(*cols), width)
+    r0, c0 = row_idx.min(), col_idx.min()
+    block = np.asarray(cube[r0:row_idx.max() + 1, c0:col_idx.max() + 1], dtype=np.float32)
+
+    if rows[0] >= 0 and rows[1] <= height and cols[0] >= 0 and cols[1] <= width:
+        return block
+    return block[np.ix_(row_idx - r0, col_idx - c0)]
+
+
+def _score_windows(windows, predict_batch, batch_size):
+    """Run every (p, p, C) window of a (ny, nx, p, p, C) view through predict_batch"""
+    ny, nx = windows.shape[:2]
+    flat = windows.reshape(ny * nx, *windows.shape[2:]) if windows.flags.c_contiguous else None
+    scores = np.empty(ny * nx, dtype=np.float32)
+
+    for start in range(0, ny * nx, batch_size):
+        stop = min(start + batch_size, ny * nx)
+        if flat is not None:
+            batch = flat[start:stop]
+        else:
+            # Only one batch of patches is materialized at a time
+            rows, cols = np.divmod(np.arange(start, stop), nx)
+            batch = windows[rows, cols]
+        scores[start:stop] = np.asarray(predict_batch(batch), dtype=np.float32).reshape(-1)
+
+    return scores.reshape(ny, nx)
+
+
+def iter_probability_tiles(cube, predict_batch, patch_size=64, stride=32, tile_size=1024, batch_size=256):
+    """Yield (row slice, col slice, probabilities) for each output tile of a raster
+
+    ``cube`` is any (height, width, channels) array-like that supports
+    slicing (numpy array or memmap, netCDF4 variable, lazy xarray), so only
+    one tile plus its halo is read at a time. Windows are taken on a
+    stride-aligned grid that extends past the raster edges (reflect
+    padding), every pixel is covered by (patch_size / stride)**2 windows,
+    and the per-window scores are blended with ``blend_window``.
+    """
+    if patch_size % stride:
+        raise ValueError("patch_size must be a multiple of stride")
+    height, width = cube.shape[:2]
+    overlap = patch_size // stride
+    tile_cells = max(1, tile_size // stride)
+    weights = blend_window(patch_size).reshape(overlap, stride, overlap, stride).transpose(0, 2, 1, 3)
+
+    for cell_r0 in range(0, -(-height // stride), tile_cells):
+        cell_r1 = min(cell_r0 + tile_cells, -(-height // stride))
+        for cell_c0 in range(0, -(-width // stride), tile_cells):
+            cell_c1 = min(cell_c0 + tile_cells, -(-width // stride))
+
+            # Windows whose footprint touches these cells start up to overlap-1 cells earlier
+            block = _read_padded(
+                cube,
+                ((cell_r0 - overlap + 1) * stride, (cell_r1 + overlap - 1) * stride),
+                ((cell_c0 - overlap + 1) * stride, (cell_c1 + overlap - 1) * stride)
+            )
+            # Zero-copy (ny, nx, p, p, C) view of every window in the block
+            windows = sliding_window_view(block, (patch_size, patch_size), axis=(0, 1))[::stride, ::stride]
+            windows = np.moveaxis(windows, 2, -1)
+            scores = _score_windows(windows, predict_batch, batch_size)
+
+            # Each cell collects window i rows / j cols earlier, weighted by that window's sub-block
+            n_rows, n_cols = cell_r1 - cell_r0, cell_c1 - cell_c0
+            total = np.zeros((n_rows, n_cols, stride, stride), dtype=np.float32)
+            weight = np.zeros_like(total)
+            for i in range(overlap):
+                for j in range(overlap):
+                    shifted = scores[overlap - 1 - i:overlap - 1 - i + n_rows,
+                                     overlap - 1 - j:overlap - 1 - j + n_cols]
+                    total += shifted[:, :, None, None] * weights[i, j]
+                    weight += weights[i, j]
+
+            probs = (total / weight).transpose(0, 2, 1, 3).reshape(n_rows * stride, n_cols * stride)
+            rows = slice(cell_r0 * stride, min(cell_r1 * stride, height))
+            cols = slice(cell_c0 * stride, min(cell_c1 * stride, width))
+            yield rows, cols, probs[:rows.stop - rows.start, :cols.stop - cols.start]
+
+
+def predict_raster(cube, predict_batch, patch_size=64, stride=32, tile_size=1024, batch_size=256, out=None):
+    """Full-resolution probability map for a (height, width, channels) cube
+
+    Tiles are written into ``out`` as they finish; pass an np.memmap or a
+    netCDF4 variable to keep the map itself out of RAM as well.
+    """
+    if out is None:
+        out = np.empty(cube.shape[:2], dtype=np.float32)
+
+    for rows, cols, probs in iter_probability_tiles(cube, predict_batch, patch_size, stride, tile_size, batch_size):
+        out[rows, cols] = probs
+
+    return out
@@ -0,0 +1,89 @@
+import warnings
+
+import numpy as np
+import xarray as xr
+
+from raster_grid import output_size  # re-exported for existing callers
+
+# Overviews halve the grid until its longer side fits within this many pixels
+OVERVIEW_MIN_SIZE = 256
+
+# Class-valued variables, downsampled by mode rather than mean whatever their dtype
+MODE_VARIABLES = {'mining_mask', 'loss', 'lossyear', 'decline'}
+
+
+def resampling(name, variable):
+    """'mode' for masks and class rasters (by name or integer/bool dtype), else 'mean'"""
+    if name in MODE_VARIABLES or variable.dtype.kind in 'biu':
+        return 'mode'
+    return 'mean'
+
+
+def downsample(values, factor=2, method='mean'):
+    """Reduce the last two axes by factor, averaging or taking the most common value per block
+
+    Edge blocks may be partial; NaNs are ignored and an all-NaN block stays
+    NaN. Mode ties go to the smallest value. Integer and bool inputs keep
+    their dtype.
+    """
+    values = np.asarray(values)
+    *lead, rows, cols = values.shape
+    out_rows, out_cols = -(-rows // factor), -(-cols // factor)
+    padded = np.full((*lead, out_rows * factor, out_cols * factor), np.nan,
+                     dtype=np.float64 if method == 'mode' else np.float32)
+    padded[..., :rows, :cols] = values
+    blocks = padded.reshape(*lead, out_rows, factor, out_cols, factor)
+
+    if method == 'mean':
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmean(blocks, axis=(-3, -1))
+
+    blocks = blocks.swapaxes(-3, -2).reshape(*lead, out_rows, out_cols, factor * factor)
+    classes = np.unique(values[~np.isnan(values)] if values.dtype.kind == 'f' else values)
+    if len(classes) == 0:
+        return np.full((*lead, out_rows, out_cols), np.nan, dtype=values.dtype)
+    counts = np.stack([(blocks == value).sum(axis=-1) for value in classes], axis=-1)
+    mode = np.where(counts.max(axis=-1) > 0, classes[counts.argmax(axis=-1)], np.nan)
+    # Every block holds at least one real pixel, so integer modes are never NaN
+    return mode if values.dtype.kind == 'f' else mode.astype(values.dtype)
+
+
+def downsample_dataset(dataset, factor=2):
+    """One overview level: every (..., lat, lon) variable downsampled by its resampling method"""
+    data_vars = {}
+    for name, variable in dataset.data_vars.items():
+        if 'lat' not in variable.dims or 'lon' not in variable.dims:
+            data_vars[name] = variable
+            continue
+        variable = variable.transpose(..., 'lat', 'lon')
+        data_vars[name] = (variable.dims, downsample(variable.values, factor, resampling(name, variable)),
+                           variable.attrs)
+
+    coords = {name: coord for name, coord in dataset.coords.items() if name not in ('lat', 'lon')}
+    coords['lat'] = downsample(dataset['lat'].values[None, :], factor)[0].astype(dataset['lat'].dtype)
+    coords['lon'] = downsample(dataset['lon'].values[None, :], factor)[0].astype(dataset['lon'].dtype)
+    return xr.Dataset(data_vars, coords=coords, attrs=dataset.attrs)
+
+
+def build_overviews(dataset, min_size=OVERVIEW_MIN_SIZE, factor=2):
+    """Successively coarser overview Datasets (each level from the previous one), finest first"""
+    levels = []
+    current = dataset
+    while max(current.sizes['lat'], current.sizes['lon']) > min_size:
+        current = downsample_dataset(current, factor)
+        levels.append(current)
+    return levels
+
+
+def pick_level(shapes, size):
+    """Index of the coarsest (rows, cols) in shapes, finest first, still at least size
+
+    Falls back to 0 (the full resolution) when no level is large enough.
+    """
+    rows, cols = size
+    level = 0
+    for i, (level_rows, level_cols) in enumerate(shapes):
+        if level_rows >= rows and level_cols >= cols:
+            level = i
+    return level
@@ -1,12 +1,41 @@
 import ee
+import os
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import json
+from hotspot_store import HotspotStore
+from incremental_detection import TileManifest, fingerprint
+
+# Upper bound on Earth Engine requests in flight at once
+EE_MAX_WORKERS = int(os.getenv('EE_MAX_WORKERS', '4'))
+
+# Ghana mining regions [west, south, east, north]
+MINING_REGIONS = {
+    'western': [-3.25, 4.74, -1.5, 6.5],
+    'ashanti': [-2.5, 5.5, -0.5, 7.5],
+    'eastern': [-1.0, 5.5, 0.5, 7.5]
+}
+
+def add_indices(image):
+    """Add NDVI, NDWI and BSI bands to a Landsat surface reflectance image"""
+    ndvi = image.normalizedDifference(['SR_B5', 'SR_B4']).rename('NDVI')
+    ndwi = image.normalizedDifference(['SR_B3', 'SR_B5']).rename('NDWI')
+    bsi = image.expression(
+        '((SWIR1 + RED) - (NIR + BLUE)) / ((SWIR1 + RED) + (NIR + BLUE))',
+        {
+            'RED': image.select('SR_B4'),
+            'NIR': image.select('SR_B5'),
+            'BLUE': image.select('SR_B2'),
+            'SWIR1': image.select('SR_B6')
+        }
+    ).rename('BSI')
+    return image.addBands([ndvi, ndwi, bsi])
 
 class RealGalamseyDetector:
-    def __init__(self):
+    def __init__(self, max_workers=None):
         """Initialize Earth Engine with real authentication"""
+        self.max_workers = max_workers or EE_MAX_WORKERS
         try:
             # Try with default project first
             ee.Initialize(project='ee-jamesanokye')
@@ -23,87 +52,95 @@ class RealGalamseyDetector:
     def get_real_landsat_data(self, start_date='2023-01-01', end_date='2024-01-01'):
         """Get real Landsat 8/9 data for Ghana mining regions"""
         
-        # Ghana mining regions
-        regions = {
-            'western': ee.Geometry.Rectangle([-3.25, 4.74, -1.5, 6.5]),
-            'ashanti': ee.Geometry.Rectangle([-2.5, 5.5, -0.5, 7.5]),
-            'eastern': ee.Geometry.Rectangle([-1.0, 5.5, 0.5, 7.5])
-        }
-        
-        results = {}
-        
-        for region_name, geometry in regions.items():
+        collections = {}
+        for region_name, coords in MINING_REGIONS.items():
+            geometry = ee.Geometry.Rectangle(coords)
             # Get Landsat 8/9 Surface Reflectance
-            collection = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
+            collections[region_name] = (geometry, ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
                 .merge(ee.ImageCollection('LANDSAT/LC09/C02/T1_L2')) \
                 .filterBounds(geometry) \
                 .filterDate(start_date, end_date) \
-                .filter(ee.Filter.lt('CLOUD_COVER', 20))
-            
-            if collection.size().getInfo() > 0:
+                .filter(ee.Filter.lt('CLOUD_COVER', 20)))
+        
+        # Image counts and scene inventories for every region in a single round trip
+        inventory = ee.Dictionary({
+            'counts': ee.Dictionary({
+                region_name: collection.size() for region_name, (_, collection) in collections.items()
+            }),
+            'ids': ee.Dictionary({
+                region_name: collection.aggregate_array('system:index')
+                for region_name, (_, collection) in collections.items()
+            }),
+            'dates': ee.Dictionary({
+                region_name: collection.aggregate_array('DATE_ACQUIRED')
+                for region_name, (_, collection) in collections.items()
+            })
+        }).getInfo()
+        counts = inventory['counts']
+        
+        results = {}
+        for region_name, (geometry, collection) in collections.items():
+            if counts[region_name] > 0:
                 # Calculate indices
-                def add_indices(image):
-                    ndvi = image.normalizedDifference(['SR_B5', 'SR_B4']).rename('NDVI')
-                    ndwi = image.normalizedDifference(['SR_B3', 'SR_B5']).rename('NDWI')
-                    bsi = image.expression(
-                        '((SWIR1 + RED) - (NIR + BLUE)) / ((SWIR1 + RED) + (NIR + BLUE))',
-                        {
-                            'RED': image.select('SR_B4'),
-                            'NIR': image.select('SR_B5'),
-                            'BLUE': image.select('SR_B2'),
-                            'SWIR1': image.select('SR_B6')
-                        }
-                    ).rename('BSI')
-                    return image.addBands([ndvi, ndwi, bsi])
-                
-                processed = collection.map(add_indices)
-                composite = processed.median()
+                composite = collection.map(add_indices).median()
                 
                 results[region_name] = {
                     'image': composite,
                     'geometry': geometry,
-                    'image_count': collection.size().getInfo()
+                    'image_count': counts[region_name],
+                    'scenes': [{'id': scene_id, 'date': scene_date} for scene_id, scene_date in
+                               zip(inventory['ids'].get(region_name) or [], inventory['dates'].get(region_name) or [])]
                 }
         
         return results
     
-    def detect_real_changes(self, region_data):
-        """Detect actual land cover changes"""
-        hotspots = []
+    def _sample_region(self, region_name, data):
+        """Sample mining-like pixels in one region (one Earth Engine round trip)"""
+        image = data['image']
         
-        for region_name, data in region_data.items():
-            image = data['image']
-            geometry = data['geometry']
-            
-            # Mining detection criteria (more sensitive)
-            ndvi_low = image.select('NDVI').lt(0.4)  # Less vegetation
-            bsi_high = image.select('BSI').gt(0.1)   # Some soil exposure
-            mining_mask = ndvi_low.Or(bsi_high)      # Either condition
-            
-            # Sample points from detected areas
-            sample_points = mining_mask.selfMask().sample(
-                region=geometry,
-                scale=30,
-                numPixels=50,
-                geometries=True
-            )
-            
-            # Convert to list
-            points_list = sample_points.getInfo()
+        # Mining detection criteria (more sensitive)
+        ndvi_low = image.select('NDVI').lt(0.4)  # Less vegetation
+        bsi_high = image.select('BSI').gt(0.1)   # Some soil exposure
+        mining_mask = ndvi_low.Or(bsi_high)      # Either condition
+        
+        # Sample points from detected areas
+        sample_points = mining_mask.selfMask().sample(
+            region=data['geometry'],
+            scale=30,
+            numPixels=50,
+            geometries=True
+        )
+        
+        hotspots = []
+        for point in sample_points.getInfo()['features']:
+            coords = point['geometry']['coordinates']
+            properties = point['properties']
             
-            for point in points_list['features']:
-                coords = point['geometry']['coordinates']
-                properties = point['properties']
-                
-                hotspots.append({
-                    'lat': coords[1],
-                    'lon': coords[0],
-                    'region': region_name,
-                    'ndvi': properties.get('NDVI', 0),
-                    'bsi': properties.get('BSI', 0),
-                    'ndwi': properties.get('NDWI', 0),
-                    'severity': min(1.0, max(0.0, properties.get('BSI', 0) - properties.get('NDVI', 0) + 0.5))
-                })
+            hotspots.append({
+                'lat': coords[1],
+                'lon': coords[0],
+                'region': region_name,
+                'ndvi': properties.get('NDVI', 0),
+                'bsi': properties.get('BSI', 0),
+                'ndwi': properties.get('NDWI', 0),
+                'severity': min(1.0, max(0.0, properties.get('BSI', 0) - properties.get('NDVI', 0) + 0.5))
+            })
+        
+        return hotspots
+    
+    def detect_real_changes(self, region_data, pool=None):
+        """Detect actual land cover changes, sampling regions concurrently"""
+        if pool is None:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                return self.detect_real_changes(region_data, pool)
+        
+        futures = [pool.submit(self._sample_region, region_name, data)
+                   for region_name, data in region_data.items()]
+        
+        # Keep hotspots in region order regardless of which request finishes first
+        hotspots = []
+        for future in futures:
+            hotspots.extend(future.result())
         
         return hotspots
     
@@ -130,43 +167,85 @@ class RealGalamseyDetector:
         
         return sample.getInfo()
     
-    def run_real_analysis(self):
-        """Run complete real data analysis"""
+    def run_real_analysis(self, store=None, progress=None, manifest=None):
+        """Run complete real data analysis, appending the run to store if given
+        
+        progress(stage, fraction) is called as each stage starts; it may raise
+        to abort the run (the job manager uses this for cancellation).
+        
+        With a TileManifest, regions whose Landsat scenes are unchanged since
+        their last run reuse its hotspots instead of being sampled again.
+        """
         print("🛰️ Starting real NASA satellite data analysis...")
+        report = progress or (lambda stage, fraction: None)
         
         try:
-            # Get Landsat data
-            print("📡 Fetching Landsat 8/9 data...")
-            landsat_data = self.get_real_landsat_data()
-            
-            # Detect changes
-            print("🔍 Detecting land cover changes...")
-            hotspots = self.detect_real_changes(landsat_data)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                # MODIS is independent of Landsat, so it runs alongside it
+                print("🌿 Fetching MODIS vegetation data...")
+                report('modis', 0.05)
+                modis_future = pool.submit(self.get_modis_ndvi)
+                
+                # Get Landsat data
+                print("📡 Fetching Landsat 8/9 data...")
+                report('landsat', 0.1)
+                landsat_data = self.get_real_landsat_data()
+                
+                # Only regions with new scenes need sampling again
+                dirty = landsat_data
+                if manifest is not None:
+                    fingerprints = {
+                        region_name: fingerprint(data['scenes'], {'bbox': MINING_REGIONS[region_name]})
+                        for region_name, data in landsat_data.items()
+                    }
+                    dirty = {region_name: data for region_name, data in landsat_data.items()
+                             if not manifest.is_current(region_name, fingerprints[region_name])}
+                
+                # Detect changes
+                print(f"🔍 Detecting land cover changes in {len(dirty)} of {len(landsat_data)} regions...")
+                report('detect', 0.4)
+                hotspots = self.detect_real_changes(dirty, pool)
+                
+                report('modis', 0.8)
+                modis_data = modis_future.result()
             
-            # Get MODIS data
-            print("🌿 Fetching MODIS vegetation data...")
-            modis_data = self.get_modis_ndvi()
+            if manifest is not None:
+                for region_name, data in dirty.items():
+                    manifest.record(region_name, fingerprints[region_name], data['scenes'],
+                                    [hotspot for hotspot in hotspots if hotspot['region'] == region_name],
+                                    image_count=data['image_count'])
+                manifest.save()
+                # Merge with the cached results of unchanged regions, in region order
+                hotspots = [hotspot for region_name in landsat_data
+                            for hotspot in manifest.tiles[region_name]['hotspots']]
             
             print(f"✅ Analysis complete! Found {len(hotspots)} potential hotspots")
             
-            return {
+            results = {
                 'hotspots': hotspots,
                 'modis_samples': len(modis_data['features']) if modis_data else 0,
                 'regions_analyzed': list(landsat_data.keys()),
+                'regions_recomputed': list(dirty.keys()),
+                'regions_skipped': len(landsat_data) - len(dirty),
                 'timestamp': datetime.now().isoformat()
             }
             
         except Exception as e:
             print(f"❌ Analysis failed: {e}")
-            return {'error': str(e)}
+            results = {'error': str(e)}
+        
+        if store is not None:
+            report('store', 0.9)
+            metadata = {key: value for key, value in results.items() if key != 'hotspots'}
+            results['run_id'] = store.append_run('real', results.get('hotspots', []), metadata)
+        
+        return results
 
 # Usage
 if __name__ == "__main__":
     detector = RealGalamseyDetector()
-    results = detector.run_real_analysis()
-    
-    # Save results
-    with open('real_galamsey_data.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    store = HotspotStore()
+    results = detector.run_real_analysis(store=store, manifest=TileManifest('real_regions'))
     
-    print("💾 Results saved to real_galamsey_data.json")
\ No newline at end of file
+    print(f"💾 Results saved to {store.path} (run {results['run_id']}); "
+          f"{results.get('regions_skipped', 0)} unchanged regions reused")
\ No newline at end of file
@@ -70,7 +70,7 @@ def main():
     print("\n🎉 Setup complete! Real NASA data integration ready.")
     print("\n🚀 Next steps:")
     print("   1. Start the API: cd api && python main.py")
-    print("   2. Run analysis: GET /real-analysis")
+    print("   2. Run analysis: GET /real-analysis (poll /real-analysis/jobs/<job_id>)")
     print("   3. Get results: GET /real-hotspots")
     
     return True
@@ -0,0 +1,353 @@
+import zlib
+
+import numpy as np
+import xarray as xr
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+from raster_pyramid import OVERVIEW_MIN_SIZE
+
+# Native ground resolution (metres) per product when no target resolution is given
+NATIVE_RESOLUTION_M = {'modis': 250, 'landsat': 30, 'landsat_series': 30, 'hansen': 30, 'sentinel2': 10}
+
+# Metres per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111320.0
+
+# Lattice spacings (pixels) and weights of the smooth noise octaves behind the land-cover field
+OCTAVES = [(512, 0.6), (128, 0.3), (32, 0.1)]
+
+# (mean, response to the vegetation field, white-noise std) per band; vegetated
+# pixels are darker in the visible and SWIR and brighter in the NIR
+LANDSAT_BANDS = {
+    'B1': (0.05, -0.01, 0.01),
+    'B2': (0.08, -0.03, 0.01),
+    'B3': (0.10, -0.03, 0.015),
+    'B4': (0.10, -0.05, 0.015),
+    'B5': (0.30, 0.10, 0.03),
+    'B6': (0.25, -0.08, 0.03),
+    'B7': (0.18, -0.06, 0.02),
+}
+SENTINEL2_BANDS = {
+    'B2': (0.08, -0.03, 0.01),
+    'B3': (0.09, -0.03, 0.01),
+    'B4': (0.08, -0.05, 0.01),
+    'B8': (0.40, 0.12, 0.04),
+    'B11': (0.20, -0.07, 0.02),
+    'B12': (0.15, -0.05, 0.02),
+}
+
+# Streams keep white noise independent between bands and products
+_STREAMS = {name: i for i, name in enumerate(
+    ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7', 'B8', 'B11', 'B12',
+     'NDVI', 'treecover2000', 'loss', 'lossyear', 'scene', 'clearing']
+)}
+
+
+def _smoothstep(t):
+    return t * t * (3 - 2 * t)
+
+
+class _LatticeNoise:
+    """Smooth noise: random values on a coarse lattice, interpolated to any pixel window
+
+    The lattice is laid over the full-resolution ``shape``; ``scale`` is the
+    full-resolution pixels per window pixel along each axis, for reading an
+    overview of the same field.
+    """
+
+    def __init__(self, rng, shape, spacing, scale=(1, 1)):
+        self.spacing = spacing
+        self.scale = scale
+        self.values = rng.standard_normal((shape[0] // spacing + 2, shape[1] // spacing + 2)).astype(np.float32)
+
+    def window(self, rows, cols):
+        spacing = self.spacing
+        y = np.arange(rows.start, rows.stop) * self.scale[0] / spacing
+        x = np.arange(cols.start, cols.stop) * self.scale[1] / spacing
+        i, j = y.astype(np.int64), x.astype(np.int64)
+        fy = _smoothstep(y - i).astype(np.float32)[:, None]
+        fx = _smoothstep(x - j).astype(np.float32)[None, :]
+
+        # Interpolate along rows on the lattice columns in use, then along columns
+        j0 = j[0] if len(j) else 0
+        lattice = self.values[:, j0:j[-1] + 2] if len(j) else self.values[:, :0]
+        along_rows = lattice[i] * (1 - fy) + lattice[i + 1] * fy
+        j -= j0
+        return along_rows[:, j] * (1 - fx) + along_rows[:, j + 1] * fx
+
+
+class _SyntheticField(BackendArray):
+    """Lazily generated raster variable: only the indexed window is computed
+
+    ``block(t, rows, cols)`` computes one window (t is None for 2-D fields);
+    white noise is drawn per fixed chunk from a generator seeded by the
+    chunk position, so any window reads the same values however it is
+    sliced.
+    """
+
+    def __init__(self, shape, dtype, block):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.block = block
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self._getitem)
+
+    def _getitem(self, key):
+        key = key + (slice(None),) * (len(self.shape) - len(key))
+        spatial = self.shape[-2:]
+        window = [k if isinstance(k, slice) else slice(k, k + 1) for k in key[-2:]]
+        rows, cols = [slice(*w.indices(n)[:2]) for w, n in zip(window, spatial)]
+        steps = [w.step or 1 for w in window]
+
+        if len(self.shape) == 2:
+            out = self.block(None, rows, cols)
+        else:
+            times = np.arange(self.shape[0])[key[0]]
+            out = np.stack([self.block(int(t), rows, cols) for t in np.atleast_1d(times)])
+            if np.ndim(times) == 0:
+                out = out[0]
+        out = out[..., ::steps[0], ::steps[1]]
+        # Drop the axes of integer indices
+        drop = tuple(-2 + a for a, k in enumerate(key[-2:]) if not isinstance(k, slice))
+        return np.squeeze(out, axis=drop) if drop else out
+
+
+class SyntheticRasterGenerator:
+    """Seeded, spatially correlated stand-ins for the NASA products at any resolution
+
+    A shared land-cover field (multi-octave smooth noise) drives every band,
+    so indices such as NDVI and BSI vary coherently across the scene; each
+    band adds its own seeded white noise. Variables are lazy: a Ghana-wide
+    30 m raster costs nothing until windows of it are read, and a window is
+    generated chunk by chunk. The same seed always gives the same values.
+
+    ``resolution_m`` is one target resolution for every product, or None
+    for each product's native resolution. ``overview()`` gives a generator
+    for a coarser power-of-two level of the same fields, so a small
+    overview of a Ghana-wide 30 m product is generated at its own size.
+    """
+
+    def __init__(self, seed=0, resolution_m=None, chunk_size=1024, factor=1):
+        self.seed = seed
+        self.resolution_m = resolution_m
+        self.chunk_size = chunk_size
+        self.factor = factor
+        self._fields = {}
+        self._overviews = {}
+
+    def _base_resolution(self, source):
+        return self.resolution_m or NATIVE_RESOLUTION_M[source]
+
+    def resolution(self, source):
+        return self._base_resolution(source) * self.factor
+
+    @staticmethod
+    def _shape(bbox, resolution):
+        west, south, east, north = bbox
+        step = resolution / METERS_PER_DEGREE
+        return max(1, int(round((north - south) / step))), max(1, int(round((east - west) / step)))
+
+    def grid(self, bbox, source):
+        """(lats, lons) pixel centres covering bbox at the source's resolution"""
+        west, south, east, north = bbox
+        rows, cols = self._shape(bbox, self.resolution(source))
+        return np.linspace(south, north, rows), np.linspace(west, east, cols)
+
+    def overview(self, bbox, source, size):
+        """Generator for the coarsest power-of-two overview of a product still at least size (rows, cols)
+
+        Levels stop once the longer side fits within OVERVIEW_MIN_SIZE, as
+        cached overviews do; this generator itself when no level is coarse
+        enough.
+        """
+        factor, shape = 1, self._shape(bbox, self.resolution(source))
+        while max(shape) > OVERVIEW_MIN_SIZE:
+            coarser = self._shape(bbox, self.resolution(source) * factor * 2)
+            if coarser[0] < size[0] or coarser[1] < size[1]:
+                break
+            factor, shape = factor * 2, coarser
+        if factor == 1:
+            return self
+        if factor not in self._overviews:
+            self._overviews[factor] = SyntheticRasterGenerator(self.seed, self.resolution_m, self.chunk_size,
+                                                               self.factor * factor)
+        return self._overviews[factor]
+
+    def _raster(self, bbox, source):
+        """(lats, lons, shape, raster id, full-resolution shape)
+
+        Products sharing a bbox and resolution share the id, and so do all
+        overview levels of one product.
+        """
+        lats, lons = self.grid(bbox, source)
+        key = (self._base_resolution(source), [round(float(c), 6) for c in bbox])
+        return (lats, lons, (len(lats), len(lons)), zlib.crc32(repr(key).encode()),
+                self._shape(bbox, self._base_resolution(source)))
+
+    @staticmethod
+    def _scale(shape, base_shape):
+        """Full-resolution pixels per pixel of shape, along each axis"""
+        return tuple((base - 1) / max(n - 1, 1) for n, base in zip(shape, base_shape))
+
+    def _land_cover(self, shape, raster_id, base_shape):
+        """Octaves of lattice noise for one raster, scaled to roughly [-1, 1]
+
+        Octaves finer than an overview pixel average out over it and are
+        left out.
+        """
+        if raster_id not in self._fields:
+            rng = np.random.default_rng([self.seed, raster_id])
+            scale = self._scale(shape, base_shape)
+            # Every octave is drawn, so all levels read the same lattices
+            octaves = [(_LatticeNoise(rng, base_shape, spacing, scale), weight) for spacing, weight in OCTAVES]
+            self._fields[raster_id] = [(noise, weight) for noise, weight in octaves
+                                       if noise.spacing >= self.factor] or octaves[:1]
+        octaves = self._fields[raster_id]
+        last = [None]
+
+        def window(rows, cols):
+            # Bands of a product are read window by window; compute the shared field once per window
+            key = (rows.start, rows.stop, cols.start, cols.stop)
+            cached = last[0]
+            if cached is None or cached[0] != key:
+                field = sum(noise.window(rows, cols) * weight for noise, weight in octaves)
+                cached = last[0] = (key, np.tanh(field, out=field))
+            return cached[1].copy()
+        return window
+
+    def _uniform(self, raster_id, stream, t, rows, cols):
+        """Uniform [0, 1) noise for a window, drawn per chunk from position-seeded generators"""
+        size = self.chunk_size
+        out = np.empty((rows.stop - rows.start, cols.stop - cols.start), dtype=np.float32)
+        for r0 in range(rows.start // size * size, rows.stop, size):
+            for c0 in range(cols.start // size * size, cols.stop, size):
+                rng = np.random.default_rng([self.seed, raster_id, stream, 0 if t is None else t + 1,
+                                             r0 // size, c0 // size])
+                chunk = rng.random((size, size), dtype=np.float32)
+                r_lo, r_hi = max(r0, rows.start), min(r0 + size, rows.stop)
+                c_lo, c_hi = max(c0, cols.start), min(c0 + size, cols.stop)
+                out[r_lo - rows.start:r_hi - rows.start, c_lo - cols.start:c_hi - cols.start] = \
+                    chunk[r_lo - r0:r_hi - r0, c_lo - c0:c_hi - c0]
+        return out
+
+    def _white_noise(self, raster_id, stream, t, rows, cols):
+        """Zero-mean, unit-variance noise (uniform: a quarter of the cost of normal draws)
+
+        On an overview the deviation shrinks by the factor, as averaging
+        factor x factor pixels would.
+        """
+        noise = self._uniform(raster_id, stream, t, rows, cols)
+        noise -= 0.5
+        noise *= np.float32(np.sqrt(12) / self.factor)
+        return noise
+
+    def _band(self, raster_id, land_cover, stream, mean, response, noise, scene_field=None):
+        def block(t, rows, cols):
+            value = land_cover(rows, cols)
+            if scene_field is not None:
+                value += scene_field(t)(rows, cols)
+            value *= response
+            value += mean
+            value += noise * self._white_noise(raster_id, stream, t, rows, cols)
+            return np.clip(value, 0, 1, out=value)
+        return block
+
+    @staticmethod
+    def _variable(dims, shape, block):
+        return xr.Variable(dims, indexing.LazilyIndexedArray(_SyntheticField(shape, np.float32, block)))
+
+    def _reflectance(self, bbox, source, bands):
+        lats, lons, shape, raster_id, base_shape = self._raster(bbox, source)
+        land_cover = self._land_cover(shape, raster_id, base_shape)
+        data_vars = {
+            band: self._variable(['lat', 'lon'], shape, self._band(raster_id, land_cover, _STREAMS[band], *params))
+            for band, params in bands.items()
+        }
+        return xr.Dataset(data_vars, coords={'lat': lats, 'lon': lons})
+
+    def landsat_surface_reflectance(self, bbox):
+        return self._reflectance(bbox, 'landsat', LANDSAT_BANDS)
+
+    def sentinel2_data(self, bbox):
+        return self._reflectance(bbox, 'sentinel2', SENTINEL2_BANDS)
+
+    def landsat_time_series(self, bbox, start_date, end_date):
+        """8-day Landsat 8/9 stack on the bbox's path schedule; each scene adds its
+        own coarse, seeded perturbation"""
+        from nasa_data_fetcher import landsat_scenes
+        dates = np.array([scene['date'] for scene in landsat_scenes(bbox, start_date, end_date)],
+                         dtype='datetime64[D]')
+        lats, lons, shape, raster_id, base_shape = self._raster(bbox, 'landsat_series')
+        land_cover = self._land_cover(shape, raster_id, base_shape)
+
+        scenes = {}
+
+        def scene_field(t):
+            if t not in scenes:
+                rng = np.random.default_rng([self.seed, raster_id, _STREAMS['scene'], t])
+                noise = _LatticeNoise(rng, base_shape, OCTAVES[0][0], self._scale(shape, base_shape))
+                scenes[t] = lambda rows, cols: noise.window(rows, cols) * np.float32(0.2)
+            return scenes[t]
+
+        data_vars = {
+            band: self._variable(['time', 'lat', 'lon'], (len(dates),) + shape,
+                                 self._band(raster_id, land_cover, _STREAMS[band], *LANDSAT_BANDS[band], scene_field))
+            for band in ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+        }
+        return xr.Dataset(data_vars, coords={'time': dates, 'lat': lats, 'lon': lons})
+
+    def modis_ndvi(self, bbox, start_date, end_date):
+        """16-day NDVI composites: a seasonal cycle over the land-cover field, plus
+        scattered clearings (2% of pixels) whose NDVI falls 0.03 a year from 2015
+
+        Composites follow the MOD13 calendar (day 1, 17, 33, ... of each
+        year) and noise is keyed by composite date, so a composite has the
+        same values whatever date range it is requested in.
+        """
+        from modis_cube import composite_dates
+        dates = composite_dates(start_date, end_date)
+        lats, lons, shape, raster_id, base_shape = self._raster(bbox, 'modis')
+        land_cover = self._land_cover(shape, raster_id, base_shape)
+        day_of_year = (dates - dates.astype('datetime64[Y]')).astype(np.float32)
+        season = 0.1 * np.sin(2 * np.pi * day_of_year / 365.25).astype(np.float32)
+        years_cleared = np.clip((dates - np.datetime64('2015-01-01', 'D')).astype(np.float32) / 365.25, 0, None)
+
+        def block(t, rows, cols):
+            ndvi = land_cover(rows, cols) * np.float32(0.25) + np.float32(0.6 + season[t])
+            cleared = self._uniform(raster_id, _STREAMS['clearing'], None, rows, cols) < 0.02
+            ndvi -= np.float32(0.03 * years_cleared[t]) * cleared
+            ndvi += 0.05 * self._white_noise(raster_id, _STREAMS['NDVI'], int(dates[t].astype(np.int64)), rows, cols)
+            return np.clip(ndvi, -1, 1, out=ndvi)
+
+        return xr.Dataset({
+            'NDVI': self._variable(['time', 'lat', 'lon'], (len(dates),) + shape, block)
+        }, coords={'time': dates.astype(str), 'lat': lats, 'lon': lons})
+
+    def hansen_forest_data(self, bbox):
+        """Tree cover from the land-cover field; loss concentrated where cover is patchy"""
+        lats, lons, shape, raster_id, base_shape = self._raster(bbox, 'hansen')
+        land_cover = self._land_cover(shape, raster_id, base_shape)
+
+        def treecover(t, rows, cols):
+            cover = (land_cover(rows, cols) + 1) * 50
+            return np.clip(cover + 5 * self._white_noise(raster_id, _STREAMS['treecover2000'], None, rows, cols), 0, 100)
+
+        def loss_probability(rows, cols):
+            # Cover between roughly 20 and 60 % is where clearing happens
+            cover = land_cover(rows, cols)
+            return 0.1 * np.exp(-((cover + 0.2) / 0.3) ** 2)
+
+        def loss(t, rows, cols):
+            uniform = self._uniform(raster_id, _STREAMS['loss'], None, rows, cols)
+            return (uniform < loss_probability(rows, cols)).astype(np.float32)
+
+        def lossyear(t, rows, cols):
+            years = np.floor(self._uniform(raster_id, _STREAMS['lossyear'], None, rows, cols) * 22) + 1
+            return years * loss(t, rows, cols)
+
+        return xr.Dataset({
+            'treecover2000': self._variable(['lat', 'lon'], shape, treecover),
+            'loss': self._variable(['lat', 'lon'], shape, loss),
+            'lossyear': self._variable(['lat', 'lon'], shape, lossyear)
+        }, coords={'lat': lats, 'lon': lons})
@@ -0,0 +1,287 @@
+import hashlib
+import math
+import os
+import shutil
+import struct
+import threading
+import uuid
+import zlib
+
+import numpy as np
+
+from raster_grid import output_size
+
+TILE_SIZE = 256
+# Deepest zoom served; bounds the tile cache and keeps tile sizes in degrees representable
+MAX_ZOOM = int(os.getenv('GALAMSEY_TILE_MAX_ZOOM', '22'))
+DEFAULT_TILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tiles')
+
+# Ghana bounding box [west, south, east, north]
+GHANA_BBOX = [-3.25, 4.74, 1.19, 11.17]
+
+# Same styling as the Earth Engine layers in api/ee_imagery.py, on local band names
+VIS_PARAMS = {
+    'landsat': {
+        'bands': ['B4', 'B3', 'B2'],
+        'min': 0.0,
+        'max': 0.3,
+        'gamma': 1.4
+    },
+    'ndvi': {
+        'bands': ['NDVI'],
+        'min': -1,
+        'max': 1,
+        'palette': ['red', 'yellow', 'green']
+    }
+}
+
+# CSS colors accepted in palettes (Earth Engine uses CSS names)
+CSS_COLORS = {
+    'red': (255, 0, 0),
+    'yellow': (255, 255, 0),
+    'green': (0, 128, 0),
+    'orange': (255, 165, 0),
+    'white': (255, 255, 255),
+    'black': (0, 0, 0),
+    'blue': (0, 0, 255)
+}
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) in degrees of a Web Mercator XYZ tile"""
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def tile_pixel_coords(z, x, y, size=TILE_SIZE):
+    """Latitudes (per row) and longitudes (per column) of tile pixel centres"""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return lats, lons
+
+
+def _nearest_index(coords, values):
+    """Index of the nearest grid coordinate and whether values fall on the grid"""
+    coords = np.asarray(coords, dtype=float)
+    descending = coords[0] > coords[-1]
+    ascending = coords[::-1] if descending else coords
+
+    idx = np.clip(np.searchsorted(ascending, values), 1, len(ascending) - 1)
+    left, right = ascending[idx - 1], ascending[idx]
+    idx = np.where(values - left < right - values, idx - 1, idx)
+
+    half = (ascending[-1] - ascending[0]) / max(len(ascending) - 1, 1) / 2
+    valid = (values >= ascending[0] - half) & (values <= ascending[-1] + half)
+
+    if descending:
+        idx = len(coords) - 1 - idx
+    return idx, valid
+
+
+def _file_identity(path):
+    """(inode, size) of a source file, which changes when the file is replaced"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size)
+
+
+def _parse_color(color):
+    if color in CSS_COLORS:
+        return CSS_COLORS[color]
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def colorize(bands, vis_params):
+    """RGBA uint8 image from band arrays using Earth Engine style vis params"""
+    lo, hi = vis_params.get('min', 0.0), vis_params.get('max', 1.0)
+    stack = np.stack(bands).astype(np.float32)
+    alpha = np.where(np.isnan(stack).any(axis=0), 0, 255).astype(np.uint8)
+    scaled = np.clip((np.nan_to_num(stack) - lo) / (hi - lo), 0, 1)
+
+    if 'palette' in vis_params:
+        palette = np.array([_parse_color(c) for c in vis_params['palette']], dtype=np.float32)
+        position = scaled[0] * (len(palette) - 1)
+        lower = np.minimum(position.astype(int), len(palette) - 2)
+        frac = (position - lower)[..., None]
+        rgb = palette[lower] * (1 - frac) + palette[lower + 1] * frac
+    else:
+        if 'gamma' in vis_params:
+            scaled = scaled ** (1.0 / vis_params['gamma'])
+        rgb = np.moveaxis(scaled, 0, -1) * 255
+        if rgb.shape[-1] == 1:
+            rgb = np.repeat(rgb, 3, axis=-1)
+
+    return np.dstack([np.round(rgb).astype(np.uint8), alpha])
+
+
+def encode_png(rgba):
+    """Encode an (h, w, 4) uint8 array as PNG bytes"""
+    height, width, _ = rgba.shape
+    # Filter type 0 (none) at the start of every scanline
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8),
+                          rgba.reshape(height, width * 4)], axis=1)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) +
+            chunk(b'IEND', b''))
+
+
+class TileRenderer:
+    """Renders XYZ PNG tiles from local rasters into a z/x/y disk cache
+
+    ``load_source(dataset)`` returns an xarray Dataset on a lat/lon grid
+    holding the bands named in that dataset's vis params. Tiles are cached
+    under the source's version, and a source opened from a file is
+    reloaded once that file is replaced, so a new source raster never
+    serves stale tiles; tiles of replaced versions are deleted.
+
+    Given the sources' ``extent``, ``load_source(dataset, size)`` is called
+    instead with the (rows, cols) a zoom level needs over that extent, so
+    zoomed-out tiles can be rendered from a raster overview, and tiles
+    outside the extent are rejected rather than rendered blank.
+    """
+
+    def __init__(self, load_source, cache_dir=None, vis_params=None, extent=None, max_zoom=MAX_ZOOM):
+        self.load_source = load_source
+        self.cache_dir = cache_dir or os.getenv('GALAMSEY_TILE_DIR', DEFAULT_TILE_DIR)
+        self.vis_params = vis_params or VIS_PARAMS
+        self.extent = extent
+        self.max_zoom = max_zoom
+        self._sources = {}
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def check_tile(self, dataset, z, x, y):
+        """Raise ValueError for an unknown dataset, a tile outside zoom 0..max_zoom or outside the extent"""
+        if dataset not in self.vis_params:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        if not 0 <= z <= self.max_zoom:
+            raise ValueError(f"Zoom {z} is outside 0..{self.max_zoom}")
+        if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Tile {z}/{x}/{y} is out of range")
+        if self.extent is not None:
+            west, south, east, north = tile_bounds(z, x, y)
+            if (west >= self.extent[2] or east <= self.extent[0] or
+                    south >= self.extent[3] or north <= self.extent[1]):
+                raise ValueError(f"Tile {z}/{x}/{y} is outside the dataset extent")
+
+    def source_size(self, z):
+        """(rows, cols) of source pixels needed over the extent at zoom z, or None without an extent
+
+        Raises ValueError outside zoom 0..max_zoom, where the tile size in
+        degrees would underflow.
+        """
+        if not 0 <= z <= self.max_zoom:
+            raise ValueError(f"Zoom {z} is outside 0..{self.max_zoom}")
+        if self.extent is None:
+            return None
+        # Mercator pixels shrink with latitude; size for the extent's widest latitude
+        degrees_per_pixel = 360 / 2 ** z / TILE_SIZE * math.cos(math.radians(max(abs(self.extent[1]),
+                                                                                  abs(self.extent[3]))))
+        return output_size(self.extent, degrees_per_pixel)
+
+    def _prune_versions(self, tile_dir):
+        """Delete cached tiles of every other version of a source level"""
+        level_dir, version = os.path.split(tile_dir)
+        try:
+            names = os.listdir(level_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name != version:
+                shutil.rmtree(os.path.join(level_dir, name), ignore_errors=True)
+
+    def _stale(self, level):
+        cached = self._sources[level]
+        return cached['file'] is not None and _file_identity(cached['file']) != cached['identity']
+
+    def source(self, dataset, size=None):
+        """Band arrays, coordinates and version of a tile dataset, loaded once per source file and level"""
+        with self._lock:
+            level = self._levels.get((dataset, size))
+            if level is None or self._stale(level):
+                source = self.load_source(dataset) if size is None else self.load_source(dataset, size)
+                # Sizes that resolve to the same overview share its arrays
+                level = (dataset, source.sizes['lat'], source.sizes['lon'])
+                path = source.encoding.get('source')
+                identity = _file_identity(path) if path else None
+                cached = self._sources.get(level)
+                if cached is None or cached['file'] != path or cached['identity'] != identity:
+                    bands = {
+                        band: np.asarray(source[band].transpose('lat', 'lon').values, dtype=np.float32)
+                        for band in self.vis_params[dataset]['bands']
+                    }
+                    digest = hashlib.sha1(dataset.encode())
+                    for values in bands.values():
+                        digest.update(values.tobytes())
+                    version = digest.hexdigest()[:12]
+                    tile_dir = os.path.join(self.cache_dir, dataset, f"{level[1]}x{level[2]}", version)
+                    self._prune_versions(tile_dir)
+                    self._sources[level] = {
+                        'lat': source['lat'].values,
+                        'lon': source['lon'].values,
+                        'bands': bands,
+                        'version': version,
+                        'tile_dir': tile_dir,
+                        'file': path,
+                        'identity': identity
+                    }
+                self._levels[(dataset, size)] = level
+            return self._sources[self._levels[(dataset, size)]]
+
+    def render(self, dataset, z, x, y):
+        """Render one tile to PNG bytes without touching the cache"""
+        self.check_tile(dataset, z, x, y)
+        source = self.source(dataset, self.source_size(z))
+
+        lats, lons = tile_pixel_coords(z, x, y)
+        rows, rows_valid = _nearest_index(source['lat'], lats)
+        cols, cols_valid = _nearest_index(source['lon'], lons)
+        outside = ~(rows_valid[:, None] & cols_valid[None, :])
+
+        bands = []
+        for values in source['bands'].values():
+            sampled = values[np.ix_(rows, cols)]
+            sampled[outside] = np.nan
+            bands.append(sampled)
+
+        return encode_png(colorize(bands, self.vis_params[dataset]))
+
+    def get_tile(self, dataset, z, x, y):
+        """(png bytes, etag) for a tile, rendering and caching it on a miss"""
+        self.check_tile(dataset, z, x, y)
+
+        source = self.source(dataset, self.source_size(z))
+        version = source['version']
+        path = os.path.join(source['tile_dir'], str(z), str(x), f"{y}.png")
+        etag = f'"{version}-{z}-{x}-{y}"'
+        try:
+            with open(path, 'rb') as f:
+                return f.read(), etag
+        except FileNotFoundError:
+            pass
+
+        png = self.render(dataset, z, x, y)
+
+        # Write atomically so concurrent requests never read a partial tile
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+
+        return png, etag
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ml_model import prepare_training_data
+from nasa_data_fetcher import NASADataFetcher
+from raster_cache import RasterCache
+from raster_indices import BAND_MAPS, compute_indices
+
+# Patch channels: Landsat 8/9 surface reflectance plus NDVI (the CNN's 8 input channels)
+CHANNELS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7', 'NDVI']
+
+# Landsat pixel (30 m) in degrees near the equator
+LANDSAT_PIXEL_DEG = 0.00027
+
+MANIFEST_FILE = 'dataset.json'
+
+
+def sample_sites(sites, samples_per_site, jitter_deg=0.05, seed=42):
+    """(lat, lon, label) arrays of points scattered around each labeled site"""
+    rng = np.random.default_rng(seed)
+    lats, lons, labels = [], [], []
+    for site in sites:
+        lats.append(site['lat'] + rng.uniform(-jitter_deg, jitter_deg, samples_per_site))
+        lons.append(site['lon'] + rng.uniform(-jitter_deg, jitter_deg, samples_per_site))
+        labels.append(np.full(samples_per_site, site['label'], dtype=np.int8))
+
+    order = rng.permutation(len(sites) * samples_per_site)
+    return np.concatenate(lats)[order], np.concatenate(lons)[order], np.concatenate(labels)[order]
+
+
+def patch_features(patches):
+    """Tabular features for the Random Forest: per-channel mean of each patch"""
+    return np.nanmean(patches, axis=(1, 2)).astype(np.float32)
+
+
+def point_patches(fetcher, lats, lons, patch_size=64, start_date='2024-01-01', end_date='2024-12-31'):
+    """(n, p, p, 8) float32 patches of the CHANNELS centred on each point"""
+    grid = fetcher.GRID_SIZES['landsat']
+    if patch_size > grid:
+        raise ValueError(f"patch_size must be at most {grid}")
+    half = grid * LANDSAT_PIXEL_DEG / 2
+    offset = (grid - patch_size) // 2
+
+    patches = np.empty((len(lats), patch_size, patch_size, len(CHANNELS)), dtype=np.float32)
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        bbox = [lon - half, lat - half, lon + half, lat + half]
+        scene = fetcher.get_landsat_surface_reflectance(bbox, start_date, end_date)
+        window = (slice(offset, offset + patch_size),) * 2
+        for c, band in enumerate(CHANNELS[:-1]):
+            patches[i, :, :, c] = scene[band].values[window]
+        # NDVI straight from the band planes already in the patch
+        bands = {role: patches[i, :, :, CHANNELS.index(band)] for role, band in BAND_MAPS['landsat'].items()}
+        compute_indices(**bands, out=(patches[i, :, :, -1], np.empty_like(bands['red']), np.empty_like(bands['red'])))
+    return patches
+
+
+def point_features(fetcher, lats, lons, patch_size=64, start_date='2024-01-01', end_date='2024-12-31'):
+    """Random Forest feature rows for points, built the same way as the training shards"""
+    return patch_features(point_patches(fetcher, lats, lons, patch_size, start_date, end_date))
+
+
+def _write_shard(path, lats, lons, labels, patch_size, start_date, end_date, use_cache, seed):
+    """Worker: fetch a patch around every point and write one .npz shard"""
+    # The synthetic fetcher draws from the global RNG; seed per shard so builds are reproducible
+    np.random.seed(seed)
+    fetcher = NASADataFetcher(cache=RasterCache() if use_cache else None)
+    patches = point_patches(fetcher, lats, lons, patch_size, start_date, end_date)
+
+    # Written under a temporary name so readers never see a partial shard
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, patches=patches, features=patch_features(patches), labels=labels,
+                 lat=np.asarray(lats, dtype=np.float32), lon=np.asarray(lons, dtype=np.float32))
+    os.replace(tmp_path, path)
+    return {'file': os.path.basename(path), 'count': len(labels), 'positives': int(labels.sum())}
+
+
+def build_dataset(out_dir, sites=None, samples_per_site=512, shard_size=256, patch_size=64,
+                  start_date='2024-01-01', end_date='2024-12-31', workers=None, use_cache=False, seed=42):
+    """Sample labeled patches around sites into sharded .npz files, one shard per worker task
+
+    Each shard holds ``patches`` (n, p, p, 8) float32, ``features`` (n, 8)
+    float32, ``labels`` (n,) int8 and the sample coordinates; dataset.json
+    lists the shards. Returns the manifest.
+    """
+    sites = sites or prepare_training_data()
+    lats, lons, labels = sample_sites(sites, samples_per_site, seed=seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    workers = workers or int(os.getenv('GALAMSEY_WORKERS', '0')) or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_write_shard, os.path.join(out_dir, f"shard-{i:05d}.npz"),
+                        lats[start:start + shard_size], lons[start:start + shard_size],
+                        labels[start:start + shard_size], patch_size, start_date, end_date,
+                        use_cache, seed + i)
+            for i, start in enumerate(range(0, len(labels), shard_size))
+        ]
+        shards = [future.result() for future in futures]
+
+    manifest = {
+        'channels': CHANNELS,
+        'patch_size': patch_size,
+        'count': int(len(labels)),
+        'positives': int(labels.sum()),
+        'start_date': start_date,
+        'end_date': end_date,
+        'shards': shards
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(dataset_dir):
+    with open(os.path.join(dataset_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def split_shards(dataset_dir, validation_shards=1):
+    """(train, validation) shard paths; validation takes the last shards"""
+    paths = [os.path.join(dataset_dir, shard['file']) for shard in load_manifest(dataset_dir)['shards']]
+    if len(paths) <= validation_shards:
+        raise ValueError("Not enough shards for a validation split")
+    return paths[:-validation_shards], paths[-validation_shards:]
+
+
+def iter_shard(path, key='patches', block_size=64):
+    """Yield (inputs, labels) blocks from one shard; npz members load only when read"""
+    with np.load(path) as shard:
+        inputs, labels = shard[key], shard['labels'].astype(np.float32)
+    for start in range(0, len(labels), block_size):
+        yield inputs[start:start + block_size], labels[start:start + block_size]
+
+
+def load_features(paths):
+    """Stacked tabular features and labels from shards, without reading the patches"""
+    features, labels = [], []
+    for path in paths:
+        with np.load(path) as shard:
+            features.append(shard['features'])
+            labels.append(shard['labels'])
+    return np.concatenate(features), np.concatenate(labels)
+
+
+def make_tf_dataset(paths, key='patches', batch_size=32, shuffle_buffer=2048, cache=None,
+                    cycle_length=4, training=True):
+    """Streaming tf.data pipeline over shards: interleave, (cache), shuffle, batch, prefetch
+
+    Shards are read cycle_length at a time in parallel, so memory use is
+    bounded by the shuffle buffer, not the dataset size. ``cache`` may be a
+    file prefix (on-disk cache after the first epoch) or True (in memory,
+    only for datasets that fit in RAM).
+    """
+    import tensorflow as tf
+
+    with np.load(paths[0]) as shard:
+        input_shape = shard[key].shape[1:]
+    signature = (
+        tf.TensorSpec(shape=(None, *input_shape), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32)
+    )
+
+    dataset = tf.data.Dataset.from_tensor_slices(paths)
+    if training:
+        dataset = dataset.shuffle(len(paths), reshuffle_each_iteration=True)
+    dataset = dataset.interleave(
+        lambda path: tf.data.Dataset.from_generator(
+            lambda p: iter_shard(p.decode(), key), args=(path,), output_signature=signature
+        ),
+        cycle_length=cycle_length,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not training
+    ).unbatch()
+
+    if cache is True:
+        dataset = dataset.cache()
+    elif cache:
+        dataset = dataset.cache(cache)
+    if training:
+        dataset = dataset.shuffle(shuffle_buffer)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a sharded training dataset around labeled sites")
+    parser.add_argument('out_dir')
+    parser.add_argument('--samples-per-site', type=int, default=512)
+    parser.add_argument('--shard-size', type=int, default=256)
+    parser.add_argument('--patch-size', type=int, default=64)
+    parser.add_argument('--start-date', default='2024-01-01')
+    parser.add_argument('--end-date', default='2024-12-31')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--use-cache', action='store_true', help="Keep fetched scenes in the raster cache")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    manifest = build_dataset(args.out_dir, samples_per_site=args.samples_per_site, shard_size=args.shard_size,
+                             patch_size=args.patch_size, start_date=args.start_date, end_date=args.end_date,
+                             workers=args.workers, use_cache=args.use_cache, seed=args.seed)
+    print(f"💾 Wrote {manifest['count']} samples ({manifest['positives']} positive) "
+          f"in {len(manifest['shards'])} shards to {args.out_dir}")
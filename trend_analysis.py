@@ -0,0 +1,108 @@
+import numpy as np
+from scipy.special import ndtr
+
+# Pairwise slopes held at once (pairs x pixels, float32): bounds memory per pixel block
+PAIR_BUDGET = 1 << 21
+
+TREND_VARIABLES = ['ols_slope', 'theil_sen_slope', 'mk_z', 'mk_p', 'n_obs']
+
+
+def _years(times):
+    """Decimal years since the first time step"""
+    days = (np.asarray(times, dtype='datetime64[D]') - np.asarray(times, dtype='datetime64[D]')[0]).astype(np.float64)
+    return days / 365.25
+
+
+def ols_slope(y, t):
+    """Least-squares slope per pixel of y (T, n) against t (T,), ignoring NaNs"""
+    valid = np.isfinite(y)
+    n = valid.sum(axis=0)
+    tt = np.where(valid, t[:, None], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_mean = tt.sum(axis=0) / n
+        y_mean = np.where(valid, y, 0.0).sum(axis=0) / n
+        dt = np.where(valid, t[:, None] - t_mean, 0.0)
+        covariance = (dt * np.where(valid, y - y_mean, 0.0)).sum(axis=0)
+        return (covariance / (dt * dt).sum(axis=0)).astype(np.float32)
+
+
+def pairwise_trends(y, t):
+    """Theil-Sen slope and Mann-Kendall (z, two-sided p) per pixel of y (T, n)
+
+    All T(T-1)/2 ordered pairs are built lag by lag as whole-array
+    differences, pixel-major so the median is a contiguous partition per
+    row. NaN observations drop out of both statistics. Ties are not
+    corrected for in the Mann-Kendall variance.
+    """
+    T, n_pixels = y.shape
+    series = np.ascontiguousarray(y.T)
+    n_pairs = T * (T - 1) // 2
+    pairs = np.empty((n_pixels, n_pairs), dtype=np.float32)
+    col = 0
+    for lag in range(1, T):
+        block = pairs[:, col:col + T - lag]
+        np.subtract(series[:, lag:], series[:, :-lag], out=block)
+        block *= (1 / (t[lag:] - t[:-lag])).astype(np.float32)
+        col += T - lag
+
+    # Every dt is positive, so slope signs are the Mann-Kendall pair signs
+    s = (pairs > 0).sum(axis=1, dtype=np.int32) - (pairs < 0).sum(axis=1, dtype=np.int32)
+
+    if np.isnan(pairs).any():
+        theil_sen = np.nanmedian(pairs, axis=1)
+    else:
+        middle = n_pairs // 2
+        pairs.partition([middle - 1, middle] if n_pairs % 2 == 0 else middle, axis=1)
+        theil_sen = pairs[:, middle] if n_pairs % 2 else (pairs[:, middle - 1] + pairs[:, middle]) / 2
+
+    n = np.isfinite(y).sum(axis=0).astype(np.float64)
+    variance = n * (n - 1) * (2 * n + 5) / 18
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (s - np.sign(s)) / np.sqrt(variance)
+    p = 2 * ndtr(-np.abs(z))
+    return theil_sen.astype(np.float32), z.astype(np.float32), p.astype(np.float32)
+
+
+def block_trends(y, t):
+    """Every trend statistic for y (T, n), in TREND_VARIABLES order"""
+    y = np.asarray(y, dtype=np.float32)
+    results = {name: np.full(y.shape[1], np.nan, dtype=np.float32) for name in TREND_VARIABLES}
+    results['n_obs'] = np.isfinite(y).sum(axis=0).astype(np.float32)
+    if len(t) < 3:
+        return results
+
+    results['ols_slope'] = ols_slope(y, t)
+    # Keep pairs x pixels within PAIR_BUDGET
+    step = max(1, PAIR_BUDGET // (len(t) * (len(t) - 1) // 2))
+    for start in range(0, y.shape[1], step):
+        stop = min(start + step, y.shape[1])
+        (results['theil_sen_slope'][start:stop], results['mk_z'][start:stop],
+         results['mk_p'][start:stop]) = pairwise_trends(y[:, start:stop], t)
+    return results
+
+
+def compute_trends(ndvi, times, block_size=256):
+    """Per-pixel trend maps for a (time, rows, cols) array-like, one spatial block at a time
+
+    ``ndvi`` may be a numpy array, netCDF4 variable or lazy xarray
+    variable; only a (time, block, block) slab is read at once. Slopes are
+    in NDVI units per year. Returns {name: (rows, cols) float32 array}.
+    """
+    t = _years(times)
+    _, rows, cols = ndvi.shape
+    out = {name: np.empty((rows, cols), dtype=np.float32) for name in TREND_VARIABLES}
+
+    for r0 in range(0, rows, block_size):
+        for c0 in range(0, cols, block_size):
+            slab = np.asarray(ndvi[:, r0:r0 + block_size, c0:c0 + block_size], dtype=np.float32)
+            h, w = slab.shape[1:]
+            for name, values in block_trends(slab.reshape(len(t), h * w), t).items():
+                out[name][r0:r0 + h, c0:c0 + w] = values.reshape(h, w)
+
+    return out
+
+
+def decline_mask(trends, min_decline=0.01, max_p=0.05):
+    """Pixels whose Theil-Sen NDVI slope falls faster than min_decline per year, significantly"""
+    with np.errstate(invalid='ignore'):
+        return (trends['theil_sen_slope'] < -min_decline) & (trends['mk_p'] < max_p)